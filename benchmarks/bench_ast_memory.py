@@ -0,0 +1,41 @@
+"""Memory retained by parsed ASTs, in bytes per AST node.
+
+Parses several generated contracts, keeps every AST alive and reports the
+memory still allocated afterwards, as measured by tracemalloc.
+
+    python -m benchmarks.bench_ast_memory [--lines 2000] [--contracts 5]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from stxscript import StxScriptTranspiler
+from stxscript.stats import count_nodes
+
+from .generator import generate_contract
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=2000)
+    arg_parser.add_argument('--contracts', type=int, default=5)
+    args = arg_parser.parse_args(argv)
+
+    transpiler = StxScriptTranspiler()
+    sources = [generate_contract(args.lines, seed) for seed in range(args.contracts)]
+    transpiler.parse(sources[0])
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    asts = [transpiler.parse(source) for source in sources]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    nodes = sum(sum(count_nodes(ast).values()) for ast in asts)
+    print(f'{nodes} nodes  {retained / 2**20:8.2f} MiB  {retained / nodes:8.1f} bytes/node')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Reloading a serialized AST versus parsing the source again.
+
+The contract is parsed once and dumped with ``dump_ast``. Then a fresh parse
+is timed against ``load_ast`` of the dumped bytes. The loaded tree is checked
+to equal the parsed one before timing.
+
+    python -m benchmarks.bench_ast_serialize [--lines 5000] [--repeat 3]
+"""
+import argparse
+
+from stxscript import StxScriptTranspiler
+from stxscript.serialize import dump_ast, load_ast
+
+from .bench_expression_parse import best_of
+from .generator import generate_contract
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=5000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    source = generate_contract(args.lines)
+    transpiler = StxScriptTranspiler()
+    program = transpiler.parse(source)
+    data = dump_ast(program)
+    if load_ast(data) != program:
+        raise SystemExit('loaded AST differs from the parsed one')
+
+    parse_time, _ = best_of(args.repeat, transpiler.parse, source)
+    dump_time, _ = best_of(args.repeat, dump_ast, program)
+    load_time, _ = best_of(args.repeat, load_ast, data)
+    print(f'{args.lines} lines, {len(source)} bytes of source, {len(data)} bytes serialized')
+    print(f'parse {parse_time * 1000:8.1f} ms')
+    print(f'dump  {dump_time * 1000:8.1f} ms')
+    print(f'load  {load_time * 1000:8.1f} ms   {parse_time / load_time:5.1f}x faster than parse')
+
+
+if __name__ == '__main__':
+    main()
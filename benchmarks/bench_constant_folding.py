@@ -0,0 +1,33 @@
+"""Output size and pass time with constant folding on and off.
+
+The generated contract is transpiled at -O0 and with the fold-constants
+pass. The report shows the Clarity bytes and the number of operator forms
+in each, and the time the pass took.
+
+    python -m benchmarks.bench_constant_folding [--lines 5000]
+"""
+import argparse
+
+from stxscript import StxScriptTranspiler
+from stxscript.passes import PassManager
+
+from .generator import generate_contract
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=5000)
+    args = arg_parser.parse_args(argv)
+
+    source = generate_contract(args.lines)
+    print(f'{args.lines} lines, {len(source)} bytes')
+    for name, manager in (('-O0', PassManager(0)),
+                          ('fold-constants', PassManager(0, enable=['fold-constants']))):
+        clarity_code = StxScriptTranspiler(pass_manager=manager).transpile(source)
+        seconds = manager.timings.get('fold-constants', 0.0)
+        print(f'{name:<16} {len(clarity_code):10d} bytes {clarity_code.count("("):8d} forms'
+              f'   pass {seconds * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
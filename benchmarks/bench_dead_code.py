@@ -0,0 +1,38 @@
+"""Contract size with and without dead-code elimination.
+
+The generated contract is transpiled at -O0 and with the
+eliminate-dead-code pass. The report shows what the pass removed, the
+bytes it reported saving and the time it took.
+
+    python -m benchmarks.bench_dead_code [--lines 5000]
+"""
+import argparse
+
+from stxscript import StxScriptTranspiler
+from stxscript.passes import PassManager
+
+from .generator import generate_contract
+
+NAME = 'eliminate-dead-code'
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=5000)
+    args = arg_parser.parse_args(argv)
+
+    source = generate_contract(args.lines)
+    before = StxScriptTranspiler().transpile(source)
+    manager = PassManager(0, enable=[NAME])
+    after = StxScriptTranspiler(pass_manager=manager).transpile(source)
+    counters = manager.counters[NAME]
+    print(f'{args.lines} lines, {len(source)} bytes')
+    print(f'-O0                  {len(before):10d} bytes')
+    print(f'{NAME:<20} {len(after):10d} bytes   pass {manager.timings[NAME] * 1000:7.1f} ms')
+    print('removed: ' + ', '.join(f'{count} {kind}' for kind, count in counters.items()
+                                  if kind != 'bytes_saved'))
+    print(f'bytes saved: {counters["bytes_saved"]} reported, {len(before) - len(after)} measured')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Transpile time for long left-associative sums and deeply nested brackets.
+
+Time per term should stay flat as depth grows, in both the two-pass and
+fused modes.
+
+    python -m benchmarks.bench_deep_nesting [--terms 10000 25000 50000 100000]
+"""
+import argparse
+import time
+
+from stxscript import StxScriptTranspiler
+
+
+def sum_chain(terms):
+    return 'let x: int = ' + ' + '.join(f'a{i}' for i in range(terms)) + ';'
+
+
+def nested_lists(depth):
+    return 'let x: int = ' + '[' * depth + '1' + ']' * depth + ';'
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--terms', type=int, nargs='+', default=[10000, 25000, 50000, 100000])
+    args = arg_parser.parse_args(argv)
+
+    print(f'{"input":<14}{"size":>8}{"two-pass":>12}{"fused":>12}{"us/term":>10}')
+    transpilers = (StxScriptTranspiler(), StxScriptTranspiler(fused=True))
+    for name, make_source in (('sum chain', sum_chain), ('nested lists', nested_lists)):
+        for terms in args.terms:
+            source = make_source(terms)
+            times = []
+            for transpiler in transpilers:
+                start = time.perf_counter()
+                transpiler.transpile(source)
+                times.append(time.perf_counter() - start)
+            print(f'{name:<14}{terms:>8}' + ''.join(f'{t:10.2f} s' for t in times)
+                  + f'{times[1] / terms * 1e6:10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Parse and AST-build time on expression-heavy source.
+
+Every line is a variable declaration whose value is a random nested
+expression or a long sum, so nearly all parser work is in the expression
+grammar.
+
+    python -m benchmarks.bench_expression_parse [--lines 1000] [--repeat 3]
+"""
+import argparse
+import time
+
+from stxscript import StxScriptTranspiler
+
+from .generator import ContractGenerator
+
+
+def expression_source(lines, seed=0):
+    generator = ContractGenerator(seed, max_depth=6)
+    variables = ['a', 'b', 'c', 'd']
+    statements = []
+    for i in range(lines):
+        if i % 4 == 3:
+            value = generator.chain(variables)
+        else:
+            value = generator.expression(variables)
+        statements.append(f'let v{i}: int = {value};')
+    return '\n'.join(statements)
+
+
+def best_of(repeat, function, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=1000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    source = expression_source(args.lines)
+    two_pass = StxScriptTranspiler()
+    fused = StxScriptTranspiler(fused=True)
+    parse_time, tree = best_of(args.repeat, two_pass.parser.parse, source)
+    transform_time, _ = best_of(args.repeat, two_pass.transformer.transform, tree)
+    fused_time, _ = best_of(args.repeat, fused.parse, source)
+
+    print(f'{args.lines} lines, {len(source)} bytes')
+    for name, seconds in (('parse', parse_time), ('transform', transform_time),
+                          ('parse+transform', parse_time + transform_time),
+                          ('fused parse', fused_time)):
+        print(f'{name:<16} {seconds * 1000:9.1f} ms  {args.lines / seconds:10.0f} lines/s')
+
+
+if __name__ == '__main__':
+    main()
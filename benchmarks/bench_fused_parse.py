@@ -0,0 +1,44 @@
+"""Peak memory and wall time of two-pass versus fused parsing.
+
+Two-pass parsing builds a complete lark parse tree and then transforms it;
+fused parsing builds AST nodes as each rule is reduced.
+
+    python -m benchmarks.bench_fused_parse [--lines 50000]
+"""
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+from stxscript import StxScriptTranspiler
+
+from .generator import generate_contract
+
+def measure(transpiler, source):
+    transpiler.parser  # exclude parser construction
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        start = time.perf_counter()
+        transpiler.parse(source)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=50000)
+    args = arg_parser.parse_args(argv)
+
+    source = generate_contract(args.lines)
+    print(f'{source.count(chr(10))} lines, {len(source)} bytes')
+    for name, transpiler in (('two-pass', StxScriptTranspiler()),
+                             ('fused', StxScriptTranspiler(fused=True))):
+        elapsed, peak = measure(transpiler, source)
+        print(f'{name:<10} {elapsed:8.2f} s  peak {peak / 2 ** 20:8.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Clarity generation throughput on generated contracts, excluding parsing.
+
+    python -m benchmarks.bench_generate [--lines 2000] [--contracts 3] [--repeat 5]
+"""
+import argparse
+import time
+
+from stxscript import StxScriptTranspiler
+from stxscript.stats import count_nodes
+
+from .generator import generate_contract
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=2000)
+    arg_parser.add_argument('--contracts', type=int, default=3)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args(argv)
+
+    transpiler = StxScriptTranspiler()
+    asts = [transpiler.parse(generate_contract(args.lines, seed)) for seed in range(args.contracts)]
+    nodes = sum(sum(count_nodes(ast).values()) for ast in asts)
+    best = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for ast in asts:
+            transpiler.generator.generate(ast)
+        best = min(best, time.perf_counter() - start)
+    print(f'{nodes} nodes  {best * 1000:8.1f} ms  {nodes / best:12.0f} nodes/s')
+
+
+if __name__ == '__main__':
+    main()
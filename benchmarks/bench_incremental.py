@@ -0,0 +1,46 @@
+"""Re-transpiling a large contract after editing a single function.
+
+    python -m benchmarks.bench_incremental [--lines 5000]
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from stxscript import StxScriptTranspiler
+from stxscript.incremental import IncrementalTranspiler, split_statements
+
+from .generator import generate_contract
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(*args)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=5000)
+    args = arg_parser.parse_args(argv)
+
+    source = generate_contract(args.lines)
+    spans = [span for span in split_statements(source) if 'return ok(' in source[span[0]:span[1]]]
+    start, end = spans[len(spans) // 2]
+    function = source[start:end]
+    edited = source[:start] + function.replace('return ok(', 'return ok(1 + ', 1) + source[end:]
+    transpiler = StxScriptTranspiler()
+    incremental = IncrementalTranspiler(transpiler)
+    transpiler.parser
+
+    print(f'{source.count(chr(10))} lines')
+    print(f'full transpile          {_time(transpiler.transpile, edited) * 1000:9.1f} ms')
+    print(f'incremental, cold       {_time(incremental.transpile, source) * 1000:9.1f} ms')
+    print(f'incremental, one edit   {_time(incremental.transpile, edited) * 1000:9.1f} ms'
+          f'  ({incremental.compiled} recompiled, {incremental.reused} reused)')
+    print(f'single function         {_time(transpiler.transpile, function) * 1000:9.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
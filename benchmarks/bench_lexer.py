@@ -0,0 +1,56 @@
+"""Tokens per second: lark's contextual lexer versus StxScriptLexer.
+
+Both lexers are timed alone, without parser state, and then inside a full
+LALR parse, where each of them consults the parser state. Before timing,
+the two token streams are checked to be identical.
+
+    python -m benchmarks.bench_lexer [--lines 5000] [--repeat 3]
+"""
+import argparse
+
+from lark.lexer import LexerThread
+
+from stxscript.grammar import build_parser
+from stxscript.lexer import StxScriptLexer
+
+from .bench_expression_parse import best_of
+from .generator import generate_contract
+
+
+def tokens(parser, source):
+    return [(t.type, str(t), t.start_pos, t.line, t.column)
+            for t in parser.parse_interactive(source).iter_parse()]
+
+
+def count_lexed(lex, source):
+    return sum(1 for _ in lex(source))
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=5000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    source = generate_contract(args.lines)
+    parsers = (('lark', build_parser(cache=False)),
+               ('stxscript', build_parser(cache=False, lexer=StxScriptLexer)))
+    streams = [tokens(parser, source) for _, parser in parsers]
+    if streams[0] != streams[1]:
+        raise SystemExit('token streams differ')
+    count = len(streams[0])
+
+    custom = StxScriptLexer(parsers[0][1].lexer_conf)
+    lexers = (('lark', parsers[0][1].lex),
+              ('stxscript', lambda text: LexerThread.from_text(custom, text).lex(None)))
+
+    print(f'{args.lines} lines, {len(source)} bytes, {count} tokens')
+    for (name, lex), (_, parser) in zip(lexers, parsers):
+        lex_time, _ = best_of(args.repeat, count_lexed, lex, source)
+        parse_time, _ = best_of(args.repeat, parser.parse, source)
+        print(f'{name:<10} lex {lex_time * 1000:8.1f} ms {count / lex_time:10.0f} tokens/s'
+              f'   parse {parse_time * 1000:8.1f} ms {count / parse_time:10.0f} tokens/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Transpile time and peak memory for very large literal lists.
+
+Covers an allow-list of principals and an airdrop table of
+``{to, amount}`` tuples. Time and memory per element should stay flat as
+the lists grow, in both the two-pass and fused modes.
+
+    python -m benchmarks.bench_literal_lists [--elements 25000 50000 100000]
+"""
+import argparse
+import time
+import tracemalloc
+
+from stxscript import StxScriptTranspiler
+
+
+def principal_list(elements):
+    return ('let allowed: list<principal> = ['
+            + ', '.join(f"'SP{i:038d}'" for i in range(elements)) + '];')
+
+
+def airdrop_table(elements):
+    return ('let airdrop: list<{to: principal, amount: uint}> = ['
+            + ', '.join(f"{{to: 'SP{i:038d}', amount: {i * 10}}}" for i in range(elements)) + '];')
+
+
+def measure(transpiler, source):
+    # Timed and traced in separate runs: tracing slows allocation down.
+    start = time.perf_counter()
+    transpiler.transpile(source)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    transpiler.transpile(source)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--elements', type=int, nargs='+', default=[25000, 50000, 100000])
+    args = arg_parser.parse_args(argv)
+
+    transpilers = (('two-pass', StxScriptTranspiler()), ('fused', StxScriptTranspiler(fused=True)))
+    for _, transpiler in transpilers:
+        transpiler.transpile('let x: int = 1;')  # exclude parser construction
+    print(f'{"input":<11}{"elements":>9}{"mode":>10}{"time":>10}{"us/elem":>9}'
+          f'{"peak":>11}{"B/elem":>8}')
+    for name, make_source in (('principals', principal_list), ('airdrop', airdrop_table)):
+        for elements in args.elements:
+            source = make_source(elements)
+            for mode, transpiler in transpilers:
+                elapsed, peak = measure(transpiler, source)
+                print(f'{name:<11}{elements:>9}{mode:>10}{elapsed:8.2f} s{elapsed / elements * 1e6:9.1f}'
+                      f'{peak / 2 ** 20:7.1f} MiB{peak / elements:8.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Cold-construction time of StxScriptTranspiler.
+
+Compares rebuilding the LALR tables from grammar.lark (the behaviour before
+parser caching), loading the tables from the on-disk cache, and constructing
+a further transpiler once the process-wide parser is warm.
+
+    python -m benchmarks.bench_parser_startup [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from stxscript import StxScriptTranspiler, grammar
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run(repeat):
+    def rebuild():
+        grammar.build_parser(cache=False)
+
+    def load_cached():
+        grammar.clear_parsers()
+        StxScriptTranspiler().parser
+
+    def warm():
+        StxScriptTranspiler().parser
+
+    previous = os.environ.get('STXSCRIPT_CACHE_DIR')
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['STXSCRIPT_CACHE_DIR'] = tmp
+        grammar.build_parser()  # populate the disk cache
+        results = {
+            'rebuild tables (uncached)': _time(rebuild, repeat),
+            'load tables from disk cache': _time(load_cached, repeat),
+            'warm process-wide parser': _time(warm, repeat),
+        }
+        if previous is None:
+            del os.environ['STXSCRIPT_CACHE_DIR']
+        else:
+            os.environ['STXSCRIPT_CACHE_DIR'] = previous
+    return results
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args(argv)
+    baseline = None
+    for name, seconds in run(args.repeat).items():
+        baseline = baseline or seconds
+        print(f'{name:<32} {seconds * 1000:9.2f} ms  ({baseline / seconds:7.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Cost of one AST pass: cached child fields versus per-node reflection.
+
+Each variant visits every node of the parsed contract once. ``walk`` looks
+up the child fields once per node class. The reflective walk calls
+``dataclasses.fields()`` on every node. An empty :class:`NodeTransformer`
+shows the cost of a rewriting pass that changes nothing.
+
+    python -m benchmarks.bench_pass_walk [--lines 5000] [--repeat 3]
+"""
+import argparse
+import dataclasses
+
+from stxscript import StxScriptTranspiler
+from stxscript.ast_nodes import Node
+from stxscript.passes import NodeTransformer, walk
+
+from .bench_expression_parse import best_of
+from .generator import generate_contract
+
+
+def reflective_walk(root):
+    count = 0
+    stack = [root]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, Node) and dataclasses.is_dataclass(value):
+            count += 1
+            stack.extend(getattr(value, field.name) for field in dataclasses.fields(value))
+    return count
+
+
+def cached_walk(root):
+    return sum(1 for _ in walk(root))
+
+
+class Identity(NodeTransformer):
+    def visit_Node(self, node):
+        return node
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=5000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    program = StxScriptTranspiler().parse(generate_contract(args.lines))
+    count = cached_walk(program)
+    print(f'{args.lines} lines, {count} nodes')
+    for name, function in (('reflective walk', reflective_walk), ('cached walk', cached_walk),
+                           ('identity transformer', Identity().visit)):
+        seconds, _ = best_of(args.repeat, function, program)
+        print(f'{name:<22} {seconds * 1000:8.1f} ms {seconds / count * 1e9:8.0f} ns/node')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Clarity emission time on long binary chains, nested strings versus the writer.
+
+``nested strings`` is the previous approach, where each node returns an
+f-string embedding its children's output; a left-deep chain is copied again
+at every level. The chain is built directly as an AST, so only emission is
+measured.
+
+    python -m benchmarks.bench_streaming_emit [--terms 1000 2500 5000 10000]
+"""
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+
+from stxscript import ClarityGenerator
+from stxscript.ast_nodes import BinaryExpression, Identifier
+
+
+def binary_chain(terms):
+    node = Identifier('x0')
+    for i in range(1, terms):
+        node = BinaryExpression(node, '+', Identifier(f'x{i}'))
+    return node
+
+
+def nested_strings(node):
+    if isinstance(node, Identifier):
+        return node.name
+    return f'({node.operator} {nested_strings(node.left)} {nested_strings(node.right)})'
+
+
+def generate_to_devnull(node):
+    with open(os.devnull, 'w') as devnull:
+        ClarityGenerator().generate_to(node, devnull)
+
+
+def generate_to_buffer(node):
+    ClarityGenerator().generate_to(node, io.StringIO())
+
+
+def measure(emit, node, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        emit(node)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(term_counts):
+    emitters = (('nested strings', nested_strings),
+                ('generate', ClarityGenerator().generate),
+                ('to StringIO', generate_to_buffer),
+                ('to devnull', generate_to_devnull))
+    print(f'{"terms":>7}' + ''.join(f'{name:>16}' for name, _ in emitters))
+    for terms in term_counts:
+        node = binary_chain(terms)
+        row = ''.join(f'{measure(emit, node) * 1000:13.2f} ms' for _, emit in emitters)
+        print(f'{terms:>7}{row}')
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--terms', type=int, nargs='+', default=[1000, 2500, 5000, 10000])
+    args = arg_parser.parse_args(argv)
+
+    # The nested-string reference recurses once per chain level.
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * max(args.terms)))
+    threading.stack_size(512 * 1024 * 1024)
+    worker = threading.Thread(target=run, args=(args.terms,))
+    worker.start()
+    worker.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Transpile throughput with tracing off versus a print-based trace sink.
+
+The print sink reproduces the debug output the transformer used to write
+unconditionally; stdout is redirected to the null device for both runs.
+
+    python -m benchmarks.bench_trace [--lines 5000]
+"""
+import argparse
+import contextlib
+import os
+import time
+
+from stxscript import StxScriptTranspiler
+
+from .generator import generate_contract
+
+
+def print_sink(event, payload):
+    print(f'Debug: {event} called with {payload!r}')
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, default=5000)
+    args = arg_parser.parse_args(argv)
+
+    source = generate_contract(args.lines)
+    lines = source.count('\n')
+    print(f'{lines} lines')
+    for name, trace in (('print sink', print_sink), ('tracing off', None)):
+        transpiler = StxScriptTranspiler(trace=trace)
+        transpiler.parser
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            transpiler.transpile(source)
+            elapsed = time.perf_counter() - start
+        print(f'{name:<12} {elapsed:8.2f} s  {lines / elapsed:10.0f} lines/s')
+
+
+if __name__ == '__main__':
+    main()
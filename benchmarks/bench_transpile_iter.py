@@ -0,0 +1,62 @@
+"""Peak memory of transpile() versus transpile_iter() on growing files.
+
+transpile_iter() maps the file and handles one statement at a time, so its
+peak should stay flat as the file grows while transpile() grows with it.
+
+    python -m benchmarks.bench_transpile_iter [--lines 2000 8000 32000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from stxscript import StxScriptTranspiler
+
+from .generator import generate_contract
+
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--lines', type=int, nargs='+', default=[2000, 8000, 32000])
+    args = arg_parser.parse_args(argv)
+
+    transpiler = StxScriptTranspiler()
+    transpiler.parser  # exclude parser construction
+
+    def whole(path):
+        with open(path, encoding='utf-8') as source_file:
+            return transpiler.transpile(source_file.read())
+
+    def streamed(path):
+        with open(path, 'rb') as source_file:
+            for _ in transpiler.transpile_iter(source_file):
+                pass
+
+    print(f'{"lines":>8}{"bytes":>12}{"transpile":>22}{"transpile_iter":>22}')
+    for lines in args.lines:
+        fd, path = tempfile.mkstemp(suffix='.stx')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as source_file:
+                source_file.write(generate_contract(lines))
+            row = f'{lines:>8}{os.path.getsize(path):>12}'
+            for function in (whole, streamed):
+                elapsed, peak = measure(lambda: function(path))
+                row += f'{elapsed:8.2f} s {peak / 2 ** 20:8.1f} MiB'
+            print(row)
+        finally:
+            os.unlink(path)
+
+
+if __name__ == '__main__':
+    main()
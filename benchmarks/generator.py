@@ -0,0 +1,141 @@
+"""Seeded generator of synthetic StxScript contracts for benchmarking.
+
+The same ``(lines, seed)`` always yields the same source. Contracts mix the
+constructs that dominate real workloads: map and constant declarations,
+traits, assets, many functions with nested control flow, deep arithmetic
+expressions and large list literals.
+"""
+import random
+from typing import List
+
+TYPES = ('int', 'uint', 'bool', 'principal')
+BINARY_OPERATORS = ('+', '-', '*', '/', '%', '<', '>', '<=', '>=', '==', '!=', '&&', '||')
+
+
+class ContractGenerator:
+    def __init__(self, seed: int = 0, max_depth: int = 4, max_list: int = 200):
+        self.random = random.Random(seed)
+        self.max_depth = max_depth
+        self.max_list = max_list
+        self.counter = 0
+
+    def name(self, prefix: str) -> str:
+        self.counter += 1
+        return f'{prefix}{self.counter}'
+
+    def expression(self, variables: List[str], depth: int = 0) -> str:
+        roll = self.random.random()
+        if depth >= self.max_depth or roll < 0.25:
+            if variables and self.random.random() < 0.6:
+                return self.random.choice(variables)
+            return str(self.random.randint(0, 10 ** 6))
+        if roll < 0.75:
+            operator = self.random.choice(BINARY_OPERATORS)
+            left = self.expression(variables, depth + 1)
+            right = self.expression(variables, depth + 1)
+            return f'({left} {operator} {right})'
+        if roll < 0.85:
+            condition = self.expression(variables, depth + 1)
+            return (f'{condition} ? {self.expression(variables, depth + 1)}'
+                    f' : {self.expression(variables, depth + 1)}')
+        arguments = ', '.join(self.expression(variables, depth + 1)
+                              for _ in range(self.random.randint(1, 3)))
+        return f'{self.name("call")}({arguments})'
+
+    def chain(self, variables: List[str]) -> str:
+        """A long left-associative sum, as emitted by code generators."""
+        terms = [self.random.choice(variables) if self.random.random() < 0.5
+                 else str(self.random.randint(0, 1000)) for _ in range(self.random.randint(20, 60))]
+        return ' + '.join(terms)
+
+    def list_literal(self, indent: str) -> List[str]:
+        size = self.random.randint(10, self.max_list)
+        values = [str(self.random.randint(0, 10 ** 9)) for _ in range(size)]
+        rows = [', '.join(values[i:i + 10]) for i in range(0, size, 10)]
+        return ['['] + [f'{indent}    {row},' for row in rows[:-1]] + [f'{indent}    {rows[-1]}', f'{indent}]']
+
+    def map_declaration(self) -> List[str]:
+        key, value = self.random.choice(TYPES), self.random.choice(TYPES)
+        return [f'@map({{ key: {key}, value: {value} }})',
+                f'const {self.name("map")} = new Map<{key}, {value}>();']
+
+    def trait_declaration(self) -> List[str]:
+        lines = [f'trait {self.name("Trait")} {{']
+        for _ in range(self.random.randint(1, 4)):
+            params = ', '.join(f'{self.name("p")}: {self.random.choice(TYPES)}'
+                               for _ in range(self.random.randint(1, 3)))
+            lines.append(f'    {self.name("method")}({params}): Response<bool, uint>;')
+        return lines + ['}']
+
+    def asset_declaration(self) -> List[str]:
+        return ['@asset', f'class {self.name("Asset")} {{', '    id: uint;', '    owner: principal;', '}']
+
+    def block(self, variables: List[str], indent: str, depth: int = 0) -> List[str]:
+        lines = []
+        for _ in range(self.random.randint(2, 5)):
+            roll = self.random.random()
+            if roll < 0.35:
+                variable = self.name('v')
+                lines.append(f'{indent}let {variable}: int = {self.expression(variables)};')
+                variables = variables + [variable]
+            elif roll < 0.45:
+                variable = self.name('items')
+                literal = self.list_literal(indent)
+                lines.append(f'{indent}let {variable}: list<int> = {literal[0]}')
+                lines.extend(literal[1:-1])
+                lines.append(literal[-1] + ';')
+            elif roll < 0.65 and depth < 2:
+                lines.append(f'{indent}if ({self.expression(variables)}) {{')
+                lines.extend(self.block(variables, indent + '    ', depth + 1))
+                lines.append(f'{indent}}} else {{')
+                lines.extend(self.block(variables, indent + '    ', depth + 1))
+                lines.append(f'{indent}}}')
+            elif roll < 0.75 and depth < 2:
+                lines.append(f'{indent}try {{')
+                lines.extend(self.block(variables, indent + '    ', depth + 1))
+                lines.append(f'{indent}}} catch (error) {{')
+                lines.append(f'{indent}    return err(1);')
+                lines.append(f'{indent}}}')
+            elif roll < 0.8:
+                variable = self.name('sum')
+                lines.append(f'{indent}let {variable}: int = {self.chain(variables)};')
+                variables = variables + [variable]
+            elif roll < 0.88:
+                lines.append(f'{indent}{self.name("map")}.set({self.expression(variables, 4)}, '
+                             f'{self.expression(variables, 4)});')
+            else:
+                lines.append(f'{indent}return fold({self.random.choice(variables)}, 0, '
+                             f'(acc: int, x: int) => acc + x);')
+        lines.append(f'{indent}return ok({self.expression(variables)});')
+        return lines
+
+    def function_declaration(self) -> List[str]:
+        params = [self.name('arg') for _ in range(self.random.randint(1, 4))]
+        signature = ', '.join(f'{param}: int' for param in params)
+        decorator = self.random.choice(['@public', '@readable', '@private', None])
+        lines = [decorator] if decorator else []
+        lines.append(f'function {self.name("fn")}({signature}): Response<int, uint> {{')
+        lines.extend(self.block(params, '    '))
+        return lines + ['}']
+
+    def contract(self, lines: int) -> str:
+        output: List[str] = []
+        while len(output) < lines:
+            roll = self.random.random()
+            if roll < 0.08:
+                output.extend(self.map_declaration())
+            elif roll < 0.12:
+                output.extend(self.trait_declaration())
+            elif roll < 0.14:
+                output.extend(self.asset_declaration())
+            elif roll < 0.2:
+                output.append(f'const {self.name("LIMIT")}: int = {self.random.randint(1, 10 ** 6)};')
+            else:
+                output.extend(self.function_declaration())
+            output.append('')
+        return '\n'.join(output) + '\n'
+
+
+def generate_contract(lines: int, seed: int = 0, **options) -> str:
+    """A synthetic contract of roughly ``lines`` lines."""
+    return ContractGenerator(seed, **options).contract(lines)
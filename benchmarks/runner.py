@@ -0,0 +1,140 @@
+"""Benchmark runner for StxScriptTranspiler.
+
+Transpiles generated contracts of each requested size and reports
+lines/sec, peak RSS and per-phase timings. Each case runs in a fresh worker
+process so peak RSS is per case. Results can be stored as JSON and compared
+against a stored baseline:
+
+    python -m benchmarks.runner --sizes 1000,10000 --output results.json
+    python -m benchmarks.runner --baseline results.json --threshold 0.15
+
+The exit status is 1 when any case is slower than the baseline by more than
+the threshold.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from stxscript import StxScriptTranspiler, __version__
+
+from .generator import generate_contract
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def _peak_rss_kb() -> int:
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_case(lines: int, seed: int, repeat: int, fused: bool) -> Dict:
+    source = generate_contract(lines, seed)
+    transpiler = StxScriptTranspiler(fused=fused)
+    load_start = time.perf_counter()
+    transpiler.parser
+    grammar_load = time.perf_counter() - load_start
+
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, stats = transpiler.transpile_with_stats(source)
+        runs.append((time.perf_counter() - start - stats.times['lex'], stats))
+    seconds, stats = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+    times = dict(stats.times, grammar_load=grammar_load)
+    source_lines = source.count('\n')
+    return {
+        'lines': source_lines,
+        'bytes': len(source),
+        'seed': seed,
+        'fused': fused,
+        'seconds': seconds,
+        'lines_per_sec': source_lines / seconds,
+        'peak_rss_kb': _peak_rss_kb(),
+        'times': times,
+        'token_count': stats.token_count,
+        'node_count': stats.node_count,
+        'output_bytes': stats.output_bytes,
+    }
+
+
+def run(sizes: List[int], seed: int = 0, repeat: int = 3, fused: bool = False) -> Dict:
+    results = []
+    for size in sizes:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results.append(pool.submit(run_case, size, seed, repeat, fused).result())
+    return {
+        'stxscript': __version__,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'timestamp': time.time(),
+        'results': results,
+    }
+
+
+def _case_key(result: Dict):
+    return result['lines'], result['seed'], result['fused']
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Descriptions of the cases whose throughput regressed beyond ``threshold``."""
+    previous = {_case_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get(_case_key(result))
+        if old is None:
+            continue
+        change = result['lines_per_sec'] / old['lines_per_sec'] - 1
+        if change < -threshold:
+            regressions.append(f"{result['lines']} lines: {result['lines_per_sec']:.0f} lines/s, "
+                               f"{-change:.1%} slower than baseline {old['lines_per_sec']:.0f}")
+    return regressions
+
+
+def report(data: Dict) -> None:
+    print(f"{'lines':>8} {'lines/s':>10} {'peak RSS':>10} {'parse':>8} {'transform':>10} {'generate':>9}")
+    for result in data['results']:
+        times = result['times']
+        print(f"{result['lines']:>8} {result['lines_per_sec']:>10.0f} {result['peak_rss_kb'] / 1024:>8.1f}MB"
+              f" {times['parse']:>7.3f}s {times['transform']:>9.3f}s {times['generate']:>8.3f}s")
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sizes', default='1000,10000',
+                            help='comma-separated contract sizes in lines (default: %(default)s)')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--repeat', type=int, default=3, help='runs per size; the median is kept')
+    arg_parser.add_argument('--fused', action='store_true', help='benchmark the fused parsing mode')
+    arg_parser.add_argument('--output', help='write results to this JSON file')
+    arg_parser.add_argument('--baseline', help='JSON results to compare against')
+    arg_parser.add_argument('--threshold', type=float, default=0.10,
+                            help='tolerated slowdown against the baseline (default: %(default)s)')
+    args = arg_parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    data = run(sizes, args.seed, args.repeat, args.fused)
+    report(data)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(data, output_file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(data, json.load(baseline_file), args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
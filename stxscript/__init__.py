@@ -1,5 +1,9 @@
+__version__ = '0.1.0'
+
 from .transpiler import StxScriptTranspiler
 from .ast_nodes import *
 from .clarity_generator import ClarityGenerator
+from .cache import TranspileCache
+from .serialize import dump_ast, load_ast
 
-__all__ = ['StxScriptTranspiler', 'ClarityGenerator']
+__all__ = ['StxScriptTranspiler', 'ClarityGenerator', 'TranspileCache', 'dump_ast', 'load_ast']
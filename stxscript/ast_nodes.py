@@ -1,39 +1,152 @@
+import sys
+import threading
+import weakref
 from dataclasses import dataclass
 from typing import List, Optional, Union, Dict, Any
 
-@dataclass
+def _node(cls=None, *, weakref=False, **options):
+    """``@dataclass`` that also gives the class ``__slots__`` for the fields it
+    declares, so nodes carry no per-instance ``__dict__``.
+
+    ``dataclass(slots=True)`` does the same but needs Python 3.10. Methods of
+    the decorated class must not use zero-argument ``super()``, as it would
+    refer to the class before it was rebuilt. ``weakref`` adds a
+    ``__weakref__`` slot; other options are passed to ``dataclass``.
+    """
+    if cls is None:
+        return lambda cls: _node(cls, weakref=weakref, **options)
+    cls = dataclass(cls, **options)
+    own_fields = tuple(cls.__dict__.get('__annotations__', ()))
+    namespace = {key: value for key, value in cls.__dict__.items()
+                 if key not in own_fields and key not in ('__dict__', '__weakref__')}
+    namespace['__slots__'] = own_fields + (('__weakref__',) if weakref else ())
+    slotted = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted.__qualname__ = cls.__qualname__
+    return slotted
+
+_field_slots: Dict[type, tuple] = {}
+
+def iter_fields(node):
+    """Yield ``(name, value)`` for each field of ``node``, like ``ast.iter_fields``.
+
+    Slots that have not been set, such as the not yet computed ``name`` of a
+    composite type, are skipped.
+    """
+    cls = type(node)
+    slots = _field_slots.get(cls)
+    if slots is None:
+        slots = _field_slots[cls] = tuple(
+            (name, vars(klass)[name]) for klass in reversed(cls.__mro__)
+            for name in vars(klass).get('__slots__', ()) if name != '__weakref__')
+    for name, slot in slots:
+        try:
+            yield name, slot.__get__(node)
+        except AttributeError:
+            pass
+    if hasattr(node, '__dict__'):
+        yield from vars(node).items()
+
+@_node
 class Node:
     pass
 
-@dataclass
+@_node
 class Program(Node):
     statements: List[Node]
 
-@dataclass
+@_node
 class Statement(Node):
     pass
 
-@dataclass
+@_node
 class Expression(Node):
     pass
 
-@dataclass
+_types = weakref.WeakValueDictionary()
+_types_lock = threading.Lock()
+
+@_node(init=False, eq=False, weakref=True)
 class Type(Node):
+    """A named type such as ``uint``, and the base of the composite types.
+
+    Types are hash-consed: constructing a type structurally identical to one
+    that is still alive returns that instance. Equal types are therefore the
+    same object, and types compare and hash by identity. Type nodes are
+    shared and must not be mutated.
+    """
     name: str
 
+    def __new__(cls, *args):
+        key = cls._key(*args)
+        with _types_lock:
+            instance = _types.get(key)
+            if instance is None:
+                instance = object.__new__(cls)
+                instance._setup(*args)
+                _types[key] = instance
+        return instance
+
+    def __init__(self, *args):
+        # Set up once by __new__; a shared instance is never re-initialised.
+        pass
+
+    @classmethod
+    def _key(cls, name):
+        return cls, str(name)
+
+    def _setup(self, name):
+        self.name = sys.intern(str(name))
+
+    def _args(self):
+        return (self.name,)
+
+    __eq__ = object.__eq__
+    __ne__ = object.__ne__
+    __hash__ = object.__hash__
+
+    def __reduce__(self):
+        return type(self), self._args()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @classmethod
+    def named(cls, name: str) -> 'Type':
+        """Type called ``name``; the same as ``Type(name)``."""
+        return cls(name)
+
+_primitive_types = [Type(name) for name in ('int', 'uint', 'bool', 'principal')]
+
+_identifiers = weakref.WeakValueDictionary()
+
 class Identifier(Expression):
+    __slots__ = ('name', '__weakref__')
     name: str
     
     def __init__(self, name: str):
         self.name = name
 
+    @classmethod
+    def intern(cls, name: str) -> 'Identifier':
+        """Identifier for ``name`` shared with every other interned use of it.
+
+        Interned identifiers must not be mutated.
+        """
+        identifier = _identifiers.get(name)
+        if identifier is None:
+            identifier = _identifiers[name] = cls(sys.intern(str(name)))
+        return identifier
+
     def __hash__(self):
         return hash(self.name)
     
     def __repr__(self) -> str:
         return self.name
 
-@dataclass
+@_node
 class FunctionDeclaration(Statement):
     decorators: List[str]
     name: str
@@ -41,223 +154,296 @@ class FunctionDeclaration(Statement):
     return_type: Optional[Type]
     body: 'Block'
 
-@dataclass
+@_node
 class VariableDeclaration(Statement):
     name: str
     type: Optional[Type]
     value: Expression
 
-@dataclass
+@_node
 class ConstantDeclaration(Statement):
     name: str
     type: Optional[Type]
     value: Expression
 
-@dataclass
+@_node
 class MapDeclaration(Statement):
     name: str
     key_type: Type
     value_type: Type
 
-@dataclass
+@_node
 class AssetDeclaration(Statement):
     name: str
     fields: List['Parameter']
 
-@dataclass
+@_node
 class TraitDeclaration(Statement):
     name: str
     functions: List[FunctionDeclaration]
 
-@dataclass
+@_node
 class Parameter(Node):
     name: str
     type: Type
 
-@dataclass
+@_node
 class Block(Node):
     statements: List[Statement]
 
-@dataclass
+@_node
 class IfStatement(Statement):
     condition: Expression
     true_block: Block
     else_ifs: List['ElseIf']
     else_block: Optional[Block]
 
-@dataclass
+@_node
 class ElseIf(Node):
     condition: Expression
     block: Block
 
-@dataclass
+@_node
 class TryCatchStatement(Statement):
     try_block: Block
     error_var: str
     catch_block: Block
 
-@dataclass
+@_node
 class ThrowStatement(Statement):
     expression: Expression
 
-@dataclass
+@_node
 class ReturnStatement(Statement):
     expression: Optional[Expression]
 
-@dataclass
+@_node
 class ExpressionStatement(Statement):
     expression: Expression
 
-@dataclass
+@_node
 class ImportDeclaration(Statement):
     module: str
     imports: List[str]
 
-@dataclass
+@_node
 class ExportDeclaration(Statement):
     declaration: Union[FunctionDeclaration, VariableDeclaration, ConstantDeclaration]
 
-@dataclass
+@_node
 class BinaryExpression(Expression):
     left: Expression
     operator: str
     right: Expression
 
-@dataclass
+@_node
 class UnaryExpression(Expression):
     operator: str
     expression: Expression
 
-@dataclass
+@_node
 class TernaryExpression(Expression):
     condition: Expression
     true_expr: Expression
     false_expr: Expression
 
-@dataclass
+@_node
 class CallExpression(Expression):
     callee: Expression
     arguments: List[Expression]
 
-@dataclass
+@_node
 class MemberExpression(Expression):
     object: Expression
     property: str
 
-@dataclass
+@_node
 class Literal(Expression):
     value: Union[int, float, str, bool]
 
-@dataclass
+@_node
 class ListLiteral(Expression):
     elements: List[Expression]
 
-@dataclass
+@_node
 class TupleLiteral(Expression):
     elements: Dict[str, Expression]
 
-@dataclass
+@_node
 class OptionalLiteral(Expression):
     value: Optional[Expression]
 
-@dataclass
+@_node
 class PrincipalLiteral(Expression):
     value: str
 
-@dataclass
-class ListType(Type):
+_name_slot = vars(Type)['name']
+
+class _CompositeType(Type):
+    """Composite type whose display ``name`` is built on first use."""
+    __slots__ = ()
+
+    @property
+    def name(self):
+        try:
+            return _name_slot.__get__(self)
+        except AttributeError:
+            name = self._format_name()
+            _name_slot.__set__(self, name)
+            return name
+
+@_node(init=False, eq=False)
+class ListType(_CompositeType):
     element_type: Type
-    def __init__(self, element_type):
-        super().__init__(f"List<{element_type.name}>")
+
+    @classmethod
+    def _key(cls, element_type):
+        return cls, element_type
+
+    def _setup(self, element_type):
         self.element_type = element_type
 
-@dataclass
-class TupleType(Type):
+    def _args(self):
+        return (self.element_type,)
+
+    def _format_name(self):
+        return f"List<{self.element_type.name}>"
+
+@_node(init=False, eq=False)
+class TupleType(_CompositeType):
     fields: Dict[str, Type]
-    def __init__(self,fields):
-        super().__init__(f"Tuple<{', '.join(f'{k}: {v.name}' for k, v in fields.items())}>")
-        self.fields = fields
 
-@dataclass
+    @classmethod
+    def _key(cls, fields):
+        return (cls,) + tuple((str(k), v) for k, v in fields.items())
+
+    def _setup(self, fields):
+        self.fields = {sys.intern(str(k)): v for k, v in fields.items()}
+
+    def _args(self):
+        return (self.fields,)
+
+    def _format_name(self):
+        return f"Tuple<{', '.join(f'{k}: {v.name}' for k, v in self.fields.items())}>"
+
+@_node
 class Field(Node):
+    name: str
+    type: Type
+
     def __init__(self, name, type):
         self.name = name
         self.type = type
-@dataclass
-class OptionalType(Type):
+@_node(init=False, eq=False)
+class OptionalType(_CompositeType):
     value_type: Type
 
-@dataclass
-class ResponseType(Type):
+    @classmethod
+    def _key(cls, value_type):
+        return cls, value_type
+
+    def _setup(self, value_type):
+        self.value_type = value_type
+
+    def _args(self):
+        return (self.value_type,)
+
+    def _format_name(self):
+        return f"Optional<{self.value_type.name}>"
+
+@_node(init=False, eq=False)
+class ResponseType(_CompositeType):
     ok_type: Type
     err_type: Type
 
-    def __init__(self, ok_type: Type, err_type: Type):
-        super().__init__(f"Response<{ok_type.name}, {err_type.name}>")
+    @classmethod
+    def _key(cls, ok_type, err_type):
+        return cls, ok_type, err_type
+
+    def _setup(self, ok_type, err_type):
         self.ok_type = ok_type
         self.err_type = err_type
 
-@dataclass
+    def _args(self):
+        return self.ok_type, self.err_type
+
+    def _format_name(self):
+        return f"Response<{self.ok_type.name}, {self.err_type.name}>"
+
+@_node
 class TypeCheck(Expression):
     expression: Expression
     checked_type: Type
 
-@dataclass
+@_node
 class TypeAssertion(Expression):
     expression: Expression
     asserted_type: Type
 
-@dataclass
+@_node
 class ListComprehension(Expression):
     expression: Expression
     iterable: Expression
     iterator: Identifier
     condition: Optional[Expression] = None
 
-@dataclass
+@_node
 class ContractCallExpression(Expression):
     contract: Expression
     function: str
     arguments: List[Expression]
 
-@dataclass
+@_node
 class AssetCallExpression(Expression):
     asset: str
     function: str
     arguments: List[Expression]
 
-@dataclass
+@_node
 class MapExpression(Expression):
     list: Expression
     function: Expression
 
-@dataclass
+@_node
 class FilterExpression(Expression):
     list: Expression
     function: Expression
 
-@dataclass
+@_node
 class FoldExpression(Expression):
     list: Expression
     initial: Expression
     function: Expression
 
-@dataclass
+@_node
 class Decorator(Node):
     name: str
 
-@dataclass
+@_node
 class FunctionSignature(Node):
     name: str
     parameters: List[Parameter]
     return_type: Type
 
-@dataclass
+@_node
 class LambdaExpression(Expression):
     parameters: List[Parameter]
     body: Expression
 
     def __init__(self, parameters, body):
-        super().__init__()
         self.parameters = parameters
-        self.body = body
\ No newline at end of file
+        self.body = body
+
+@_node
+class LetExpression(Expression):
+    """``(let ((name value) ...) body)``, introduced by optimisation passes."""
+    bindings: Dict[str, Expression]
+    body: Block
+
+@_node
+class MemoExpression(Expression):
+    """Looks ``key`` up in the ``cache`` map; on a miss evaluates ``body`` and
+    stores the result. Produced for ``@memo`` functions."""
+    cache: Identifier
+    key: Expression
+    body: Block
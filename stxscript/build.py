@@ -0,0 +1,102 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+from .cache import TranspileCache
+from .passes import PassManager
+from .transpiler import StxScriptTranspiler
+
+SOURCE_SUFFIX = '.stx'
+OUTPUT_SUFFIX = '.clar'
+
+
+@dataclass
+class BuildResult:
+    source: str
+    output: str
+    seconds: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def find_sources(root: str) -> List[str]:
+    """Every ``.stx`` file below ``root``, skipping hidden directories."""
+    sources = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs[:] = sorted(d for d in subdirs if not d.startswith('.'))
+        sources.extend(os.path.join(directory, name) for name in sorted(files)
+                       if name.endswith(SOURCE_SUFFIX))
+    return sources
+
+
+def output_path(source: str, root: str, out_dir: str) -> str:
+    """Mirror ``source``'s location below ``root`` into ``out_dir``."""
+    relative = os.path.relpath(source, root)
+    return os.path.join(out_dir, os.path.splitext(relative)[0] + OUTPUT_SUFFIX)
+
+
+def make_transpiler(cache_dir: Optional[str] = None,
+                    pass_manager: Optional[PassManager] = None) -> StxScriptTranspiler:
+    cache = TranspileCache(cache_dir) if cache_dir else None
+    return StxScriptTranspiler(cache=cache, pass_manager=pass_manager)
+
+
+def compile_file(transpiler: StxScriptTranspiler, source: str, output: str) -> BuildResult:
+    start = time.perf_counter()
+    try:
+        with open(source, 'r', encoding='utf-8') as source_file:
+            clarity_code = transpiler.transpile(source_file.read())
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as output_file:
+            output_file.write(clarity_code)
+    except Exception as e:
+        return BuildResult(source, output, time.perf_counter() - start, str(e))
+    return BuildResult(source, output, time.perf_counter() - start)
+
+
+# One warm transpiler per worker process, created by the pool initializer.
+_worker_transpiler: Optional[StxScriptTranspiler] = None
+
+
+def _init_worker(cache_dir: Optional[str], pass_manager: Optional[PassManager]) -> None:
+    global _worker_transpiler
+    _worker_transpiler = make_transpiler(cache_dir, pass_manager)
+
+
+def _compile_in_worker(source: str, output: str) -> BuildResult:
+    assert _worker_transpiler is not None
+    return compile_file(_worker_transpiler, source, output)
+
+
+def build(root: str, out_dir: str, jobs: Optional[int] = None,
+          cache_dir: Optional[str] = None,
+          pass_manager: Optional[PassManager] = None) -> Iterator[BuildResult]:
+    """Transpile every source below ``root`` into a mirrored tree in ``out_dir``.
+
+    Results are yielded as files finish; a failing file never stops the
+    batch. ``jobs=1`` compiles in-process, otherwise a process pool with
+    ``jobs`` workers (default: one per CPU) is used.
+    """
+    sources = find_sources(root)
+    targets = [(source, output_path(source, root, out_dir)) for source in sources]
+    if jobs == 1 or len(targets) <= 1:
+        transpiler = make_transpiler(cache_dir, pass_manager)
+        for source, output in targets:
+            yield compile_file(transpiler, source, output)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(cache_dir, pass_manager)) as pool:
+        futures = {pool.submit(_compile_in_worker, source, output): (source, output)
+                   for source, output in targets}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                source, output = futures[future]
+                yield BuildResult(source, output, 0.0, f'worker failed: {e}')
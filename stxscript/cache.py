@@ -0,0 +1,171 @@
+import hashlib
+import os
+import tempfile
+from typing import Dict, Optional
+
+from . import __version__
+from .grammar import cache_dir, grammar_hash
+from .serialize import dump_ast, load_ast
+
+# Modules whose code determines the emitted Clarity or AST for a given source,
+# including the lowering and optimisation passes run between the two.
+_GENERATOR_MODULES = (
+    'ast_nodes.py', 'clarity_generator.py', 'cse.py', 'deadcode.py', 'folding.py', 'grammar.py',
+    'lexer.py', 'memo.py', 'passes.py', 'serialize.py', 'statements.py', 'transpiler.py',
+)
+_SUFFIXES = ('.clar', '.ast')
+
+_fingerprint: Optional[str] = None
+
+
+def fingerprint() -> str:
+    """Hash of the package version, grammar and generator code."""
+    global _fingerprint
+    if _fingerprint is None:
+        digest = hashlib.sha256()
+        digest.update(__version__.encode('utf-8'))
+        digest.update(grammar_hash().encode('utf-8'))
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for module in _GENERATOR_MODULES:
+            with open(os.path.join(package_dir, module), 'rb') as module_file:
+                digest.update(module_file.read())
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+
+class TranspileCache:
+    """Content-addressed on-disk store of emitted Clarity and parsed ASTs.
+
+    Entries are keyed by the source text and :func:`fingerprint`, written
+    atomically (temporary file plus rename) so concurrent builds can share a
+    directory, and evicted least-recently-used first once the directory
+    grows beyond ``max_bytes``.
+
+    ASTs are stored with :func:`serialize.dump_ast`, so tools that only need
+    the tree can skip parsing (see :meth:`get_ast`). Their hits and misses
+    are counted apart from those of the Clarity entries.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 256 * 2 ** 20):
+        self.directory = directory or os.path.join(cache_dir(), 'transpile')
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.ast_hits = 0
+        self.ast_misses = 0
+        self._size: Optional[int] = None
+
+    def key(self, source: str, variant: str = '') -> str:
+        digest = hashlib.sha256(fingerprint().encode('utf-8'))
+        digest.update(variant.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str, suffix: str = '.clar') -> str:
+        return os.path.join(self.directory, key[:2], key[2:] + suffix)
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, 'rb') as entry:
+                data = entry.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def get(self, source: str, variant: str = '') -> Optional[str]:
+        data = self._read(self._path(self.key(source, variant)))
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data.decode('utf-8')
+
+    def put(self, source: str, clarity_code: str, variant: str = '') -> None:
+        self._write(self._path(self.key(source, variant)), clarity_code.encode('utf-8'))
+
+    def get_ast(self, source: str, variant: str = ''):
+        """The cached :class:`Program` for ``source``, or None."""
+        data = self._read(self._path(self.key(source, variant), '.ast'))
+        try:
+            program = None if data is None else load_ast(data)
+        except ValueError:
+            program = None  # corrupt or foreign entry: parse again
+        if program is None:
+            self.ast_misses += 1
+            return None
+        self.ast_hits += 1
+        return program
+
+    def put_ast(self, source: str, program, variant: str = '') -> None:
+        self._write(self._path(self.key(source, variant), '.ast'), dump_ast(program))
+
+    def _write(self, path: str, data: bytes) -> None:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'wb') as entry:
+                entry.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+        # Track the directory size incrementally; rescan only when it may
+        # have outgrown the budget.
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(_SUFFIXES):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, path
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """Remove least-recently-used entries until within ``max_bytes``."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+    def clear(self) -> None:
+        for _, _, path in list(self._entries()):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses,
+                'ast_hits': self.ast_hits, 'ast_misses': self.ast_misses}
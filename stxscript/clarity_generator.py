@@ -1,245 +1,590 @@
+from itertools import islice
+
+from . import ast_nodes
 from .ast_nodes import *
 
+# Node types that handlers can be named after: emit_<name>.
+_NAMED_TYPES = {name: obj for name, obj in vars(ast_nodes).items() if isinstance(obj, type)}
+_NAMED_TYPES.update({'NoneType': type(None), 'str': str, 'int': int, 'float': float,
+                     'list': list, 'tuple': tuple, 'dict': dict})
+
+# Methods called on a map and the Clarity functions they become.
+MAP_METHODS = {'get': 'map-get?', 'set': 'map-set', 'insert': 'map-insert', 'delete': 'map-delete'}
+
+# Elements written per call when a literal list is emitted in bulk.
+_LITERAL_CHUNK = 1024
+
+
+def _literal_text(value):
+    if isinstance(value, str):
+        return f'"{value}"'
+    return str(value)
+
+
+def _literal_element_text(node):
+    if node.__class__ is Literal:
+        return _literal_text(node.value)
+    return '(tuple ' + ' '.join(f'({key} {_literal_text(value.value)})'
+                                for key, value in node.elements.items()) + ')'
+
+
 class ClarityGenerator:
-    def __init__(self):
+    """Emits Clarity for an AST by appending fragments to a writer.
+
+    Each ``emit_<NodeClass>`` method writes its output with :meth:`write`.
+    Handlers of nodes with children are generators that yield each child at
+    the point where its output belongs; :meth:`emit` drives them from an
+    explicit stack, so nesting depth is not limited by the recursion limit.
+    No intermediate strings are built for subtrees. :meth:`generate`
+    collects the fragments into a string and :meth:`generate_to` writes them
+    straight to a file-like object.
+
+    Handlers are found through a per-class table keyed by node type. A node
+    whose type has no handler uses the one for its nearest base class, and
+    the resolved handler is cached for that type. Further node types can be
+    supported with :meth:`register`.
+
+    The string-returning ``generate_<NodeClass>`` methods of earlier versions
+    still work: each one returns what its ``emit_`` handler writes, and a
+    subclass overriding one takes precedence over the inherited handler.
+
+    Lists made only of literals, or of tuples of literals, skip per-element
+    dispatch and are written in chunks. With ``wrap_width`` set, such lists
+    are broken into lines of at most that many characters of elements.
+
+    Calls of ``get``, ``set``, ``insert`` and ``delete`` on a map declared
+    above become map functions; other method calls are written as calls.
+    Generating a program starts with no maps known. Statements generated one
+    at a time share :attr:`maps`, which the caller clears between programs.
+    """
+
+    def __init__(self, wrap_width=None):
+        self.wrap_width = wrap_width
         self.indent_level = 0
+        # Names of the maps declared so far.
+        self.maps = set()
+        self.write = None
+        self._dispatch = type(self)._dispatch
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._collect_handlers()
+
+    @classmethod
+    def _collect_handlers(cls):
+        cls._handlers = {}
+        cls._dispatch = {}
+        for name, handler in vars(cls).items():
+            if name.startswith('emit_') and name[5:] in _NAMED_TYPES:
+                cls._handlers[_NAMED_TYPES[name[5:]]] = handler
+        for name, method in vars(cls).items():
+            if name.startswith('generate_') and name[9:] in _NAMED_TYPES \
+                    and not hasattr(method, 'emit_handler') and 'emit_' + name[9:] not in vars(cls):
+                cls._handlers[_NAMED_TYPES[name[9:]]] = _string_handler(method)
+
+    @classmethod
+    def register(cls, node_type, handler=None):
+        """Use ``handler(generator, node)`` to emit nodes of ``node_type``.
+
+        The handler writes with ``generator.write`` and may be a generator
+        function yielding child nodes to emit in place.
+
+        The handler applies to this class and its subclasses, and to
+        subclasses of ``node_type`` without a handler of their own. Can be used
+        as a decorator when ``handler`` is omitted.
+        """
+        if handler is None:
+            return lambda handler: cls.register(node_type, handler)
+        cls._handlers[node_type] = handler
+        stale = [cls]
+        while stale:
+            generator_class = stale.pop()
+            generator_class._dispatch.clear()
+            stale.extend(generator_class.__subclasses__())
+        return handler
+
+    @classmethod
+    def _resolve(cls, node_type):
+        for base in node_type.__mro__:
+            for generator_class in cls.__mro__:
+                handler = vars(generator_class).get('_handlers', {}).get(base)
+                if handler is not None:
+                    cls._dispatch[node_type] = handler
+                    return handler
+        raise NotImplementedError(f"Generation not implemented for {node_type.__name__}")
 
     def indent(self):
         return "  " * self.indent_level
 
     def generate(self, node):
-        if node is None:
-            return ""
-        elif isinstance(node, str):
-            return self.generate_str(node)
-        elif isinstance(node, int):
-            return str(node)
-        elif isinstance(node, float):
-            return str(node)
-        elif isinstance(node, bool):
-            return 'true' if node else 'false'
-        elif isinstance(node, list):
-            return self.generate_list(node)
-        elif isinstance(node, tuple):
-            return self.generate_tuple(node)
-        elif isinstance(node, dict):
-            return self.generate_dict(node)
-        elif isinstance(node, Identifier):
-            return self.generate_Identifier(node)
-        elif isinstance(node, Type):
-            return self.generate_Type(node)
-        elif isinstance(node, AssetCallExpression):
-            return self.generate_AssetCallExpression(node)
-        
-        method = getattr(self, f'generate_{node.__class__.__name__}', None)
-        if method is None:
-            raise NotImplementedError(f"Generation not implemented for {node.__class__.__name__}")
-        return method(node)
-
-    def generate_str(self, node: str):
-        return f'"{node}"'
-
-    def generate_list(self, node: list):
-        return f'(list {" ".join(self.generate(item) for item in node)})'
-
-    def generate_tuple(self, node: tuple):
-        return f'(tuple {" ".join(self.generate(item) for item in node)})'
-
-    def generate_dict(self, node: dict):
-        return f'(tuple {" ".join(f"({self.generate(k)} {self.generate(v)})" for k, v in node.items())})'
-
-    def generate_Identifier(self, node: Identifier):
-        return node.name
-
-    def generate_Type(self, node: Type):
-        return node.name
-
-    def generate_Program(self, node: Program):
-        return '\n'.join(self.generate(stmt) for stmt in node.statements)
-
-    def generate_FunctionDeclaration(self, node: FunctionDeclaration):
-        is_public = any(d == '@public' for d in node.decorators)
-        func_type = 'public' if is_public else 'private'
-        params = ' '.join(self.generate(param) for param in node.parameters)
-        body = self.generate(node.body)
-        return f'(define-{func_type} ({node.name} {params})\n{self.indent()}{body})'
-
-    def generate_VariableDeclaration(self, node: VariableDeclaration):
-        type_str = self.generate(node.type) if node.type else ''
-        value = self.generate(node.value)
-        return f'(define-data-var {node.name} {type_str} {value})'
-
-    def generate_ConstantDeclaration(self, node: ConstantDeclaration):
-        value = self.generate(node.value)
-        return f'(define-constant {node.name} {value})'
-
-    def generate_MapDeclaration(self, node: MapDeclaration):
-        key_type = self.generate(node.key_type)
-        value_type = self.generate(node.value_type)
-        return f'(define-map {node.name} {key_type} {value_type})'
-
-    def generate_AssetDeclaration(self, node: AssetDeclaration):
-        fields = ' '.join(f'({field.name} {self.generate(field.type)})' for field in node.fields)
-        return f'(define-non-fungible-token {node.name} {fields})'
-
-    def generate_TraitDeclaration(self, node: TraitDeclaration):
-        functions = '\n'.join(self.generate(func) for func in node.functions)
-        return f'(define-trait {node.name}\n{self.indent()}({functions}))'
-
-    def generate_Parameter(self, node: Parameter):
-        return f'({node.name} {self.generate(node.type)})'
-
-    def generate_Block(self, node: Block):
+        parts = []
+        self._emit_into(parts.append, node)
+        return ''.join(parts)
+
+    def generate_to(self, node, stream):
+        """Write the Clarity for ``node`` to ``stream`` (anything with ``write``)."""
+        self._emit_into(stream.write, node)
+
+    def _emit_into(self, write, node):
+        outer_write, outer_level = self.write, self.indent_level
+        self.write = write
+        try:
+            self.emit(node)
+        finally:
+            self.write, self.indent_level = outer_write, outer_level
+
+    def emit(self, node):
+        dispatch = self._dispatch
+        pending = []
+        while True:
+            try:
+                handler = dispatch[node.__class__]
+            except KeyError:
+                handler = self._resolve(node.__class__)
+            children = handler(self, node)
+            if children is not None:
+                pending.append(children)
+            while pending:
+                try:
+                    node = next(pending[-1])
+                    break
+                except StopIteration:
+                    pending.pop()
+            else:
+                return
+
+    def emit_joined(self, nodes, separator=' '):
+        for i, node in enumerate(nodes):
+            if i:
+                self.write(separator)
+            yield node
+
+    def emit_NoneType(self, node):
+        pass
+
+    def emit_int(self, node: int):
+        self.write(str(node))
+
+    def emit_float(self, node: float):
+        self.write(str(node))
+
+    def emit_str(self, node: str):
+        self.write(f'"{node}"')
+
+    def emit_list(self, node: list):
+        self.write('(list ')
+        yield from self.emit_joined(node)
+        self.write(')')
+
+    def emit_tuple(self, node: tuple):
+        self.write('(tuple ')
+        yield from self.emit_joined(node)
+        self.write(')')
+
+    def emit_dict(self, node: dict):
+        self.write('(tuple ')
+        for i, (k, v) in enumerate(node.items()):
+            self.write(' (' if i else '(')
+            yield k
+            self.write(' ')
+            yield v
+            self.write(')')
+        self.write(')')
+
+    def emit_Identifier(self, node: Identifier):
+        self.write(str(node.name))
+
+    def emit_Type(self, node: Type):
+        self.write(str(node.name))
+
+    def emit_Program(self, node: Program):
+        self.maps.clear()
+        yield from self.emit_joined(node.statements, '\n')
+
+    def emit_FunctionDeclaration(self, node: FunctionDeclaration):
+        if '@public' in node.decorators:
+            func_type = 'public'
+        elif '@readable' in node.decorators:
+            func_type = 'read-only'
+        else:
+            func_type = 'private'
+        self.write(f'(define-{func_type} ({node.name} ')
+        yield from self.emit_joined(node.parameters)
+        self.write(f')\n{self.indent()}')
+        yield node.body
+        self.write(')')
+
+    def emit_VariableDeclaration(self, node: VariableDeclaration):
+        self.write(f'(define-data-var {node.name} ')
+        if node.type:
+            yield node.type
+        self.write(' ')
+        yield node.value
+        self.write(')')
+
+    def emit_ConstantDeclaration(self, node: ConstantDeclaration):
+        self.write(f'(define-constant {node.name} ')
+        yield node.value
+        self.write(')')
+
+    def emit_MapDeclaration(self, node: MapDeclaration):
+        self.maps.add(str(node.name))
+        self.write(f'(define-map {node.name} ')
+        yield node.key_type
+        self.write(' ')
+        yield node.value_type
+        self.write(')')
+
+    def emit_AssetDeclaration(self, node: AssetDeclaration):
+        self.write(f'(define-non-fungible-token {node.name} ')
+        for i, field in enumerate(node.fields):
+            self.write(f' ({field.name} ' if i else f'({field.name} ')
+            yield field.type
+            self.write(')')
+        self.write(')')
+
+    def emit_TraitDeclaration(self, node: TraitDeclaration):
+        self.write(f'(define-trait {node.name}\n{self.indent()}(')
+        yield from self.emit_joined(node.functions, '\n')
+        self.write('))')
+
+    def emit_Parameter(self, node: Parameter):
+        self.write(f'({node.name} ')
+        yield node.type
+        self.write(')')
+
+    def emit_Block(self, node: Block):
         self.indent_level += 1
-        body = '\n'.join(f'{self.indent()}{self.generate(stmt)}' for stmt in node.statements)
+        for i, stmt in enumerate(node.statements):
+            self.write(f'\n{self.indent()}' if i else self.indent())
+            yield stmt
         self.indent_level -= 1
-        return body
-
-    def generate_IfStatement(self, node: IfStatement):
-        condition = self.generate(node.condition)
-        true_block = self.generate(node.true_block)
-        else_block = self.generate(node.else_block) if node.else_block else None
-        if else_block:
-            return f'(if {condition}\n{self.indent()}{true_block}\n{self.indent()}{else_block})'
-        else:
-            return f'(if {condition}\n{self.indent()}{true_block}\n{self.indent()})'
-
-    def generate_TryCatchStatement(self, node: TryCatchStatement):
-        try_block = self.generate(node.try_block)
-        catch_block = self.generate(node.catch_block)
-        return f'(try\n{self.indent()}{try_block}\n{self.indent()}(catch {node.error_var} {catch_block}))'
 
-    def generate_ThrowStatement(self, node: ThrowStatement):
-        expr = self.generate(node.expression)
-        return f'(error {expr})'
-
-    def generate_ReturnStatement(self, node: ReturnStatement):
+    def emit_IfStatement(self, node: IfStatement):
+        self.write('(if ')
+        yield node.condition
+        self.write(f'\n{self.indent()}')
+        yield node.true_block
+        self.write(f'\n{self.indent()}')
+        else_block = node.else_block
+        if else_block and not isinstance(else_block, Block):
+            self.write(self.generate(else_block))
+        elif else_block and else_block.statements:
+            yield else_block
+        self.write(')')
+
+    def emit_TryCatchStatement(self, node: TryCatchStatement):
+        self.write(f'(try\n{self.indent()}')
+        yield node.try_block
+        self.write(f'\n{self.indent()}(catch {node.error_var} ')
+        yield node.catch_block
+        self.write('))')
+
+    def emit_ThrowStatement(self, node: ThrowStatement):
+        self.write('(error ')
+        yield node.expression
+        self.write(')')
+
+    def emit_ReturnStatement(self, node: ReturnStatement):
         if node.expression:
-            expr = self.generate(node.expression)
-            return expr
-        return '()'
-
-    def generate_ExpressionStatement(self, node: ExpressionStatement):
-        return self.generate(node.expression)
-
-    def generate_BinaryExpression(self, node: BinaryExpression):
-        left = self.generate(node.left)
-        right = self.generate(node.right)
-        return f'({node.operator} {left} {right})'
-
-    def generate_UnaryExpression(self, node: UnaryExpression):
-        expr = self.generate(node.expression)
-        return f'({node.operator} {expr})'
-
-    def generate_TernaryExpression(self, node: TernaryExpression):
-        condition = self.generate(node.condition)
-        true_expr = self.generate(node.true_expr)
-        false_expr = self.generate(node.false_expr)
-        return f'(if {condition} {true_expr} {false_expr})'
-
-    def generate_CallExpression(self, node: CallExpression):
-        callee = self.generate(node.callee)
-        args = ' '.join(self.generate(arg) for arg in node.arguments)
-        return f'({callee} {args})'
-
-    def generate_MemberExpression(self, node: MemberExpression):
-        obj = self.generate(node.object)
-        return f'(get {node.property} {obj})'
-
-    def generate_Literal(self, node: Literal):
-        if isinstance(node.value, str):
-            return f'"{node.value}"'
-        return str(node.value)
-
-    def generate_ListLiteral(self, node: ListLiteral):
-        elements = ' '.join(self.generate(elem) for elem in node.elements)
-        return f'(list {elements})'
-
-    def generate_TupleLiteral(self, node: TupleLiteral):
-        elements = ' '.join(f'({k} {self.generate(v)})' for k, v in node.elements.items())
-        return f'(tuple {elements})'
-
-    def generate_OptionalLiteral(self, node: OptionalLiteral):
+            yield node.expression
+        else:
+            self.write('()')
+
+    def emit_ExpressionStatement(self, node: ExpressionStatement):
+        yield node.expression
+
+    def emit_BinaryExpression(self, node: BinaryExpression):
+        self.write(f'({node.operator} ')
+        yield node.left
+        self.write(' ')
+        yield node.right
+        self.write(')')
+
+    def emit_UnaryExpression(self, node: UnaryExpression):
+        self.write(f'({node.operator} ')
+        yield node.expression
+        self.write(')')
+
+    def emit_TernaryExpression(self, node: TernaryExpression):
+        self.write('(if ')
+        yield node.condition
+        self.write(' ')
+        yield node.true_expr
+        self.write(' ')
+        yield node.false_expr
+        self.write(')')
+
+    def emit_CallExpression(self, node: CallExpression):
+        callee = node.callee
+        if callee.__class__ is MemberExpression and str(callee.property) in MAP_METHODS \
+                and callee.object.__class__ is Identifier and callee.object.name in self.maps:
+            self.write(f'({MAP_METHODS[str(callee.property)]} ')
+            yield callee.object
+            for argument in node.arguments:
+                self.write(' ')
+                yield argument
+            self.write(')')
+            return
+        self.write('(')
+        yield callee
+        self.write(' ')
+        yield from self.emit_joined(node.arguments)
+        self.write(')')
+
+    def emit_MemberExpression(self, node: MemberExpression):
+        self.write(f'(get {node.property} ')
+        yield node.object
+        self.write(')')
+
+    def emit_Literal(self, node: Literal):
+        self.write(_literal_text(node.value))
+
+    def emit_ListLiteral(self, node: ListLiteral):
+        if len(node.elements) > 1 and self._literals_only(node.elements):
+            self._write_literals(node.elements)
+            return
+        self.write('(list ')
+        yield from self.emit_joined(node.elements)
+        self.write(')')
+
+    def _literals_only(self, elements):
+        """Whether ``elements`` are literals or tuples of literals that would
+        be emitted by the default handlers."""
+        dispatch = self._dispatch
+        for node_type, handler in ((Literal, ClarityGenerator.emit_Literal),
+                                   (TupleLiteral, ClarityGenerator.emit_TupleLiteral)):
+            if (dispatch.get(node_type) or self._resolve(node_type)) is not handler:
+                return False
+        for element in elements:
+            if element.__class__ is TupleLiteral:
+                if any(value.__class__ is not Literal for value in element.elements.values()):
+                    return False
+            elif element.__class__ is not Literal:
+                return False
+        return True
+
+    def _write_literals(self, elements):
+        write, width = self.write, self.wrap_width
+        texts = map(_literal_element_text, elements)
+        write('(list ')
+        if width is None:
+            chunk = ' '.join(islice(texts, _LITERAL_CHUNK))
+            while chunk:
+                write(chunk)
+                chunk = ' '.join(islice(texts, _LITERAL_CHUNK))
+                if chunk:
+                    write(' ')
+        else:
+            separator = '\n' + self.indent() + '  '
+            line, length = [], -1
+            for text in texts:
+                if line and length + 1 + len(text) > width:
+                    write(' '.join(line))
+                    write(separator)
+                    line, length = [], -1
+                line.append(text)
+                length += 1 + len(text)
+            write(' '.join(line))
+        write(')')
+
+    def emit_TupleLiteral(self, node: TupleLiteral):
+        self.write('(tuple ')
+        for i, (k, v) in enumerate(node.elements.items()):
+            self.write(f' ({k} ' if i else f'({k} ')
+            yield v
+            self.write(')')
+        self.write(')')
+
+    def emit_OptionalLiteral(self, node: OptionalLiteral):
         if node.value:
-            return f'(some {self.generate(node.value)})'
-        return 'none'
-
-    def generate_PrincipalLiteral(self, node: PrincipalLiteral):
-        return f"'{node.value}'"
-
-    def generate_ListType(self, node: ListType):
-        return f'(list {self.generate(node.element_type)})'
-
-    def generate_TupleType(self, node: TupleType):
-        fields = ' '.join(f'({k} {self.generate(v)})' for k, v in node.fields.items())
-        return f'(tuple {fields})'
-
-    def generate_OptionalType(self, node: OptionalType):
-        return f'(optional {self.generate(node.value_type)})'
-
-    def generate_ResponseType(self, node: ResponseType):
-        ok_type = self.generate(node.ok_type)
-        err_type = self.generate(node.err_type)
-        return f'(response {ok_type} {err_type})'
-
-    def generate_ContractCallExpression(self, node: ContractCallExpression):
-        contract = self.generate(node.contract)
-        args = ' '.join(self.generate(arg) for arg in node.arguments)
-        return f'(contract-call? .{contract} {node.function} {args})'
-
-    def generate_AssetCallExpression(self, node: AssetCallExpression):
-        args = ' '.join(self.generate(arg) for arg in node.arguments)
+            self.write('(some ')
+            yield node.value
+            self.write(')')
+        else:
+            self.write('none')
+
+    def emit_PrincipalLiteral(self, node: PrincipalLiteral):
+        self.write(f"'{node.value}'")
+
+    def emit_ListType(self, node: ListType):
+        self.write('(list ')
+        yield node.element_type
+        self.write(')')
+
+    def emit_TupleType(self, node: TupleType):
+        self.write('(tuple ')
+        for i, (k, v) in enumerate(node.fields.items()):
+            self.write(f' ({k} ' if i else f'({k} ')
+            yield v
+            self.write(')')
+        self.write(')')
+
+    def emit_OptionalType(self, node: OptionalType):
+        self.write('(optional ')
+        yield node.value_type
+        self.write(')')
+
+    def emit_ResponseType(self, node: ResponseType):
+        self.write('(response ')
+        yield node.ok_type
+        self.write(' ')
+        yield node.err_type
+        self.write(')')
+
+    def emit_ContractCallExpression(self, node: ContractCallExpression):
+        self.write('(contract-call? .')
+        yield node.contract
+        self.write(f' {node.function} ')
+        yield from self.emit_joined(node.arguments)
+        self.write(')')
+
+    def emit_AssetCallExpression(self, node: AssetCallExpression):
         if node.function == 'mint':
-            return f'(nft-mint? {node.asset} {args})'
+            self.write(f'(nft-mint? {node.asset} ')
         elif node.function == 'transfer':
-            return f'(nft-transfer? {node.asset} {args})'
+            self.write(f'(nft-transfer? {node.asset} ')
         elif node.function == 'burn':
-            return f'(nft-burn? {node.asset} {args})'
+            self.write(f'(nft-burn? {node.asset} ')
         else:
             raise NotImplementedError(f"Unsupported asset function: {node.function}")
-
-    def generate_MapExpression(self, node: MapExpression):
-        list_expr = self.generate(node.list)
-        function = self.generate(node.function)
-        return f'(map {function} {list_expr})'
-
-    def generate_FilterExpression(self, node: FilterExpression):
-        list_expr = self.generate(node.list)
-        function = self.generate(node.function)
-        return f'(filter {function} {list_expr})'
-
-    def generate_FoldExpression(self, node: FoldExpression):
-        list_expr = self.generate(node.list)
-        initial = self.generate(node.initial)
-        function = self.generate(node.function)
-        return f'(fold {function} {initial} {list_expr})'
-
-    def generate_ListComprehension(self, node: ListComprehension):
-        expression = self.generate(node.expression)
-        iterable = self.generate(node.iterable)
-        iterator = self.generate(node.iterator)
+        yield from self.emit_joined(node.arguments)
+        self.write(')')
+
+    def emit_MapExpression(self, node: MapExpression):
+        self.write('(map ')
+        yield node.function
+        self.write(' ')
+        yield node.list
+        self.write(')')
+
+    def emit_FilterExpression(self, node: FilterExpression):
+        self.write('(filter ')
+        yield node.function
+        self.write(' ')
+        yield node.list
+        self.write(')')
+
+    def emit_FoldExpression(self, node: FoldExpression):
+        self.write('(fold ')
+        yield node.function
+        self.write(' ')
+        yield node.initial
+        self.write(' ')
+        yield node.list
+        self.write(')')
+
+    def emit_ListComprehension(self, node: ListComprehension):
         condition = self.generate(node.condition) if node.condition else None
+        self.write('(map ')
         if condition:
-            return f'(map {expression} (filter (lambda ({iterator}) {condition}) {iterable}))'
-        return f'(map (lambda ({iterator}) {expression}) {iterable})'
-
-    def generate_ImportDeclaration(self, node: ImportDeclaration):
-        return f'(use-trait {" ".join(node.imports)} .{node.module})'
-
-    def generate_ExportDeclaration(self, node: ExportDeclaration):
-        return self.generate(node.declaration)
-
-    def generate_TypeAssertion(self, node: TypeAssertion):
-        expr = self.generate(node.expression)
-        asserted_type = self.generate(node.asserted_type)
-        return f'(as {asserted_type} {expr})'
-
-    def generate_TypeCheck(self, node: TypeCheck):
-        expr = self.generate(node.expression)
-        checked_type = self.generate(node.checked_type)
-        return f'(is-{checked_type} {expr})'
-
-    def generate_LambdaExpression(self, node: LambdaExpression):
-        params = ' '.join(self.generate(param) for param in node.parameters)
-        body = self.generate(node.body)
-        return f'(lambda ({params}) {body})'
\ No newline at end of file
+            yield node.expression
+            self.write(' (filter (lambda (')
+            yield node.iterator
+            self.write(f') {condition}) ')
+        else:
+            self.write('(lambda (')
+            yield node.iterator
+            self.write(') ')
+            yield node.expression
+            self.write(') ')
+        yield node.iterable
+        self.write('))' if condition else ')')
+
+    def emit_ImportDeclaration(self, node: ImportDeclaration):
+        self.write(f'(use-trait {" ".join(node.imports)} .{node.module})')
+
+    def emit_ExportDeclaration(self, node: ExportDeclaration):
+        yield node.declaration
+
+    def emit_TypeAssertion(self, node: TypeAssertion):
+        self.write('(as ')
+        yield node.asserted_type
+        self.write(' ')
+        yield node.expression
+        self.write(')')
+
+    def emit_TypeCheck(self, node: TypeCheck):
+        self.write('(is-')
+        yield node.checked_type
+        self.write(' ')
+        yield node.expression
+        self.write(')')
+
+    def emit_LetExpression(self, node: LetExpression):
+        self.write('(let (')
+        for i, (name, value) in enumerate(node.bindings.items()):
+            self.write(f' ({name} ' if i else f'({name} ')
+            yield value
+            self.write(')')
+        self.write(')\n')
+        yield node.body
+        self.write(')')
+
+    def emit_MemoExpression(self, node: MemoExpression):
+        indent = self.indent()
+        self.write('(match (map-get? ')
+        yield node.cache
+        self.write(' ')
+        yield node.key
+        self.write(f')\n{indent}  memo-hit memo-hit\n{indent}  (let ((memo-value ')
+        statements = node.body.statements
+        if len(statements) == 1:
+            yield statements[0]
+        else:
+            self.write('(begin\n')
+            self.indent_level += 2
+            yield node.body
+            self.indent_level -= 2
+            self.write(')')
+        self.write(f'))\n{indent}    (map-set ')
+        yield node.cache
+        self.write(' ')
+        yield node.key
+        self.write(f' memo-value)\n{indent}    memo-value))')
+
+    def emit_LambdaExpression(self, node: LambdaExpression):
+        self.write('(lambda (')
+        yield from self.emit_joined(node.parameters)
+        self.write(') ')
+        yield node.body
+        self.write(')')
+
+
+def _string_handler(method):
+    """Handler writing the string returned by a ``generate_<NodeClass>`` override."""
+    def handler(generator, node):
+        generator.write(method(generator, node))
+    handler.overrides = method
+    return handler
+
+
+def _string_method(handler):
+    """``generate_<NodeClass>`` method returning what ``handler`` writes for a node.
+
+    A subclass's ``emit_`` handler for the node is used instead, unless it is
+    a ``generate_`` override, which may be the caller through ``super()``.
+    """
+    def generate_node(self, node):
+        resolved = self._dispatch.get(node.__class__) or self._resolve(node.__class__)
+        emit = handler if hasattr(resolved, 'overrides') else resolved
+        parts = []
+        outer_write, outer_level = self.write, self.indent_level
+        self.write = parts.append
+        try:
+            children = emit(self, node)
+            if children is not None:
+                for child in children:
+                    self.emit(child)
+        finally:
+            self.write, self.indent_level = outer_write, outer_level
+        return ''.join(parts)
+    generate_node.emit_handler = handler
+    return generate_node
+
+
+for _name, _handler in list(vars(ClarityGenerator).items()):
+    if _name.startswith('emit_') and _name[5:] in _NAMED_TYPES:
+        setattr(ClarityGenerator, 'generate_' + _name[5:], _string_method(_handler))
+del _name, _handler
+ClarityGenerator._collect_handlers()
@@ -0,0 +1,176 @@
+import argparse
+import os
+import sys
+import time
+from typing import List, Optional
+
+from . import __version__
+from .build import build, make_transpiler
+from .passes import MAX_LEVEL, PassManager
+from .server import TranspileServer, serve_stdio, serve_unix
+from .watch import watch
+
+COMMANDS = ('compile', 'build', 'watch', 'serve')
+
+
+def _compile(args) -> int:
+    transpiler = make_transpiler(args.cache_dir, args.pass_manager)
+    try:
+        with open(args.input, 'r', encoding='utf-8') as source_file:
+            source = source_file.read()
+    except OSError as e:
+        print(f'{args.input}: {e}', file=sys.stderr)
+        return 1
+    try:
+        if args.stats or args.stats_memory:
+            clarity_code, stats = transpiler.transpile_with_stats(source, trace_memory=args.stats_memory)
+            print(stats.to_json(indent=2), file=sys.stderr)
+        elif args.output:
+            clarity_code = transpiler.transpile(source)
+        else:
+            transpiler.transpile_to(source, sys.stdout)
+            sys.stdout.write('\n')
+            return 0
+    except SyntaxError as e:
+        print(f'{args.input}: {e}', file=sys.stderr)
+        return 1
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(clarity_code)
+    else:
+        sys.stdout.write(clarity_code + '\n')
+    return 0
+
+
+def _report(result, source_dir) -> None:
+    source = os.path.relpath(result.source, source_dir)
+    if result.ok:
+        print(f'ok    {result.seconds * 1000:8.1f} ms  {source}', flush=True)
+    else:
+        print(f'FAIL  {result.seconds * 1000:8.1f} ms  {source}: {result.error}',
+              file=sys.stderr, flush=True)
+
+
+def _build(args) -> int:
+    start = time.perf_counter()
+    compiled = failed = 0
+    for result in build(args.source_dir, args.out_dir, jobs=args.jobs, cache_dir=args.cache_dir,
+                        pass_manager=args.pass_manager):
+        if result.ok:
+            compiled += 1
+        else:
+            failed += 1
+        if not (result.ok and args.quiet):
+            _report(result, args.source_dir)
+    elapsed = time.perf_counter() - start
+    print(f'{compiled} compiled, {failed} failed in {elapsed:.2f} s')
+    return 1 if failed else 0
+
+
+def _watch(args) -> int:
+    print(f'watching {args.source_dir} (Ctrl-C to stop)', flush=True)
+    try:
+        watch(args.source_dir, args.out_dir, lambda result: _report(result, args.source_dir),
+              debounce=args.debounce / 1000, polling=args.poll, cache_dir=args.cache_dir,
+              pass_manager=args.pass_manager)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _serve(args) -> int:
+    server = TranspileServer(make_transpiler(args.cache_dir, args.pass_manager),
+                             max_queue=args.max_queue)
+    try:
+        if args.stdio:
+            # Keep the protocol stream clean of anything else printed to stdout.
+            protocol_out, sys.stdout = sys.stdout, sys.stderr
+            serve_stdio(server, sys.stdin, protocol_out)
+        else:
+            serve_unix(server, args.socket)
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f'stxscript serve: {e}', file=sys.stderr)
+        return 1
+    return 0
+
+
+def _add_optimize_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('-O', dest='opt_level', type=int, default=0, choices=range(MAX_LEVEL + 1),
+                        help='optimisation level (default: %(default)s)')
+    parser.add_argument('--enable-pass', action='append', default=[], metavar='NAME',
+                        help='run an optimisation pass regardless of -O (repeatable)')
+    parser.add_argument('--disable-pass', action='append', default=[], metavar='NAME',
+                        help='skip an optimisation pass (repeatable)')
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='stxscript', description='Transpile StxScript to Clarity.')
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    commands = parser.add_subparsers(dest='command')
+
+    compile_parser = commands.add_parser('compile', help='transpile a single file')
+    compile_parser.add_argument('input')
+    compile_parser.add_argument('output', nargs='?', help='defaults to stdout')
+    compile_parser.add_argument('--cache-dir', help='reuse output for unchanged sources')
+    compile_parser.add_argument('--stats', action='store_true',
+                                help='print per-phase timings and counters as JSON to stderr')
+    compile_parser.add_argument('--stats-memory', action='store_true',
+                                help='like --stats, also tracing peak memory per phase (slower)')
+    _add_optimize_arguments(compile_parser)
+    compile_parser.set_defaults(handler=_compile)
+
+    build_parser = commands.add_parser('build', help='transpile every .stx file below a directory')
+    build_parser.add_argument('source_dir')
+    build_parser.add_argument('-o', '--out-dir', default='build',
+                              help='mirrored output tree (default: %(default)s)')
+    build_parser.add_argument('-j', '--jobs', type=int, default=None,
+                              help='worker processes (default: one per CPU)')
+    build_parser.add_argument('--cache-dir', help='reuse output for unchanged sources')
+    build_parser.add_argument('-q', '--quiet', action='store_true', help='only report failures')
+    _add_optimize_arguments(build_parser)
+    build_parser.set_defaults(handler=_build)
+
+    watch_parser = commands.add_parser('watch', help='rebuild .stx files below a directory as they change')
+    watch_parser.add_argument('source_dir')
+    watch_parser.add_argument('-o', '--out-dir', default='build',
+                              help='mirrored output tree (default: %(default)s)')
+    watch_parser.add_argument('--debounce', type=float, default=50,
+                              help='milliseconds to wait for a burst of saves to settle (default: %(default)s)')
+    watch_parser.add_argument('--poll', action='store_true', help='poll modification times instead of inotify')
+    watch_parser.add_argument('--cache-dir', help='reuse output for unchanged sources')
+    _add_optimize_arguments(watch_parser)
+    watch_parser.set_defaults(handler=_watch)
+
+    serve_parser = commands.add_parser('serve', help='run a transpile daemon speaking JSON-RPC')
+    transport = serve_parser.add_mutually_exclusive_group()
+    transport.add_argument('--socket', help='Unix socket path (default: $STXSCRIPT_SOCKET or a per-user path)')
+    transport.add_argument('--stdio', action='store_true', help='serve on stdin/stdout instead of a socket')
+    serve_parser.add_argument('--max-queue', type=int, default=64,
+                              help='pending requests before new ones are rejected (default: %(default)s)')
+    serve_parser.add_argument('--cache-dir', help='reuse output for unchanged sources')
+    _add_optimize_arguments(serve_parser)
+    serve_parser.set_defaults(handler=_serve)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # `stxscript input.stx output.clar` is shorthand for `stxscript compile ...`.
+    if argv and argv[0] not in COMMANDS and not argv[0].startswith('-'):
+        argv.insert(0, 'compile')
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+    try:
+        args.pass_manager = PassManager(args.opt_level, args.enable_pass, args.disable_pass)
+    except ValueError as e:
+        parser.error(str(e))
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
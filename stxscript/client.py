@@ -0,0 +1,111 @@
+import itertools
+import json
+import socket
+from typing import Any, Dict, List, Optional
+
+from .server import TRANSPILE_ERROR, default_socket_path
+from .transpiler import StxScriptTranspiler
+
+
+class ServerError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class TranspileClient:
+    """Talks to a running ``stxscript serve`` daemon over its Unix socket.
+
+    When no daemon is listening the client compiles in-process instead, so
+    callers get the same results either way (just without the warm start).
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = 30.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self._socket: Optional[socket.socket] = None
+        self._reader = None
+        self._transpiler: Optional[StxScriptTranspiler] = None
+        self._ids = itertools.count(1)
+
+    @property
+    def connected(self) -> bool:
+        return self._connect()
+
+    def _connect(self) -> bool:
+        if self._socket is not None:
+            return True
+        if self._transpiler is not None:
+            return False
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            self._transpiler = StxScriptTranspiler()
+            return False
+        self._socket = sock
+        self._reader = sock.makefile('rb')
+        return True
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._reader.close()
+            self._socket.close()
+            self._socket = self._reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def request(self, method: str, **params) -> Any:
+        """Send one request to the daemon and wait for its response."""
+        if not self._connect():
+            raise ConnectionError(f'no stxscript server at {self.socket_path}')
+        request_id = next(self._ids)
+        message = {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}
+        self._socket.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        while True:
+            line = self._reader.readline()
+            if not line:
+                self.close()
+                raise ConnectionError('stxscript server closed the connection')
+            response = json.loads(line)
+            if response.get('id') == request_id:
+                break
+        if 'error' in response:
+            raise ServerError(response['error']['code'], response['error']['message'])
+        return response['result']
+
+    def transpile(self, source: str) -> str:
+        if not self._connect():
+            return self._transpiler.transpile(source)
+        try:
+            return self.request('transpile', source=source)['clarity']
+        except ServerError as e:
+            if e.code == TRANSPILE_ERROR:
+                raise SyntaxError(str(e))
+            raise
+
+    def check(self, source: str) -> Dict[str, Any]:
+        if not self._connect():
+            try:
+                self._transpiler.lower(self._transpiler.parse(source))
+            except Exception as e:
+                return {'ok': False, 'error': str(e)}
+            return {'ok': True, 'error': None}
+        return self.request('check', source=source)
+
+    def batch(self, sources: List[str]) -> List[Dict[str, str]]:
+        if not self._connect():
+            results = []
+            for source in sources:
+                try:
+                    results.append({'clarity': self._transpiler.transpile(source)})
+                except SyntaxError as e:
+                    results.append({'error': str(e)})
+            return results
+        return self.request('batch', sources=sources)['results']
@@ -0,0 +1,375 @@
+"""Common-subexpression elimination inside function bodies.
+
+A pure expression computed more than once in a block, such as ``a * b`` or
+a map read like ``balances.get(sender)``, is evaluated once and bound in a
+Clarity ``let`` wrapping the rest of the block. Each map read removed saves
+a ``map-get?`` (and its read cost) on every call of the function.
+
+Expressions are compared by structure and tracked in evaluation order. A
+binding is placed before the statement that first evaluates the expression
+unconditionally; later uses are replaced as long as nothing in between can
+change its value:
+
+- assigning or declaring a name it uses
+- writing the map it reads (``set``, ``insert``, ``delete``)
+- any other call, which might write a map
+
+Uses inside conditional code (branches, the right of ``&&``/``||``) are
+replaced too, but never start a binding, so no path evaluates more than it
+did before. Lambdas and comprehensions are left alone; a call inside one
+still ends every binding of a map read.
+
+Moving an expression to the start of its statement only changes when it
+runs within that statement. Arithmetic that fails there aborts the
+transaction either way.
+"""
+import itertools
+from typing import Dict, List, Optional, Set
+
+from .ast_nodes import (AssetCallExpression, BinaryExpression, Block, CallExpression,
+                        ConstantDeclaration, ContractCallExpression, FilterExpression,
+                        FoldExpression, FunctionDeclaration, Identifier, IfStatement,
+                        LambdaExpression, LetExpression, ListComprehension, ListLiteral, Literal,
+                        MapDeclaration, MapExpression, MemberExpression, TernaryExpression,
+                        TryCatchStatement, TypeAssertion, TypeCheck, UnaryExpression,
+                        VariableDeclaration)
+from .passes import Pass, child_fields, walk
+
+_MAP_READS = frozenset(('get',))
+_MAP_WRITES = frozenset(('set', 'insert', 'delete'))
+# Calls that build a value and do nothing else.
+_CONSTRUCTORS = frozenset(('ok', 'err', 'some'))
+_LITERALS = (int, str, bool)
+_OPAQUE = frozenset((LambdaExpression, ListComprehension, MapExpression, FilterExpression,
+                     FoldExpression))
+# Fields evaluated only on some paths.
+_CONDITIONAL = {
+    IfStatement: frozenset(('true_block', 'else_ifs', 'else_block')),
+    TernaryExpression: frozenset(('true_expr', 'false_expr')),
+    TryCatchStatement: frozenset(('try_block', 'catch_block')),
+}
+
+# Markers in the evaluation-order walk: leaving a node or a block, and
+# starting a statement.
+_EXIT = object()
+_LEAVE = object()
+_STATEMENT = object()
+
+
+class _Kill:
+    """Something that may change the value of expressions: assigned names,
+    written maps, or (``every_map``) any map."""
+    __slots__ = ('names', 'maps', 'every_map')
+
+    def __init__(self, names=frozenset(), maps=frozenset(), every_map=False):
+        self.names = names
+        self.maps = maps
+        self.every_map = every_map
+
+    def ends(self, info) -> bool:
+        _, names, reads = info
+        return (not self.names.isdisjoint(names) or not self.maps.isdisjoint(reads)
+                or self.every_map and bool(reads))
+
+
+class _Scope:
+    """A block being scanned, and the kills so far in its current statement."""
+    __slots__ = ('block', 'statement', 'recent', 'opened')
+
+    def __init__(self, block):
+        self.block = block
+        self.statement = 0
+        self.recent: List[_Kill] = []
+        self.opened: List[int] = []
+
+
+class _Group:
+    """Uses of one expression with nothing in between that could change its
+    value. The first is unconditional in ``scope`` at ``statement``."""
+    __slots__ = ('key', 'uses', 'scope', 'statement', 'order')
+
+    def __init__(self, key, use, scope, order):
+        self.key = key
+        self.uses = [use]
+        self.scope = scope
+        self.statement = scope.statement
+        self.order = order
+
+
+class _Scan:
+    """Finds the groups of repeated expressions in one function body."""
+
+    def __init__(self, maps: Set[str]):
+        self.maps = maps
+        # Structural key -> small int, so keys of parents stay shallow.
+        self.ids: Dict[tuple, int] = {}
+        # Key -> (size, names used, maps read).
+        self.info: Dict[int, tuple] = {}
+        self.keys: Dict[int, Optional[int]] = {}
+        self.groups: List[_Group] = []
+        self.open: Dict[int, _Group] = {}
+        # Keys of open groups by the names they use and the maps they read.
+        self.by_name: Dict[str, Set[int]] = {}
+        self.by_map: Dict[str, Set[int]] = {}
+        self.scopes: List[_Scope] = []
+        self.started = 0
+
+    def _key(self, structure, size, names, reads) -> int:
+        key = self.ids.get(structure)
+        if key is None:
+            key = self.ids[structure] = len(self.ids)
+            self.info[key] = (size, names, reads)
+        return key
+
+    def _start(self, key, use) -> None:
+        scope = self.scopes[-1]
+        _, names, reads = info = self.info[key]
+        if any(kill.ends(info) for kill in scope.recent):
+            return
+        self.started += 1
+        self.open[key] = _Group(key, use, scope, self.started)
+        scope.opened.append(key)
+        for name in names:
+            self.by_name.setdefault(name, set()).add(key)
+        for table in reads:
+            self.by_map.setdefault(table, set()).add(key)
+
+    def _close(self, key) -> None:
+        group = self.open.pop(key, None)
+        if group is None:
+            return
+        _, names, reads = self.info[key]
+        for name in names:
+            self.by_name[name].discard(key)
+        for table in reads:
+            self.by_map[table].discard(key)
+        if len(group.uses) > 1:
+            self.groups.append(group)
+
+    def _kill(self, names=frozenset(), maps=frozenset(), every_map=False) -> None:
+        kill = _Kill(names, maps, every_map)
+        for scope in self.scopes:
+            scope.recent.append(kill)
+        ended = set()
+        for name in names:
+            ended.update(self.by_name.get(name, ()))
+        for table in (self.by_map if every_map else maps):
+            ended.update(self.by_map.get(table, ()))
+        for key in ended:
+            self._close(key)
+
+    def scan(self, body: Block) -> List[_Group]:
+        keys = self.keys
+        stack = [(body, None, None, False)]
+        pop, push = stack.pop, stack.append
+        while stack:
+            entry = pop()
+            marker = entry[0]
+            if marker is _EXIT:
+                _, node, parent, slot, conditional = entry
+                key = keys[id(node)] = self._exit(node)
+                if key is not None:
+                    group = self.open.get(key)
+                    if group is not None:
+                        group.uses.append((node, parent, slot))
+                    elif not conditional:
+                        self._start(key, (node, parent, slot))
+                continue
+            if marker is _STATEMENT:
+                scope = entry[1]
+                scope.statement, scope.recent = entry[2], []
+                continue
+            if marker is _LEAVE:
+                scope = self.scopes.pop()
+                for key in scope.opened:
+                    group = self.open.get(key)
+                    if group is not None and group.scope is scope:
+                        self._close(key)
+                continue
+            value, parent, slot, conditional = entry
+            cls = value.__class__
+            if cls is Identifier or cls is Literal:
+                keys[id(value)] = self._exit(value)
+                continue
+            if cls is list:
+                for i in range(len(value) - 1, -1, -1):
+                    push((value[i], value, i, conditional))
+                continue
+            if cls is dict:
+                for item_key, item in reversed(list(value.items())):
+                    push((item, value, item_key, conditional))
+                continue
+            if cls is Block:
+                # Statements are unconditional within their own block.
+                scope = _Scope(value)
+                self.scopes.append(scope)
+                push((_LEAVE,))
+                statements = value.statements
+                for i in range(len(statements) - 1, -1, -1):
+                    push((statements[i], statements, i, False))
+                    push((_STATEMENT, scope, i))
+                continue
+            if cls is ListLiteral and all(item.__class__ is Literal for item in value.elements):
+                # Bulk data: nothing to bind and nothing that kills.
+                continue
+            if cls in _OPAQUE:
+                self._opaque(value)
+                continue
+            if cls is TryCatchStatement:
+                # The catch block binds a new name.
+                self._kill(names=frozenset((str(value.error_var),)))
+            # A callee names a function rather than computing a value.
+            fields = ('arguments',) if cls is CallExpression else child_fields(cls)
+            if not fields:
+                continue
+            push((_EXIT, value, parent, slot, conditional))
+            branches = _CONDITIONAL.get(cls, ())
+            short_circuit = cls is BinaryExpression and value.operator in ('&&', '||')
+            for name in reversed(fields):
+                push((getattr(value, name), value, name,
+                      conditional or name in branches or short_circuit and name == 'right'))
+        for key in list(self.open):
+            self._close(key)
+        return self.groups
+
+    def _opaque(self, node) -> None:
+        names = set()
+        every_map = False
+        for child in walk(node):
+            cls = child.__class__
+            if cls is BinaryExpression and child.operator == '=' \
+                    and child.left.__class__ is Identifier:
+                names.add(child.left.name)
+            elif cls is VariableDeclaration or cls is ConstantDeclaration:
+                names.add(str(child.name))
+            elif cls is CallExpression:
+                every_map = True
+        if names or every_map:
+            self._kill(names=frozenset(names), every_map=every_map)
+
+    def _exit(self, node) -> Optional[int]:
+        """The key of ``node``, or None when it is not a pure expression."""
+        cls = node.__class__
+        if cls is Identifier:
+            return self._key(('I', node.name), 1, frozenset((node.name,)), frozenset())
+        if cls is Literal:
+            if node.value.__class__ not in _LITERALS:
+                return None
+            return self._key(('L', node.value.__class__, node.value), 1, frozenset(), frozenset())
+        if cls is BinaryExpression:
+            if node.operator == '=':
+                if node.left.__class__ is Identifier:
+                    self._kill(names=frozenset((node.left.name,)))
+                return None
+            return self._compound(('B', node.operator), (node.left, node.right))
+        if cls is UnaryExpression:
+            return self._compound(('U', node.operator), (node.expression,))
+        if cls is TernaryExpression:
+            return self._compound(('T',), (node.condition, node.true_expr, node.false_expr))
+        if cls is MemberExpression:
+            return self._compound(('M', str(node.property)), (node.object,))
+        if cls is TypeCheck:
+            return self._compound(('C', node.checked_type), (node.expression,))
+        if cls is TypeAssertion:
+            return self._compound(('A', node.asserted_type), (node.expression,))
+        if cls is CallExpression:
+            return self._call(node)
+        if cls is VariableDeclaration or cls is ConstantDeclaration:
+            self._kill(names=frozenset((str(node.name),)))
+        elif cls is ContractCallExpression or cls is AssetCallExpression:
+            self._kill(every_map=True)
+        return None
+
+    def _compound(self, head, operands, reads=frozenset()) -> Optional[int]:
+        size, names = 1, frozenset()
+        structure = list(head)
+        for operand in operands:
+            key = self.keys.get(id(operand))
+            if key is None:
+                return None
+            operand_size, operand_names, operand_reads = self.info[key]
+            size += operand_size
+            names |= operand_names
+            reads |= operand_reads
+            structure.append(key)
+        return self._key(tuple(structure), size, names, reads)
+
+    def _call(self, node) -> Optional[int]:
+        callee = node.callee
+        if callee.__class__ is MemberExpression and callee.object.__class__ is Identifier \
+                and callee.object.name in self.maps:
+            table, method = callee.object.name, str(callee.property)
+            if method in _MAP_READS:
+                return self._compound(('R', table, method), node.arguments, frozenset((table,)))
+            if method in _MAP_WRITES:
+                self._kill(maps=frozenset((table,)))
+                return None
+        elif callee.__class__ is Identifier and callee.name in _CONSTRUCTORS:
+            return self._compound(('F', callee.name), node.arguments)
+        self._kill(every_map=True)
+        return None
+
+
+class CommonSubexpressionElimination(Pass):
+    """Binds repeated pure expressions and map reads once in a ``let``."""
+    name = 'eliminate-common-subexpressions'
+    level = 2
+    preserves = frozenset(('declarations',))
+
+    def __init__(self):
+        self.bindings = 0
+        self.replaced = 0
+        self.map_reads = 0
+
+    def counters(self):
+        return {'bindings': self.bindings, 'replaced': self.replaced,
+                'map_reads': self.map_reads}
+
+    def run(self, program, analyses):
+        self.bindings = self.replaced = self.map_reads = 0
+        maps = {name for name, declaration in analyses['declarations'].items()
+                if declaration.__class__ is MapDeclaration}
+        for statement in program.statements:
+            function = getattr(statement, 'declaration', statement)
+            if function.__class__ is FunctionDeclaration:
+                self._function(function, maps)
+        return self.bindings > 0
+
+    def _function(self, function, maps) -> None:
+        scan = _Scan(maps)
+        groups = scan.scan(function.body)
+        if not groups:
+            return
+        info = scan.info
+        # Largest first: uses inside a bound expression are gone once it is.
+        groups.sort(key=lambda group: -info[group.key][0])
+        names = itertools.count(1)
+        consumed: Set[int] = set()
+        # Block id -> (block, statement index -> [(order, name, expression)]).
+        bindings: Dict[int, tuple] = {}
+        for group in groups:
+            uses = [use for use in group.uses if id(use[0]) not in consumed]
+            if len(uses) < 2 or uses[0] is not group.uses[0]:
+                continue
+            name = f'cse-{next(names)}'
+            block = group.scope.block
+            statements = bindings.setdefault(id(block), (block, {}))[1]
+            statements.setdefault(group.statement, []).append((group.order, name, uses[0][0]))
+            for node, parent, slot in uses:
+                consumed.update(id(child) for child in walk(node))
+                reference = Identifier(name)
+                if parent.__class__ is list or parent.__class__ is dict:
+                    parent[slot] = reference
+                else:
+                    setattr(parent, slot, reference)
+            self.bindings += 1
+            self.replaced += len(uses)
+            if info[group.key][2]:
+                self.map_reads += len(uses) - 1
+        for block, statements in bindings.values():
+            body = block.statements
+            for index in sorted(statements, reverse=True):
+                # Bindings evaluate in the order their expressions first did.
+                ordered = sorted(statements[index])
+                bound = {name: expression for _, name, expression in ordered}
+                body[index:] = [LetExpression(bound, Block(body[index:]))]
@@ -0,0 +1,258 @@
+"""Constant folding, algebraic simplification and constant propagation.
+
+Integer literals are emitted as Clarity ``int`` values, so arithmetic on
+them is folded with ``int`` semantics: 128-bit signed, ``/`` truncating
+toward zero and ``%`` taking the sign of the dividend. Inside a declaration
+typed ``uint`` the result must also be non-negative. An operation that
+would fail at runtime (overflow, division by zero, out-of-range shift) is
+left in place, so the contract still aborts where it did before.
+
+Booleans are the identifiers ``true`` and ``false``. Simplifications only
+drop an operand when Clarity would not evaluate it either (``false && x``)
+or when it is a plain name or literal, so no side effect or runtime error
+is lost.
+
+Constants declared with an ``int`` or ``bool`` literal value, possibly after
+folding, are substituted at their use sites. Names rebound anywhere in a
+top-level statement are left alone there.
+"""
+import operator
+from typing import Dict, Optional, Set, Tuple, Union
+
+from .ast_nodes import (BinaryExpression, ConstantDeclaration, FunctionDeclaration, Identifier,
+                        LambdaExpression, ListComprehension, Literal, Node, Parameter,
+                        TernaryExpression, TryCatchStatement, Type, UnaryExpression,
+                        VariableDeclaration)
+from .passes import Pass, NodeTransformer, walk
+
+INT_MIN = -2 ** 127
+INT_MAX = 2 ** 127 - 1
+UINT_MAX = 2 ** 128 - 1
+
+TRUE = Identifier.intern('true')
+FALSE = Identifier.intern('false')
+
+_UINT = Type('uint')
+
+
+def _divide(left, right):
+    quotient = abs(left) // abs(right)
+    return quotient if (left < 0) == (right < 0) else -quotient
+
+
+def _remainder(left, right):
+    return left - right * _divide(left, right)
+
+
+_ARITHMETIC = {
+    '+': operator.add, '-': operator.sub, '*': operator.mul, '/': _divide, '%': _remainder,
+    '&': operator.and_, '|': operator.or_, '^': operator.xor,
+    '<<': operator.lshift, '>>': operator.rshift,
+}
+_COMPARISONS = {
+    '==': operator.eq, '!=': operator.ne, '<': operator.lt,
+    '>': operator.gt, '<=': operator.le, '>=': operator.ge,
+}
+# Operand that leaves the other one unchanged, on either side or (for the
+# operators in _RIGHT_ONLY) on the right only.
+_IDENTITY = {'+': 0, '-': 0, '*': 1, '/': 1, '|': 0, '^': 0, '<<': 0, '>>': 0}
+_RIGHT_ONLY = frozenset(('-', '/', '<<', '>>'))
+
+
+def _int(node) -> Optional[int]:
+    if node.__class__ is Literal and node.value.__class__ is int:
+        return node.value
+    return None
+
+
+def _bool(node) -> Optional[bool]:
+    if node.__class__ is Identifier:
+        if node.name == 'true':
+            return True
+        if node.name == 'false':
+            return False
+    return None
+
+
+def _pure(node) -> bool:
+    """Whether evaluating ``node`` can neither fail nor have an effect."""
+    return node.__class__ is Identifier or node.__class__ is Literal
+
+
+def _constant(value: Union[int, bool]) -> Node:
+    if value is True or value is False:
+        return TRUE if value else FALSE
+    return Literal(value)
+
+
+def _scan(declaration) -> Tuple[Set[str], Set[str], Set[int]]:
+    """Names bound below ``declaration`` (parameters and locals), names
+    assigned to, and the ids of nodes inside ``uint`` declarations."""
+    bound, assigned, unsigned = set(), set(), set()
+    for node in walk(declaration):
+        cls = node.__class__
+        if cls is BinaryExpression:
+            if node.operator == '=' and node.left.__class__ is Identifier:
+                assigned.add(node.left.name)
+        elif cls is Parameter:
+            bound.add(str(node.name))
+        elif cls is VariableDeclaration or cls is ConstantDeclaration:
+            if node is not declaration:
+                bound.add(str(node.name))
+            if node.type is _UINT:
+                unsigned.update(id(child) for child in walk(node.value))
+        elif cls is ListComprehension:
+            bound.add(node.iterator.name)
+        elif cls is TryCatchStatement:
+            bound.add(str(node.error_var))
+        elif cls is FunctionDeclaration or cls is LambdaExpression:
+            bound.update(str(parameter.name) for parameter in node.parameters)
+    return bound, assigned, unsigned
+
+
+class _Folder(NodeTransformer):
+    def __init__(self, constants: Dict[str, Union[int, bool]], unsigned: Set[int]):
+        super().__init__()
+        self.constants = constants
+        # ids of nodes whose value must fit a uint.
+        self.unsigned = unsigned
+        self.changes = 0
+
+    def _fits(self, node, value) -> bool:
+        if id(node) in self.unsigned:
+            return 0 <= value <= UINT_MAX
+        return INT_MIN <= value <= INT_MAX
+
+    def visit_Identifier(self, node):
+        value = self.constants.get(node.name)
+        if value is None:
+            return node
+        self.changes += 1
+        return _constant(value)
+
+    def visit_BinaryExpression(self, node):
+        op, left, right = node.operator, node.left, node.right
+        result = self._fold_binary(node, op, left, right)
+        if result is None:
+            result = self._simplify_binary(op, left, right)
+        if result is None:
+            return node
+        self.changes += 1
+        return result
+
+    def _fold_binary(self, node, op, left, right):
+        left_int, right_int = _int(left), _int(right)
+        if left_int is not None and right_int is not None:
+            function = _ARITHMETIC.get(op)
+            if function is not None:
+                if op in ('/', '%') and right_int == 0:
+                    return None
+                if op in ('<<', '>>') and not 0 <= right_int < 128:
+                    return None
+                value = function(left_int, right_int)
+                return Literal(value) if self._fits(node, value) else None
+            function = _COMPARISONS.get(op)
+            return None if function is None else _constant(function(left_int, right_int))
+        if op == '==' or op == '!=':
+            for kind in (_bool, lambda n: n.value if n.__class__ is Literal
+                         and n.value.__class__ is str else None):
+                left_value, right_value = kind(left), kind(right)
+                if left_value is not None and right_value is not None:
+                    return _constant((left_value == right_value) == (op == '=='))
+        return None
+
+    def _simplify_binary(self, op, left, right):
+        if op == '&&' or op == '||':
+            # ``absorbing`` decides the result whatever the other operand is.
+            absorbing = op == '||'
+            left_bool, right_bool = _bool(left), _bool(right)
+            if left_bool is not None:
+                return _constant(absorbing) if left_bool is absorbing else right
+            if right_bool is not None:
+                if right_bool is not absorbing:
+                    return left
+                return _constant(absorbing) if _pure(left) else None
+            return None
+        identity = _IDENTITY.get(op)
+        if identity is not None:
+            if _int(right) == identity:
+                return left
+            if _int(left) == identity and op not in _RIGHT_ONLY:
+                return right
+        if op == '*':
+            if _int(right) == 0 and _pure(left) or _int(left) == 0 and _pure(right):
+                return Literal(0)
+        return None
+
+    def visit_UnaryExpression(self, node):
+        op, operand = node.operator, node.expression
+        value = _int(operand)
+        result = None
+        if value is not None:
+            if op == '-' and self._fits(node, -value):
+                result = Literal(-value)
+            elif op == '+':
+                result = operand
+            elif op == '~' and self._fits(node, ~value):
+                result = Literal(~value)
+        elif op == '!':
+            truth = _bool(operand)
+            if truth is not None:
+                result = _constant(not truth)
+            elif operand.__class__ is UnaryExpression and operand.operator == '!':
+                result = operand.expression
+        if result is None:
+            return node
+        self.changes += 1
+        return result
+
+    def visit_TernaryExpression(self, node):
+        condition = _bool(node.condition)
+        if condition is None:
+            return node
+        self.changes += 1
+        return node.true_expr if condition else node.false_expr
+
+
+class ConstantFolding(Pass):
+    """Folds constant expressions and propagates literal constants."""
+    name = 'fold-constants'
+    level = 1
+    preserves = frozenset(('declarations',))
+
+    def __init__(self):
+        self.changes = 0
+
+    def run(self, program, analyses):
+        self.changes = 0
+        declarations = [getattr(statement, 'declaration', statement)
+                        for statement in program.statements]
+        scans = [_scan(declaration) for declaration in declarations]
+        assigned = set().union(*(names for _, names, _ in scans))
+        constants: Dict[str, Union[int, bool]] = {}
+        # Constants first, in order, so later ones can use earlier values;
+        # then every other statement with all of them known.
+        for declaration, scan in zip(declarations, scans):
+            if declaration.__class__ is ConstantDeclaration:
+                self._fold(declaration, scan, constants)
+                value = _int(declaration.value)
+                if value is None:
+                    value = _bool(declaration.value)
+                name = str(declaration.name)
+                if value is not None and name not in assigned:
+                    constants[name] = value
+        for declaration, scan in zip(declarations, scans):
+            if declaration.__class__ is not ConstantDeclaration:
+                self._fold(declaration, scan, constants)
+        return self.changes > 0
+
+    def counters(self):
+        return {'changes': self.changes}
+
+    def _fold(self, declaration, scan, constants):
+        bound, _, unsigned = scan
+        if bound:
+            constants = {name: value for name, value in constants.items() if name not in bound}
+        folder = _Folder(constants, unsigned)
+        folder.visit(declaration)
+        self.changes += folder.changes
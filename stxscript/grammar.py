@@ -0,0 +1,139 @@
+import hashlib
+import io
+import os
+import sys
+import tempfile
+from typing import Any, Dict, Optional
+
+import lark
+from lark import Lark
+
+GRAMMAR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grammar.lark')
+
+PARSER_OPTIONS: Dict[str, Any] = {'start': 'program', 'parser': 'lalr'}
+
+# Options bound to live objects; they are supplied again when loading.
+_UNCACHED_OPTIONS = ('transformer', 'postlex', 'lexer_callbacks')
+
+# Cache files start with a digest of the saved tables.
+_DIGEST_SIZE = 16
+
+_grammar_source: Optional[str] = None
+_parsers: Dict[Any, Lark] = {}
+
+
+def load_grammar() -> str:
+    """Return the StxScript grammar, read once from the installed package."""
+    global _grammar_source
+    if _grammar_source is None:
+        with open(GRAMMAR_PATH, 'r') as grammar_file:
+            _grammar_source = grammar_file.read()
+    return _grammar_source
+
+
+def grammar_hash() -> str:
+    return hashlib.sha256(load_grammar().encode('utf-8')).hexdigest()
+
+
+def cache_dir() -> str:
+    """Directory holding on-disk parser tables.
+
+    ``STXSCRIPT_CACHE_DIR`` takes precedence, then ``$XDG_CACHE_HOME/stxscript``
+    and finally ``~/.cache/stxscript``.
+    """
+    override = os.environ.get('STXSCRIPT_CACHE_DIR')
+    if override:
+        return override
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'stxscript')
+
+
+def parser_cache_path(**options) -> str:
+    """Path of the serialized LALR tables for the current grammar and lark version."""
+    merged = dict(PARSER_OPTIONS, **options)
+    key = hashlib.sha256()
+    key.update(load_grammar().encode('utf-8'))
+    key.update(repr(sorted((k, repr(v)) for k, v in merged.items())).encode('utf-8'))
+    filename = 'parser-%s-lark%s-py%d%d.cache' % (
+        key.hexdigest()[:16], lark.__version__, *sys.version_info[:2])
+    return os.path.join(cache_dir(), filename)
+
+
+def build_parser(cache: bool = True, transformer=None, **options) -> Lark:
+    """Construct the StxScript LALR parser.
+
+    With ``cache`` enabled the analysed grammar tables are loaded from
+    :func:`parser_cache_path`, or built once and written there atomically so
+    that concurrent processes never observe a partially written file. A file
+    whose digest does not match its tables is rebuilt and overwritten.
+    ``transformer`` is not part of the cache key; lark rebinds it on load.
+    """
+    load_options = {} if transformer is None else {'transformer': transformer}
+    if cache:
+        path = parser_cache_path(**options)
+        tables = _read_tables(path)
+        if tables is not None:
+            if transformer is None:
+                return Lark.load(io.BytesIO(tables))
+            # Lark.load() takes no options. The private Lark._load() also
+            # rebinds a transformer; pyproject pins lark to the versions
+            # tested with it, and without it the parser is built below.
+            load = getattr(Lark, '_load', None)
+            if load is not None:
+                return load(Lark.__new__(Lark), io.BytesIO(tables), **load_options)
+
+    parser = Lark(load_grammar(), **dict(PARSER_OPTIONS, **options), **load_options)
+    if cache:
+        _save_parser(parser, path)
+    return parser
+
+
+def _digest(tables: bytes) -> bytes:
+    return hashlib.blake2b(tables, digest_size=_DIGEST_SIZE).digest()
+
+
+def _read_tables(path: str) -> Optional[bytes]:
+    """The parser tables saved at ``path``; None if missing, unreadable or damaged."""
+    try:
+        with open(path, 'rb') as cache_file:
+            data = cache_file.read()
+    except OSError:
+        return None
+    tables = data[_DIGEST_SIZE:]
+    if data[:_DIGEST_SIZE] != _digest(tables):
+        return None
+    return tables
+
+
+def _save_parser(parser: Lark, path: str) -> None:
+    buffer = io.BytesIO()
+    parser.save(buffer, _UNCACHED_OPTIONS)
+    tables = buffer.getvalue()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'wb') as cache_file:
+            cache_file.write(_digest(tables) + tables)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def get_parser(cache: bool = True, **options) -> Lark:
+    """Return a process-wide parser, building (or loading) it on first use."""
+    key = (cache, tuple(sorted(options.items())))
+    parser = _parsers.get(key)
+    if parser is None:
+        parser = _parsers[key] = build_parser(cache=cache, **options)
+    return parser
+
+
+def clear_parsers() -> None:
+    """Drop the in-process parsers so the next use is loaded afresh."""
+    _parsers.clear()
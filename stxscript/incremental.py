@@ -0,0 +1,70 @@
+import hashlib
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .memo import MEMO
+from .statements import split_statements
+from .transpiler import StxScriptTranspiler
+
+
+class IncrementalTranspiler:
+    """Re-transpiles only the top-level statements that changed.
+
+    The Clarity emitted for each statement is remembered under a hash of the
+    statement's source text and the maps declared above it, so after an edit
+    only the touched statements are parsed and generated again. Output is identical to
+    :meth:`StxScriptTranspiler.transpile`.
+
+    Optimisation passes work on the whole program, so a transpiler with
+    passes enabled always transpiles the full input. So does a source with
+    ``@memo`` functions, whose output depends on the declarations above them.
+    """
+
+    def __init__(self, transpiler: Optional[StxScriptTranspiler] = None):
+        self.transpiler = transpiler or StxScriptTranspiler()
+        # Output of a statement and the maps it declares.
+        self._statements: Dict[bytes, Tuple[Tuple[str, ...], FrozenSet[str]]] = {}
+        self.reused = 0
+        self.compiled = 0
+
+    def _compile_statement(self, text: str,
+                           maps: FrozenSet[str]) -> Tuple[Tuple[str, ...], FrozenSet[str]]:
+        program = self.transpiler.parse(text)
+        generator = self.transpiler.generator
+        generator.maps = set(maps)
+        generated = tuple(generator.generate(statement) for statement in program.statements)
+        return generated, frozenset(generator.maps) - maps
+
+    def transpile(self, input_code: str) -> str:
+        self.reused = self.compiled = 0
+        if self.transpiler.pass_manager.passes or MEMO in input_code:
+            self._statements = {}
+            return self.transpiler.transpile(input_code)
+        statements: Dict[bytes, Tuple[Tuple[str, ...], FrozenSet[str]]] = {}
+        output: List[str] = []
+        maps: FrozenSet[str] = frozenset()
+        try:
+            for start, end in split_statements(input_code):
+                text = input_code[start:end]
+                digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16)
+                # Map method calls are written differently once the map is declared.
+                digest.update(b'\0' + '\0'.join(sorted(maps)).encode('utf-8'))
+                key = digest.digest()
+                entry = self._statements.get(key)
+                if entry is None:
+                    entry = statements.get(key)
+                if entry is None:
+                    entry = self._compile_statement(text, maps)
+                    self.compiled += 1
+                else:
+                    self.reused += 1
+                statements[key] = entry
+                generated, declared = entry
+                output.extend(generated)
+                maps |= declared
+        except Exception:
+            # The statement split is heuristic; when a fragment does not
+            # parse on its own, let the full parser decide (and report).
+            return self.transpiler.transpile(input_code)
+        # Only statements of the latest version are kept.
+        self._statements = statements
+        return '\n'.join(output)
@@ -0,0 +1,216 @@
+"""Hand-written StxScript tokenizer for lark's LALR parser.
+
+:class:`StxScriptLexer` can replace lark's contextual lexer. It scans with
+one compiled master pattern. Keywords are found in a table and punctuation
+in per-character candidate lists. It reads the terminals the parser
+currently accepts, so it produces the same tokens as lark's lexer. Block
+comments are skipped with ``str.find``.
+
+There is one deliberate difference. Inside a type's angle brackets, ``>>``
+is split into two closing brackets, so ``list<list<uint>>`` parses. The
+default lexer emits a shift operator there and fails.
+
+Pass the class to the transpiler or parser builder to use it::
+
+    StxScriptTranspiler(lexer=StxScriptLexer)
+"""
+import re
+import string
+from typing import Dict, List, Tuple
+
+from lark import Token
+from lark.exceptions import UnexpectedCharacters
+from lark.lexer import Lexer
+
+_MASTER = re.compile(r'''
+    (?P<ws>[ \t\f\r\n]+)
+  | (?P<line_comment>//[^\n]*)
+  | (?P<block_comment>/\*)
+  | (?P<word>[a-zA-Z_][a-zA-Z0-9_]*)
+  | (?P<number>0x[0-9a-fA-F]+|0b[01]+|[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)
+  | (?P<string>"[^"]*"|'[^']*')
+''', re.VERBOSE)
+
+# Characters a run of list literals can begin with.
+_RUN_START = frozenset('0123456789"\'{')
+
+_WORD = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*\Z')
+_PRINCIPAL = re.compile(r"'[a-zA-Z0-9._-]+'\Z")
+
+# Regex terminals scanned directly; every other regex terminal is matched
+# as punctuation.
+_SCANNED = frozenset(('IDENTIFIER', 'NUMBER', 'STRING', 'PRINCIPAL', 'BOOLEAN', 'LITERAL_RUN'))
+
+
+def _lark_order(terminal):
+    # The order lark's scanner tries terminals in, so ties resolve alike.
+    return (-terminal.priority, -terminal.pattern.max_width,
+            -len(terminal.pattern.value), terminal.name)
+
+
+class StxScriptLexer(Lexer):
+    """Context-aware tokenizer driven by the LALR parser state."""
+
+    # Handed (lexer_state, parser_state) by lark and used as-is.
+    __future_interface__ = 2
+
+    def __init__(self, lexer_conf, comparator=None):
+        self.ignore = frozenset(lexer_conf.ignore)
+        self.terminals_by_name = lexer_conf.terminals_by_name
+        self.keywords: Dict[str, str] = {}
+        self.punctuation: Dict[str, List[Tuple[str, object]]] = {}
+        self.single: Dict[str, str] = {}
+        self.less_than = self.more_than = None
+
+        # Runs of list literals use the grammar's own pattern. They take
+        # precedence over a single number, string or tuple, as in lark.
+        literal_run = lexer_conf.terminals_by_name.get('LITERAL_RUN')
+        self.literal_run = None
+        if literal_run is not None:
+            self.literal_run = re.compile(
+                '(?P<literal_run>%s)' % literal_run.pattern.to_regexp()).match
+
+        terminals = sorted((t for t in lexer_conf.terminals if t.name not in self.ignore),
+                           key=_lark_order)
+        for terminal in terminals:
+            pattern = terminal.pattern
+            if pattern.type == 'str':
+                if _WORD.match(pattern.value):
+                    self.keywords[pattern.value] = terminal.name
+                    continue
+                first_chars = pattern.value[0]
+                matcher = pattern.value
+                if pattern.value == '<':
+                    self.less_than = terminal.name
+                elif pattern.value == '>':
+                    self.more_than = terminal.name
+            elif terminal.name in _SCANNED:
+                continue
+            else:
+                matcher = re.compile(pattern.to_regexp())
+                # Operators are at most two characters long.
+                first_chars = [c for c in string.punctuation
+                               if any(matcher.match(c + d) for d in string.punctuation + ' ')]
+            for char in first_chars:
+                self.punctuation.setdefault(char, []).append((terminal.name, matcher))
+
+        # Characters that can only ever start one single-character token.
+        self.single = {char: candidates[0][0] for char, candidates in self.punctuation.items()
+                       if len(candidates) == 1 and candidates[0][1] == char}
+
+    def _punctuation(self, text, pos, accepts, depth):
+        candidates = self.punctuation.get(text[pos], ())
+        if depth and accepts is not None and self.more_than in accepts and text[pos] == '>':
+            return self.more_than, '>'
+        fallback = None
+        for name, matcher in candidates:
+            if isinstance(matcher, str):
+                value = matcher if text.startswith(matcher, pos) else None
+            else:
+                match = matcher.match(text, pos)
+                value = match.group() if match else None
+            if value is None:
+                continue
+            if accepts is None or name in accepts:
+                return name, value
+            if fallback is None:
+                fallback = name, value
+        # Nothing fits the parser state: hand over what the whole grammar
+        # would lex here and let the parser report the unexpected token.
+        return fallback
+
+    def lex(self, lexer_state, parser_state):
+        text = lexer_state.text
+        end = len(text)
+        if not isinstance(text, str):
+            text, end = text.text, text.end
+        line_ctr = lexer_state.line_ctr
+        pos, line, line_start = line_ctr.char_pos, line_ctr.line, line_ctr.line_start_pos
+
+        states = parser_state.parse_conf.states if parser_state is not None else None
+        keywords, single = self.keywords, self.single
+        match_at, match_run = _MASTER.match, self.literal_run
+        depth = 0
+        accepts = None
+
+        while pos < end:
+            if states is not None:
+                accepts = states[parser_state.position]
+            match = None
+            if (match_run is not None and text[pos] in _RUN_START
+                    and (accepts is None or 'LITERAL_RUN' in accepts)):
+                match = match_run(text, pos, end)
+            if match is None:
+                match = match_at(text, pos, end)
+            kind = match.lastgroup if match is not None else None
+
+            if kind == 'ws' or kind == 'line_comment':
+                stop = match.end()
+                newline = text.rfind('\n', pos, stop)
+                if newline >= 0:
+                    line += text.count('\n', pos, stop)
+                    line_start = newline + 1
+                pos = stop
+                continue
+            if kind == 'block_comment':
+                stop = text.find('*/', pos + 2, end)
+                if stop >= 0:
+                    stop += 2
+                    newline = text.rfind('\n', pos, stop)
+                    if newline >= 0:
+                        line += text.count('\n', pos, stop)
+                        line_start = newline + 1
+                    pos = stop
+                    continue
+                kind = None  # unterminated: lexed as an operator, like lark
+
+            if kind == 'word':
+                value = match.group()
+                type_ = keywords.get(value)
+                if type_ is None or (accepts is not None and type_ not in accepts):
+                    type_ = 'IDENTIFIER'
+                    if (accepts is not None and value in ('true', 'false')
+                            and 'IDENTIFIER' not in accepts and 'BOOLEAN' in accepts):
+                        type_ = 'BOOLEAN'
+            elif kind == 'number':
+                type_, value = 'NUMBER', match.group()
+            elif kind == 'string':
+                type_, value = 'STRING', match.group()
+                if (accepts is not None and 'STRING' not in accepts
+                        and 'PRINCIPAL' in accepts and _PRINCIPAL.match(value)):
+                    type_ = 'PRINCIPAL'
+            elif kind == 'literal_run':
+                type_, value = 'LITERAL_RUN', match.group()
+            elif text[pos] in single:
+                value = text[pos]
+                type_ = single[value]
+            else:
+                found = self._punctuation(text, pos, accepts, depth)
+                if found is None:
+                    raise UnexpectedCharacters(
+                        text, pos, line, pos - line_start + 1,
+                        allowed=set(accepts or ()) & set(self.terminals_by_name),
+                        token_history=lexer_state.last_token and [lexer_state.last_token],
+                        state=parser_state, terminals_by_name=self.terminals_by_name)
+                type_, value = found
+                if type_ == self.less_than:
+                    depth += 1
+                elif type_ == self.more_than and depth:
+                    depth -= 1
+
+            column = pos - line_start + 1
+            stop = pos + len(value)
+            if (kind == 'string' or kind == 'literal_run') and '\n' in value:
+                end_line = line + value.count('\n')
+                end_line_start = text.rfind('\n', pos, stop) + 1
+                token = Token(type_, value, pos, line, column,
+                              end_line, stop - end_line_start + 1, stop)
+                line, line_start = end_line, end_line_start
+            else:
+                token = Token(type_, value, pos, line, column, line, column + len(value), stop)
+            pos = stop
+            lexer_state.last_token = token
+            yield token
+
+        line_ctr.char_pos, line_ctr.line = pos, line
+        line_ctr.line_start_pos, line_ctr.column = line_start, pos - line_start + 1
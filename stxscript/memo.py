@@ -0,0 +1,186 @@
+"""Lowering of ``@memo`` functions to a map-backed cache.
+
+A ``@memo`` function gets a generated ``define-map`` named after it, keyed
+by a tuple of its arguments and holding its return type. Its body becomes
+a lookup in that map. On a miss, the original body runs and its result is
+stored::
+
+    (match (map-get? price-memo (tuple (supply supply)))
+      memo-hit memo-hit
+      (let ((memo-value <body>))
+        (map-set price-memo (tuple (supply supply)) memo-value)
+        memo-value))
+
+A cached result is only correct if the function always returns the same
+value for the same arguments. A ``@memo`` function is rejected unless that
+can be proven: it may only use its parameters and locals, constants, and
+functions that are deterministic themselves. Constants and functions must
+be declared above the function. It may not read data variables or maps,
+call other contracts, or use assets. Storing the cache is a write, so a
+``@memo`` function cannot be ``@readable``, and neither can a function that
+calls one, directly or through other functions.
+
+Statements are lowered in source order, so a program can be lowered
+whole or one statement at a time with the same result.
+"""
+from typing import Dict, List, Optional, Set
+
+from .ast_nodes import (AssetCallExpression, Block, CallExpression, ConstantDeclaration,
+                        ContractCallExpression, FunctionDeclaration, Identifier, LambdaExpression,
+                        ListComprehension, MapDeclaration, MemoExpression, Parameter, Program,
+                        TryCatchStatement, TupleLiteral, TupleType, Type, VariableDeclaration)
+from .passes import walk
+
+MEMO = '@memo'
+
+# Names usable without a declaration: boolean literals, value constructors
+# and list functions, whose results depend only on their arguments.
+_BUILTINS = frozenset(('true', 'false', 'ok', 'err', 'some',
+                       'fold', 'map', 'filter', 'len', 'concat', 'append'))
+
+
+def _bound(function: FunctionDeclaration) -> Set[str]:
+    """Parameters and every name bound inside ``function``."""
+    bound = {str(parameter.name) for parameter in function.parameters}
+    for node in walk(function.body):
+        cls = node.__class__
+        if cls is VariableDeclaration or cls is ConstantDeclaration or cls is Parameter:
+            bound.add(str(node.name))
+        elif cls is ListComprehension:
+            bound.add(node.iterator.name)
+        elif cls is TryCatchStatement:
+            bound.add(str(node.error_var))
+        elif cls is LambdaExpression:
+            bound.update(str(parameter.name) for parameter in node.parameters)
+    return bound
+
+
+class MemoLowering:
+    """Lowers the ``@memo`` functions among statements given in source order."""
+
+    def __init__(self):
+        # Top-level declarations seen so far, by name.
+        self.declarations: Dict[str, object] = {}
+        # Function name -> why it may not be deterministic (None if it is).
+        self._reasons: Dict[str, Optional[str]] = {}
+        # Maps generated for @memo functions; calling one only fills its cache.
+        self._caches: Set[str] = set()
+        # Function name -> functions that use the name.
+        self._callers: Dict[str, Set[str]] = {}
+        # Functions that store a @memo result, themselves or through a call.
+        self._writers: Set[str] = set()
+        # Functions whose calls are recorded only once a @memo function shows up.
+        self._unscanned: List[FunctionDeclaration] = []
+
+    def lower(self, statements: List) -> List:
+        """The statements with every ``@memo`` function expanded."""
+        lowered = []
+        for statement in statements:
+            declaration = getattr(statement, 'declaration', statement)
+            if declaration.__class__ is FunctionDeclaration and MEMO in declaration.decorators:
+                lowered.append(self._memoize(declaration))
+            lowered.append(statement)
+            name = getattr(declaration, 'name', None)
+            if name is not None:
+                self.declarations[str(name)] = declaration
+            if declaration.__class__ is FunctionDeclaration:
+                self._unscanned.append(declaration)
+                if self._writers or MEMO in declaration.decorators:
+                    for function in self._unscanned:
+                        self._record_calls(function)
+                    self._unscanned.clear()
+        return lowered
+
+    def _record_calls(self, function: FunctionDeclaration) -> None:
+        name = str(function.name)
+        bound = _bound(function)
+        for node in walk(function.body):
+            if node.__class__ is Identifier and node.name not in bound:
+                self._callers.setdefault(node.name, set()).add(name)
+                if node.name in self._writers:
+                    self._mark_writer(name, node.name)
+        if MEMO in function.decorators:
+            self._mark_writer(name, None)
+
+    def _mark_writer(self, name: str, callee: Optional[str]) -> None:
+        """Record that ``name`` writes through ``callee``, as do its callers."""
+        pending = [(name, callee)]
+        while pending:
+            name, callee = pending.pop()
+            if name in self._writers:
+                continue
+            decorators = getattr(self.declarations.get(name), 'decorators', ())
+            if callee is not None and '@readable' in decorators:
+                raise SyntaxError(f"@readable function {name} calls {callee}, "
+                                  f"which stores a @memo result")
+            self._writers.add(name)
+            pending.extend((caller, name) for caller in self._callers.get(name, ()))
+
+    def _memoize(self, function: FunctionDeclaration) -> MapDeclaration:
+        name = str(function.name)
+        if '@readable' in function.decorators:
+            raise SyntaxError(f"@memo function {name} cannot be @readable: "
+                              f"storing its cache is a write")
+        if function.return_type is None:
+            raise SyntaxError(f"@memo function {name} needs a return type")
+        reason = self._nondeterminism(function)
+        if reason is not None:
+            raise SyntaxError(f"@memo function {name} is not provably deterministic: {reason}")
+        if function.parameters:
+            key_type = TupleType({str(p.name): p.type for p in function.parameters})
+            key = TupleLiteral({str(p.name): Identifier(str(p.name)) for p in function.parameters})
+        else:
+            key_type, key = Type('bool'), Identifier('true')
+        cache = f'{name}-memo'
+        self._caches.add(cache)
+        function.body = Block([MemoExpression(Identifier(cache), key, function.body)])
+        return MapDeclaration(cache, key_type, function.return_type)
+
+    def _nondeterminism(self, function: FunctionDeclaration) -> Optional[str]:
+        name = str(function.name)
+        if name in self._reasons:
+            return self._reasons[name]
+        # Functions calling each other are judged by the rest of their bodies.
+        self._reasons[name] = None
+        reason = self._reasons[name] = self._check(function)
+        return reason
+
+    def _check(self, function: FunctionDeclaration) -> Optional[str]:
+        bound = _bound(function)
+        for node in walk(function.body):
+            cls = node.__class__
+            if cls is ContractCallExpression:
+                return "it calls another contract"
+            if cls is AssetCallExpression:
+                return f"it uses asset {node.asset}"
+            if cls is CallExpression and node.callee.__class__ is not Identifier:
+                table = getattr(node.callee, 'object', None)
+                if table.__class__ is Identifier \
+                        and self.declarations.get(table.name).__class__ is MapDeclaration:
+                    return f"it uses map {table.name}"
+                return "it calls a method"
+            if cls is not Identifier or node.name in bound or node.name in _BUILTINS \
+                    or node.name in self._caches:
+                continue
+            declaration = self.declarations.get(node.name)
+            kind = declaration.__class__
+            if kind is ConstantDeclaration:
+                continue
+            if kind is FunctionDeclaration:
+                reason = self._nondeterminism(declaration)
+                if reason is None:
+                    continue
+                return f"it calls {node.name}, and {reason}"
+            if kind is VariableDeclaration:
+                return f"it reads data variable {node.name}"
+            if kind is MapDeclaration:
+                return f"it reads map {node.name}"
+            return (f"it uses {node.name}, which is not a parameter, local, "
+                    f"or constant or function declared above")
+        return None
+
+
+def lower_memo(program: Program) -> Program:
+    """Expand the ``@memo`` functions of a whole program in place."""
+    program.statements = MemoLowering().lower(program.statements)
+    return program
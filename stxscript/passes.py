@@ -0,0 +1,249 @@
+"""AST optimisation passes run between the transformer and the generator.
+
+A :class:`PassManager` runs a pipeline of :class:`Pass` objects over the
+:class:`Program`. Which passes run depends on the optimisation level
+(``-O0`` to ``-O2``) and on passes enabled or disabled by name. The time
+each pass takes is recorded in :attr:`PassManager.timings`, and what it did
+(such as the bytes it saved) in :attr:`PassManager.counters`.
+
+Passes read analyses (facts about the whole program, such as its top-level
+declarations) through an :class:`Analyses` cache. A pass that changed the
+tree declares in ``preserves`` which analyses are still valid. Only the
+others are recomputed, and only when a later pass asks for them.
+
+:class:`NodeTransformer` is the base for passes that rewrite nodes. It
+walks the tree with an explicit stack. The fields that can hold child nodes
+are looked up once per node class, not for every node.
+"""
+import dataclasses
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .ast_nodes import Identifier, Node, Program, Type
+
+MAX_LEVEL = 2
+
+# Fields with these annotations hold names or shared, immutable types and
+# are never descended into.
+_LEAF_ANNOTATIONS = (str, List[str], Type, Optional[Type])
+
+_child_fields: Dict[type, Tuple[str, ...]] = {}
+
+
+def child_fields(cls: type) -> Tuple[str, ...]:
+    """Names of the fields of ``cls`` that can hold child nodes."""
+    fields = _child_fields.get(cls)
+    if fields is None:
+        if not isinstance(cls, type) or not issubclass(cls, Node) or issubclass(cls, (Type, Identifier)):
+            fields = ()
+        else:
+            fields = tuple(field.name for field in dataclasses.fields(cls)
+                           if field.type not in _LEAF_ANNOTATIONS)
+        _child_fields[cls] = fields
+    return fields
+
+
+def walk(root) -> Iterator[Node]:
+    """Yield every node below ``root`` (inclusive) in pre-order."""
+    stack = [root]
+    pop, push, extend = stack.pop, stack.append, stack.extend
+    cached = _child_fields
+    while stack:
+        value = pop()
+        cls = value.__class__
+        fields = cached.get(cls)
+        if fields is None:
+            if cls is list:
+                extend(reversed(value))
+                continue
+            if cls is dict:
+                extend(reversed(list(value.values())))
+                continue
+            fields = child_fields(cls)
+        if fields:
+            yield value
+            for name in reversed(fields):
+                push(getattr(value, name))
+        elif isinstance(value, Node):
+            yield value
+
+
+class NodeTransformer:
+    """Rewrites a tree bottom-up through ``visit_<NodeClass>`` methods.
+
+    Each handler receives a node whose children have already been visited
+    and returns the node to put in its place, which may be the node itself.
+    A class without a handler uses the one of its nearest base class, if
+    any. Children are visited left to right.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[type, Optional[Callable]] = {}
+
+    def _handler(self, cls):
+        try:
+            return self._handlers[cls]
+        except KeyError:
+            handler = None
+            for klass in cls.__mro__:
+                handler = getattr(self, 'visit_' + klass.__name__, None)
+                if handler is not None:
+                    break
+            self._handlers[cls] = handler
+            return handler
+
+    def visit(self, root):
+        """Rewrite the tree below ``root`` and return the new root."""
+        holder = [root]
+        stack = [(holder, 0, root, None)]
+        pop, push = stack.pop, stack.append
+        handlers, handler_for = self._handlers, self._handler
+        while stack:
+            parent, key, value, handler = pop()
+            if handler is not None:
+                new = handler(value)
+                if new is not value:
+                    if isinstance(parent, Node):
+                        setattr(parent, key, new)
+                    else:
+                        parent[key] = new
+                continue
+            cls = value.__class__
+            if cls is list:
+                for index in range(len(value) - 1, -1, -1):
+                    push((value, index, value[index], None))
+                continue
+            if cls is dict:
+                for item_key, item in reversed(list(value.items())):
+                    push((value, item_key, item, None))
+                continue
+            fields = _child_fields.get(cls)
+            if fields is None:
+                fields = child_fields(cls)
+            handler = handlers[cls] if cls in handlers else handler_for(cls)
+            if handler is not None:
+                push((parent, key, value, handler))
+            for name in reversed(fields):
+                push((value, name, getattr(value, name), None))
+        return holder[0]
+
+
+# Analyses by name: functions computing a fact about the whole program.
+ANALYSES: Dict[str, Callable[[Program], object]] = {}
+
+
+def analysis(name: str):
+    """Register the decorated function as the analysis called ``name``."""
+    def register(function):
+        ANALYSES[name] = function
+        return function
+    return register
+
+
+@analysis('declarations')
+def declarations(program: Program) -> Dict[str, Node]:
+    """Top-level declarations by name; exported ones are unwrapped."""
+    found = {}
+    for statement in program.statements:
+        declaration = getattr(statement, 'declaration', statement)
+        name = getattr(declaration, 'name', None)
+        if name is not None:
+            found[str(name)] = declaration
+    return found
+
+
+# ``preserves`` value of a pass that keeps every analysis valid.
+ALL = 'all'
+
+
+class Analyses:
+    """Analysis results for one program, computed on first use."""
+
+    def __init__(self, program: Program):
+        self.program = program
+        self._results: Dict[str, object] = {}
+
+    def __getitem__(self, name: str):
+        try:
+            return self._results[name]
+        except KeyError:
+            result = self._results[name] = ANALYSES[name](self.program)
+            return result
+
+    def invalidate(self, preserved: Union[str, FrozenSet[str]] = frozenset()) -> None:
+        """Forget every result not named in ``preserved`` (or ``ALL``)."""
+        if preserved is ALL:
+            return
+        for name in list(self._results):
+            if name not in preserved:
+                del self._results[name]
+
+
+class Pass:
+    """One optimisation over a :class:`Program`.
+
+    ``level`` is the lowest optimisation level that runs the pass.
+    ``preserves`` names the analyses that stay valid when the pass changes
+    the program, or is :data:`ALL`.
+    """
+    name = ''
+    level = 1
+    preserves: Union[str, FrozenSet[str]] = frozenset()
+
+    def run(self, program: Program, analyses: Analyses) -> bool:
+        """Optimise ``program`` in place; return whether anything changed."""
+        raise NotImplementedError
+
+    def counters(self) -> Dict[str, int]:
+        """What the last run did, for reports such as ``--stats``."""
+        return {}
+
+
+def default_pipeline() -> List[type]:
+    """Pass classes in the order they run."""
+    from .cse import CommonSubexpressionElimination
+    from .deadcode import DeadCodeElimination
+    from .folding import ConstantFolding
+    return [ConstantFolding, DeadCodeElimination, CommonSubexpressionElimination]
+
+
+class PassManager:
+    """Runs the passes selected by ``level``, ``enable`` and ``disable``.
+
+    ``enable`` adds passes above ``level`` and ``disable`` removes passes,
+    both by name. Unknown names and levels raise ``ValueError``.
+    """
+
+    def __init__(self, level: int = 0, enable: Iterable[str] = (), disable: Iterable[str] = (),
+                 pipeline: Optional[List[type]] = None):
+        if not 0 <= level <= MAX_LEVEL:
+            raise ValueError(f"optimisation level must be between 0 and {MAX_LEVEL}, not {level}")
+        pipeline = default_pipeline() if pipeline is None else pipeline
+        enable, disable = set(enable), set(disable)
+        unknown = (enable | disable) - {cls.name for cls in pipeline}
+        if unknown:
+            raise ValueError(f"unknown pass: {', '.join(sorted(unknown))}")
+        self.level = level
+        self.passes = [cls() for cls in pipeline
+                       if (cls.level <= level or cls.name in enable) and cls.name not in disable]
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def variant(self) -> str:
+        """Identifies the pipeline in transpile cache keys."""
+        if not self.passes:
+            return ''
+        return f"O{self.level}:" + ','.join(p.name for p in self.passes)
+
+    def run(self, program: Program) -> Program:
+        analyses = Analyses(program)
+        timings = self.timings = {}
+        counters = self.counters = {}
+        for optimisation in self.passes:
+            start = time.perf_counter()
+            changed = optimisation.run(program, analyses)
+            timings[optimisation.name] = time.perf_counter() - start
+            counters[optimisation.name] = optimisation.counters()
+            if changed:
+                analyses.invalidate(optimisation.preserves)
+        return program
@@ -0,0 +1,259 @@
+"""Compact binary serialization of StxScript ASTs.
+
+:func:`dump_ast` encodes a tree of :mod:`ast_nodes` objects and
+:func:`load_ast` rebuilds it, so tools can share one parse. The format is::
+
+    b'STXA'  version byte  8-byte schema digest
+    varint string count, then each string as a varint length and UTF-8
+    the root value in pre-order: a tag byte followed by its payload
+
+Every string is stored once in the table and referenced by index. Each
+node class has its own tag, followed by its fields in constructor order.
+Lists and dicts carry a varint length. The schema digest covers the node
+class names and fields. Data written by a different node schema is
+rejected, not misread. Identifiers and types are interned again on load.
+Parse-tree leftovers the transformer keeps as lark ``Tree`` values (such
+as ``optional_literal``) are stored too, and tokens keep their type; older
+lark versions name such trees with a ``RULE`` token.
+Encoding and decoding use explicit stacks, so nesting depth is not
+limited by the recursion limit.
+"""
+import dataclasses
+import hashlib
+import inspect
+import operator
+import struct
+import sys
+from typing import Any
+
+from lark import Token, Tree
+
+from . import ast_nodes
+from .ast_nodes import Identifier, Node, Type
+
+MAGIC = b'STXA'
+FORMAT_VERSION = 1
+
+(_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _LIST, _DICT, _TUPLE, _IDENTIFIER,
+ _TREE, _TOKEN) = range(12)
+_NODE_BASE = 16
+
+# Node classes in definition order; a class's tag is _NODE_BASE + index.
+_NODE_CLASSES = tuple(obj for obj in vars(ast_nodes).values()
+                      if isinstance(obj, type) and issubclass(obj, Node)
+                      and obj is not Identifier and obj.__module__ == ast_nodes.__name__)
+
+
+def _constructor_fields(cls):
+    """Names of the values that rebuild a ``cls`` instance, in order."""
+    if issubclass(cls, Type):
+        # Types are hash-consed through their constructor arguments.
+        return tuple(inspect.signature(cls._setup).parameters)[1:]
+    return tuple(field.name for field in dataclasses.fields(cls) if field.init)
+
+
+def _values_getter(cls, names):
+    if issubclass(cls, Type):
+        return cls._args
+    if len(names) == 1:
+        getter = operator.attrgetter(names[0])
+        return lambda node: (getter(node),)
+    return operator.attrgetter(*names) if names else lambda node: ()
+
+
+_FIELDS = {cls: _constructor_fields(cls) for cls in _NODE_CLASSES}
+_GETTERS = {cls: _values_getter(cls, names) for cls, names in _FIELDS.items()}
+_TAGS = {cls: _NODE_BASE + index for index, cls in enumerate(_NODE_CLASSES)}
+_SCHEMA = hashlib.sha256(';'.join(
+    f"{cls.__name__}({','.join(_FIELDS[cls])})" for cls in _NODE_CLASSES
+).encode('utf-8')).digest()[:8]
+_HEADER = MAGIC + bytes([FORMAT_VERSION]) + _SCHEMA
+
+_DOUBLE = struct.Struct('<d')
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def dump_ast(node: Any) -> bytes:
+    """Serialize ``node`` (usually a :class:`Program`) to bytes."""
+    strings = {}
+    body = bytearray()
+    append, tags, getters = body.append, _TAGS, _GETTERS
+    stack = [node]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        value = pop()
+        cls = value.__class__
+        tag = tags.get(cls)
+        if tag is not None:
+            append(tag)
+            extend(reversed(getters[cls](value)))
+        elif cls is Token:
+            append(_TOKEN)
+            extend((str(value), value.type))
+        elif cls is Identifier or isinstance(value, str):
+            text = value.name if cls is Identifier else str(value)
+            index = strings.get(text)
+            if index is None:
+                index = strings[text] = len(strings)
+            append(_IDENTIFIER if cls is Identifier else _STR)
+            _write_varint(body, index)
+        elif value is None:
+            append(_NONE)
+        elif cls is bool:
+            append(_TRUE if value else _FALSE)
+        elif cls is int:
+            append(_INT)
+            _write_varint(body, value << 1 if value >= 0 else (-value << 1) - 1)
+        elif cls is float:
+            append(_FLOAT)
+            body += _DOUBLE.pack(value)
+        elif cls is list or cls is tuple:
+            append(_LIST if cls is list else _TUPLE)
+            _write_varint(body, len(value))
+            extend(reversed(value))
+        elif cls is Tree:
+            append(_TREE)
+            extend((value.children, value.data))
+        elif cls is dict:
+            append(_DICT)
+            _write_varint(body, len(value))
+            for key, item in reversed(list(value.items())):
+                extend((item, key))
+        else:
+            raise TypeError(f"cannot serialize {cls.__name__} in an AST")
+
+    out = bytearray(_HEADER)
+    _write_varint(out, len(strings))
+    for text in strings:
+        encoded = text.encode('utf-8')
+        _write_varint(out, len(encoded))
+        out += encoded
+    out += body
+    return bytes(out)
+
+
+def _list(items):
+    return items
+
+
+def _dict(items):
+    return dict(zip(items[::2], items[1::2]))
+
+
+def _tree(items):
+    return Tree(*items)
+
+
+def _token(items):
+    return Token(*items)
+
+
+def _node_builder(cls):
+    return lambda items: cls(*items)
+
+
+_BUILDERS = {tag: (_node_builder(cls), len(_FIELDS[cls])) for cls, tag in _TAGS.items()}
+
+
+def load_ast(data: bytes) -> Any:
+    """Rebuild the AST serialized in ``data`` by :func:`dump_ast`.
+
+    Raises ``ValueError`` for data that is not a serialized AST, that was
+    written by another format version or node schema, or that is corrupt.
+    """
+    data = bytes(data)
+    if data[:4] != MAGIC or len(data) < len(_HEADER):
+        raise ValueError("not a serialized StxScript AST")
+    if data[4] != FORMAT_VERSION:
+        raise ValueError(f"unsupported AST format version {data[4]}")
+    if data[5:13] != _SCHEMA:
+        raise ValueError("AST was serialized with a different node schema")
+    try:
+        return _decode(data)
+    except ValueError:
+        raise
+    except Exception as e:
+        # Damaged data fails wherever decoding happens to stop: an index
+        # past the end, an unknown tag, or a node built from the wrong values.
+        raise ValueError(f"corrupt AST data: {e!r}") from None
+
+
+def _decode(data: bytes) -> Any:
+    count, pos = _read_varint(data, len(_HEADER))
+    strings = []
+    for _ in range(count):
+        length, pos = _read_varint(data, pos)
+        strings.append(sys.intern(data[pos:pos + length].decode('utf-8')))
+        pos += length
+
+    builders, intern = _BUILDERS, Identifier.intern
+    frames = []
+    while True:
+        tag = data[pos]
+        pos += 1
+        if tag >= _NODE_BASE:
+            build, arity = builders[tag]
+            if arity:
+                frames.append((build, arity, []))
+                continue
+            value = build(())
+        elif tag == _STR or tag == _IDENTIFIER:
+            index = data[pos]
+            pos += 1
+            if index >= 0x80:
+                index, pos = _read_varint(data, pos - 1)
+            value = strings[index] if tag == _STR else intern(strings[index])
+        elif tag == _NONE:
+            value = None
+        elif tag == _LIST or tag == _TUPLE or tag == _DICT:
+            length, pos = _read_varint(data, pos)
+            build = _list if tag == _LIST else tuple if tag == _TUPLE else _dict
+            if length:
+                frames.append((build, 2 * length if tag == _DICT else length, []))
+                continue
+            value = build([])
+        elif tag == _INT:
+            value, pos = _read_varint(data, pos)
+            value = value >> 1 if not value & 1 else -((value + 1) >> 1)
+        elif tag == _FLOAT:
+            value, = _DOUBLE.unpack_from(data, pos)
+            pos += 8
+        elif tag == _TRUE or tag == _FALSE:
+            value = tag == _TRUE
+        elif tag == _TREE:
+            frames.append((_tree, 2, []))
+            continue
+        elif tag == _TOKEN:
+            frames.append((_token, 2, []))
+            continue
+        else:
+            raise ValueError(f"corrupt AST data: unknown tag {tag} at offset {pos - 1}")
+
+        while frames:
+            build, arity, items = frames[-1]
+            items.append(value)
+            if len(items) < arity:
+                break
+            frames.pop()
+            value = build(items)
+        else:
+            if pos != len(data):
+                raise ValueError("corrupt AST data: trailing bytes")
+            return value
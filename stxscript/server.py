@@ -0,0 +1,282 @@
+import errno
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .transpiler import StxScriptTranspiler
+
+# JSON-RPC 2.0 error codes; the last two follow the Language Server Protocol.
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+TRANSPILE_ERROR = -32000
+SERVER_BUSY = -32001
+REQUEST_CANCELLED = -32800
+
+QUEUED_METHODS = ('transpile', 'check', 'batch')
+
+
+def default_socket_path() -> str:
+    path = os.environ.get('STXSCRIPT_SOCKET')
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f'stxscript-{os.getuid()}.sock')
+
+
+class RequestError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class _Job:
+    __slots__ = ('key', 'id', 'method', 'params', 'respond', 'cancelled')
+
+    def __init__(self, key, request_id, method, params, respond):
+        self.key = key
+        self.id = request_id
+        self.method = method
+        self.params = params
+        self.respond = respond
+        self.cancelled = False
+
+
+class TranspileServer:
+    """Serves transpile requests from one warm :class:`StxScriptTranspiler`.
+
+    Requests are JSON-RPC 2.0 messages. ``transpile``, ``check`` and
+    ``batch`` go through a bounded queue drained by a single worker thread;
+    when the queue is full the request is rejected with ``SERVER_BUSY``.
+    ``cancel`` and ``stats`` are answered immediately.
+    """
+
+    def __init__(self, transpiler: Optional[StxScriptTranspiler] = None, max_queue: int = 64):
+        self.transpiler = transpiler or StxScriptTranspiler()
+        self._queue: 'queue.Queue[Optional[_Job]]' = queue.Queue(max_queue)
+        self._jobs: Dict[Tuple[Any, Any], _Job] = {}
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._work, name='stxscript-worker', daemon=True)
+        self.started = time.time()
+        self.counters = {'requests': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'rejected': 0}
+
+    def start(self) -> None:
+        self.transpiler.parser  # load the parser before the first request arrives
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Finish queued work, then stop the worker."""
+        if self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.counters)
+        stats.update(queued=self._queue.qsize(), max_queue=self._queue.maxsize,
+                     uptime=time.time() - self.started)
+        cache = self.transpiler.cache
+        if cache is not None:
+            stats['cache'] = cache.stats()
+        return stats
+
+    def handle(self, line: str, respond: Callable[[Dict[str, Any]], None], connection: Any = None) -> None:
+        """Dispatch one JSON-RPC message; ``respond`` may be called from another thread."""
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            respond(_error(None, PARSE_ERROR, str(e)))
+            return
+        request_id = message.get('id') if isinstance(message, dict) else None
+        method = message.get('method') if isinstance(message, dict) else None
+        params = message.get('params', {}) if isinstance(message, dict) else None
+        if not isinstance(method, str) or not isinstance(params, dict):
+            respond(_error(request_id, INVALID_REQUEST, 'expected a JSON-RPC request object'))
+            return
+        with self._lock:
+            self.counters['requests'] += 1
+
+        if method == 'stats':
+            respond(_result(request_id, self.stats()))
+        elif method == 'cancel':
+            respond(_result(request_id, {'cancelled': self.cancel(connection, params.get('id'))}))
+        elif method in QUEUED_METHODS:
+            job = _Job((connection, request_id), request_id, method, params, respond)
+            with self._lock:
+                try:
+                    self._queue.put_nowait(job)
+                except queue.Full:
+                    self.counters['rejected'] += 1
+                    respond(_error(request_id, SERVER_BUSY, 'request queue is full'))
+                    return
+                if request_id is not None:
+                    self._jobs[job.key] = job
+        else:
+            respond(_error(request_id, METHOD_NOT_FOUND, f'unknown method: {method}'))
+
+    def cancel(self, connection: Any, request_id: Any) -> bool:
+        with self._lock:
+            job = self._jobs.get((connection, request_id))
+            if job is None:
+                return False
+            job.cancelled = True
+            return True
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                response = self._run(job)
+            finally:
+                with self._lock:
+                    self._jobs.pop(job.key, None)
+            if job.id is not None:
+                job.respond(response)
+
+    def _run(self, job: _Job) -> Dict[str, Any]:
+        try:
+            if job.cancelled:
+                raise RequestError(REQUEST_CANCELLED, 'request cancelled')
+            result = getattr(self, '_' + job.method)(job)
+        except RequestError as e:
+            counter = 'cancelled' if e.code == REQUEST_CANCELLED else 'failed'
+            with self._lock:
+                self.counters[counter] += 1
+            return _error(job.id, e.code, str(e))
+        except Exception as e:
+            # Anything else is a bug for this request only; the worker keeps serving.
+            with self._lock:
+                self.counters['failed'] += 1
+            return _error(job.id, INTERNAL_ERROR, f'{type(e).__name__}: {e}')
+        with self._lock:
+            self.counters['completed'] += 1
+        return _result(job.id, result)
+
+    def _source(self, job: _Job) -> str:
+        source = job.params.get('source')
+        if not isinstance(source, str):
+            raise RequestError(INVALID_PARAMS, "'source' must be a string")
+        return source
+
+    def _transpile(self, job: _Job) -> Dict[str, Any]:
+        try:
+            return {'clarity': self.transpiler.transpile(self._source(job))}
+        except SyntaxError as e:
+            raise RequestError(TRANSPILE_ERROR, str(e))
+
+    def _check(self, job: _Job) -> Dict[str, Any]:
+        source = self._source(job)
+        try:
+            # Lowering rejects some programs that parse, e.g. invalid @memo use.
+            self.transpiler.lower(self.transpiler.parse(source))
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+        return {'ok': True, 'error': None}
+
+    def _batch(self, job: _Job) -> Dict[str, Any]:
+        sources = job.params.get('sources')
+        if not isinstance(sources, list) or not all(isinstance(s, str) for s in sources):
+            raise RequestError(INVALID_PARAMS, "'sources' must be a list of strings")
+        results = []
+        for source in sources:
+            if job.cancelled:
+                raise RequestError(REQUEST_CANCELLED, 'request cancelled')
+            try:
+                results.append({'clarity': self.transpiler.transpile(source)})
+            except SyntaxError as e:
+                results.append({'error': str(e)})
+            except Exception as e:
+                results.append({'error': f'{type(e).__name__}: {e}'})
+        return {'results': results}
+
+
+def _result(request_id, result) -> Dict[str, Any]:
+    return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+
+def _error(request_id, code, message) -> Dict[str, Any]:
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+def _line_writer(stream, lock: threading.Lock, encode: bool) -> Callable[[Dict[str, Any]], None]:
+    def respond(response):
+        data = json.dumps(response) + '\n'
+        with lock:
+            try:
+                stream.write(data.encode('utf-8') if encode else data)
+                stream.flush()
+            except (OSError, ValueError):
+                pass  # the client went away
+    return respond
+
+
+def serve_stdio(server: TranspileServer, stdin=None, stdout=None) -> None:
+    """Serve newline-delimited JSON-RPC on stdin/stdout until EOF."""
+    stdin = stdin or sys.stdin
+    respond = _line_writer(stdout or sys.stdout, threading.Lock(), encode=False)
+    server.start()
+    try:
+        for line in stdin:
+            if line.strip():
+                server.handle(line, respond)
+    finally:
+        server.stop()
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        respond = _line_writer(self.wfile, threading.Lock(), encode=True)
+        for line in self.rfile:
+            if line.strip():
+                self.server.transpile_server.handle(line.decode('utf-8'), respond, connection=self)
+
+
+def _claim_socket_path(path: str) -> None:
+    """Remove a stale socket at ``path``; fail if a daemon still answers there."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except FileNotFoundError:
+        return
+    except ConnectionRefusedError:
+        os.unlink(path)  # stale socket from a previous run
+        return
+    finally:
+        probe.close()
+    raise OSError(errno.EADDRINUSE, f'stxscript daemon already running on {path}')
+
+
+class UnixSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, transpile_server: TranspileServer):
+        _claim_socket_path(path)
+        self.transpile_server = transpile_server
+        super().__init__(path, _ConnectionHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def serve_unix(server: TranspileServer, path: Optional[str] = None) -> None:
+    """Serve newline-delimited JSON-RPC on a Unix domain socket until interrupted."""
+    unix_server = UnixSocketServer(path or default_socket_path(), server)
+    server.start()
+    try:
+        unix_server.serve_forever()
+    finally:
+        unix_server.server_close()
+        server.stop()
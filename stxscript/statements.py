@@ -0,0 +1,93 @@
+"""Top-level statement boundaries of StxScript source, found without parsing."""
+import re
+from typing import Iterator, Tuple, Union
+
+_TOKEN_PATTERN = r'''
+    (?P<skip>\s+|//[^\n]*|/\*.*?\*/|"[^"]*"|'[^']*')
+  | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<open>[(\[{])
+  | (?P<close>[)\]}])
+  | (?P<semi>;)
+  | (?P<other>.)
+'''
+
+# Inside brackets only nesting matters, so everything else is skipped in runs.
+_NESTED_TOKEN_PATTERN = r'''
+    (?P<open>[(\[{])
+  | (?P<close>[)\]}])
+  | (?P<skip>[^"'/(){}\[\]]+|//[^\n]*|/\*.*?\*/|"[^"]*"|'[^']*'|.)
+'''
+
+# Patterns for str sources, and for bytes-like sources such as mmap objects.
+_TOKEN = re.compile(_TOKEN_PATTERN, re.S | re.X)
+_NESTED_TOKEN = re.compile(_NESTED_TOKEN_PATTERN, re.S | re.X)
+_BYTES_TOKEN = re.compile(_TOKEN_PATTERN.encode('ascii'), re.S | re.X)
+_BYTES_NESTED_TOKEN = re.compile(_NESTED_TOKEN_PATTERN.encode('ascii'), re.S | re.X)
+
+# Statements that end with a block rather than a semicolon.
+_BLOCK_HEADS = frozenset(['function', 'if', 'try', 'trait', 'class'])
+# Keywords that continue a block statement after its closing brace.
+_CONTINUATIONS = frozenset(['else', 'catch'])
+# Tokens after which a top-level '{' opens a type or literal, not a body.
+_VALUE_PREFIXES = frozenset([':', '<', ',', '=', '(', '[', '?', 'return', 'throw'])
+
+
+def split_statements(source: Union[str, bytes]) -> Iterator[Tuple[int, int]]:
+    """Yield ``(start, end)`` offsets of the top-level statements in ``source``.
+
+    This is a lightweight bracket-matching scan, not a parse: it understands
+    strings, principals and comments, and relies on the parser to reject
+    malformed input. ``source`` may also be UTF-8 encoded bytes or any
+    buffer ``re`` can scan, such as an ``mmap``; offsets are then in bytes.
+    """
+    if isinstance(source, str):
+        token, nested_token, decode = _TOKEN, _NESTED_TOKEN, None
+    else:
+        token, nested_token, decode = _BYTES_TOKEN, _BYTES_NESTED_TOKEN, bytes.decode
+    start = None
+    head = None
+    depth = 0
+    prev = None
+    after_at = False
+    body_brace = False
+    pending_end = None
+    pos = 0
+    length = len(source)
+    while pos < length:
+        match = (nested_token if depth else token).match(source, pos)
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == 'skip':
+            continue
+        text = match.group()
+        if decode is not None:
+            text = decode(text, 'latin-1')
+        if pending_end is not None:
+            if kind == 'word' and text in _CONTINUATIONS:
+                pending_end = None
+            else:
+                yield start, pending_end
+                start, head, prev, pending_end = None, None, None, None
+        if start is None:
+            start = match.start()
+
+        if kind == 'word':
+            if head is None and depth == 0 and not after_at and text != 'export':
+                head = text
+        elif kind == 'open':
+            if depth == 0 and text == '{':
+                body_brace = prev is not None and prev not in _VALUE_PREFIXES
+            depth += 1
+        elif kind == 'close':
+            depth = max(depth - 1, 0)
+            if depth == 0 and text == '}' and body_brace and head in _BLOCK_HEADS:
+                pending_end = match.end()
+        elif kind == 'semi' and depth == 0:
+            yield start, match.end()
+            start, head, prev = None, None, None
+            after_at = False
+            continue
+        after_at = text == '@'
+        prev = text
+    if start is not None:
+        yield start, pending_end if pending_end is not None else len(source)
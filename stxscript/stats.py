@@ -0,0 +1,85 @@
+import json
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict
+
+from .ast_nodes import Node, iter_fields
+
+PHASES = ('grammar_load', 'lex', 'parse', 'transform', 'generate')
+
+
+@dataclass
+class TranspileStats:
+    """Where a single transpile spent its time and memory.
+
+    Times are wall-clock seconds per phase. ``parse`` includes lark's own
+    lexing; ``lex`` is a separate tokenizing pass used to count tokens. In
+    fused mode the AST is built during ``parse`` and ``transform`` is zero.
+    With optimisation passes enabled there is also an ``optimize`` phase,
+    broken down by pass in ``pass_times``, with each pass's own counters in
+    ``pass_counters``.
+    ``peak_memory`` (bytes per phase) is only filled when memory tracing was
+    requested.
+    """
+    times: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+    peak_memory: Dict[str, int] = field(default_factory=dict)
+    pass_times: Dict[str, float] = field(default_factory=dict)
+    pass_counters: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    token_count: int = 0
+    node_counts: Dict[str, int] = field(default_factory=dict)
+    output_bytes: int = 0
+    trace_memory: bool = False
+
+    @property
+    def total(self) -> float:
+        return sum(self.times.values())
+
+    @property
+    def node_count(self) -> int:
+        return sum(self.node_counts.values())
+
+    @contextmanager
+    def phase(self, name: str):
+        trace = self.trace_memory and not tracemalloc.is_tracing()
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+            if trace:
+                self.peak_memory[name] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data['trace_memory']
+        if not self.trace_memory:
+            del data['peak_memory']
+        data['total'] = self.total
+        data['node_count'] = self.node_count
+        return data
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+def count_nodes(root) -> Dict[str, int]:
+    """Number of AST nodes below ``root`` (inclusive), by class name."""
+    counts: Counter = Counter()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Node):
+            counts[type(node).__name__] += 1
+            stack.extend(value for _, value in iter_fields(node))
+        elif isinstance(node, (list, tuple)):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            stack.extend(node.keys())
+            stack.extend(node.values())
+    return dict(counts)
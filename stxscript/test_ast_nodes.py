@@ -0,0 +1,100 @@
+import copy
+import gc
+import pickle
+import unittest
+
+from .ast_nodes import (BinaryExpression, Identifier, ListComprehension, ListType, Literal,
+                        OptionalType, Parameter, ResponseType, TupleType, Type, iter_fields)
+from .transpiler import StxScriptTranspiler
+
+
+class TestSlottedNodes(unittest.TestCase):
+    def test_nodes_have_no_instance_dict(self):
+        nodes = [
+            Identifier('a'),
+            Literal(1),
+            BinaryExpression(Identifier('a'), '+', Literal(1)),
+            ListType(Type('uint')),
+            ResponseType(Type('bool'), Type('uint')),
+            ListComprehension(Identifier('x'), Identifier('xs'), Identifier('x')),
+        ]
+        for node in nodes:
+            with self.subTest(node=type(node).__name__):
+                self.assertFalse(hasattr(node, '__dict__'))
+
+    def test_dataclass_behaviour_is_kept(self):
+        node = Parameter('a', Type('uint'))
+        self.assertEqual(node, Parameter('a', Type('uint')))
+        self.assertEqual(repr(node), "Parameter(name='a', type=Type(name='uint'))")
+        self.assertIsNone(ListComprehension(Literal(1), Identifier('xs'), Identifier('x')).condition)
+        with self.assertRaises(AttributeError):
+            node.extra = 1
+
+    def test_iter_fields_includes_inherited_slots(self):
+        node = ListType(Type('uint'))
+        self.assertEqual(node.name, 'List<uint>')
+        self.assertEqual([name for name, _ in iter_fields(node)], ['name', 'element_type'])
+        self.assertEqual(dict(iter_fields(Identifier('a'))), {'name': 'a'})
+
+    def test_copy_and_pickle(self):
+        node = BinaryExpression(Identifier('a'), '+', ListType(Type('int')))
+        for clone in (copy.deepcopy(node), pickle.loads(pickle.dumps(node))):
+            self.assertEqual(repr(clone), repr(node))
+
+
+class TestInterning(unittest.TestCase):
+    def test_primitive_types_are_shared(self):
+        self.assertIs(Type.named('uint'), Type('uint'))
+        self.assertIs(Type('string'), Type('string'))
+
+    def test_parsed_identifiers_and_types_are_shared(self):
+        source = "function f(a: uint, b: uint): uint { return a; }"
+        for fused in (False, True):
+            with self.subTest(fused=fused):
+                function = StxScriptTranspiler(fused=fused).parse(source).statements[0]
+                first, second = function.parameters
+                self.assertIs(first.type, second.type)
+                self.assertIs(function.return_type, Type.named('uint'))
+                returned = function.body.statements[0].expression
+                self.assertIs(returned, first.name)
+                self.assertIs(returned, Identifier.intern('a'))
+
+
+class TestHashConsedTypes(unittest.TestCase):
+    def test_structurally_equal_types_are_identical(self):
+        def build():
+            balance = ResponseType(Type('uint'), Type('uint'))
+            return ListType(TupleType({'a': balance, 'b': OptionalType(Type('principal'))}))
+        self.assertIs(build(), build())
+        self.assertEqual(build(), build())
+        self.assertNotEqual(ListType(Type('uint')), ListType(Type('int')))
+        self.assertIsNot(TupleType({'a': Type('int'), 'b': Type('int')}),
+                         TupleType({'b': Type('int'), 'a': Type('int')}))
+        self.assertEqual(len({ListType(Type('uint')), ListType(Type('uint'))}), 1)
+
+    def test_names_are_built_lazily(self):
+        response = ResponseType(Type('lazy-ok'), Type('lazy-err'))
+        tuple_type = TupleType({'a': response})
+        self.assertNotIn('name', dict(iter_fields(response)))
+        self.assertEqual(tuple_type.name, 'Tuple<a: Response<lazy-ok, lazy-err>>')
+        self.assertEqual(dict(iter_fields(response))['name'], 'Response<lazy-ok, lazy-err>')
+        self.assertEqual(OptionalType(Type('uint')).name, 'Optional<uint>')
+
+    def test_unused_types_are_released(self):
+        key = repr(object())
+        self.assertIsNot(Type(key), None)
+        gc.collect()
+        from .ast_nodes import _types
+        self.assertNotIn((Type, key), _types)
+
+    def test_parsed_composite_types(self):
+        source = "function f(a: list<int>, b: Response<int, uint>, c: optional<bool>, d: {x: uint}): int { return a; }"
+        expected = ("(define-private (f (a (list int)) (b (response int uint)) (c (optional bool))"
+                    " (d (tuple (x uint))))\n  a)")
+        for fused in (False, True):
+            with self.subTest(fused=fused):
+                self.assertEqual(StxScriptTranspiler(fused=fused).transpile(source), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
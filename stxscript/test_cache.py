@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from . import cache as cache_module
+from .cache import TranspileCache
+from .transpiler import StxScriptTranspiler
+
+
+class TestTranspileCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = TranspileCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_and_miss_counters(self):
+        self.assertIsNone(self.cache.get('let x: int = 5;'))
+        self.cache.put('let x: int = 5;', '(define-data-var x int 5)')
+        self.assertEqual(self.cache.get('let x: int = 5;'), '(define-data-var x int 5)')
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'ast_hits': 0, 'ast_misses': 0})
+        # ASTs are counted on their own.
+        self.assertIsNone(self.cache.get_ast('let y: int = 6;'))
+        self.cache.put_ast('let y: int = 6;', StxScriptTranspiler().parse('let y: int = 6;'))
+        self.assertIsNotNone(self.cache.get_ast('let y: int = 6;'))
+        self.assertIsNone(self.cache.get_ast('let y: int = 7;'))
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'ast_hits': 1, 'ast_misses': 2})
+
+    def test_key_includes_fingerprint(self):
+        key = self.cache.key('let x: int = 5;')
+        with mock.patch.object(cache_module, '_fingerprint', 'other-version'):
+            self.assertNotEqual(self.cache.key('let x: int = 5;'), key)
+        self.assertNotEqual(self.cache.key('let x: int = 5;', variant='O2'), key)
+
+    def test_fingerprint_covers_passes_and_lowering(self):
+        from . import memo
+        from .passes import default_pipeline
+        modules = [memo] + [sys.modules[cls.__module__] for cls in default_pipeline()]
+        for module in modules:
+            with self.subTest(module=module.__name__):
+                self.assertIn(os.path.basename(module.__file__), cache_module._GENERATOR_MODULES)
+
+    def test_writes_leave_no_temporary_files(self):
+        self.cache.put('const A: int = 1;', '(define-constant A 1)')
+        files = [name for _, _, names in os.walk(self.tmp.name) for name in names]
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].endswith('.clar'))
+
+    def test_evicts_least_recently_used(self):
+        cache = TranspileCache(self.tmp.name, max_bytes=350)
+        for i in range(3):
+            cache.put(f'source {i}', 'x' * 100)
+            path = cache._path(cache.key(f'source {i}'))
+            os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+        cache.get('source 0')  # touch the oldest entry
+        cache.put('source 3', 'x' * 100)
+        self.assertLessEqual(cache.size(), 350)
+        self.assertIsNotNone(cache.get('source 0'))
+        self.assertIsNone(cache.get('source 1'))
+
+    def test_transpiler_skips_parsing_on_hit(self):
+        source = 'const PI: int = 314;'
+        StxScriptTranspiler(cache=self.cache).transpile(source)
+        transpiler = StxScriptTranspiler(cache=self.cache)
+        self.assertEqual(transpiler.transpile(source), '(define-constant PI 314)')
+        self.assertIsNone(transpiler._parser)
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'ast_hits': 0, 'ast_misses': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from .build import find_sources, output_path
+from .cli import main
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, 'contracts')
+        self.out = os.path.join(self.tmp.name, 'out')
+        self._write('token.stx', 'const SUPPLY: int = 100;')
+        self._write('nested/pool.stx', 'let x: int = 5;')
+        self._write('nested/broken.stx', 'function broken( {')
+        self._write('.hidden/skip.stx', 'let y: int = 1;')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, relative, text):
+        path = os.path.join(self.src, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as source_file:
+            source_file.write(text)
+
+    def _run(self, *argv):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            status = main(list(argv))
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_find_sources_and_output_path(self):
+        sources = [os.path.relpath(s, self.src) for s in find_sources(self.src)]
+        self.assertEqual(sources, ['token.stx', os.path.join('nested', 'broken.stx'),
+                                   os.path.join('nested', 'pool.stx')])
+        self.assertEqual(output_path(os.path.join(self.src, 'nested', 'pool.stx'), self.src, self.out),
+                         os.path.join(self.out, 'nested', 'pool.clar'))
+
+    def _check_build(self, jobs):
+        status, _, stderr = self._run('build', self.src, '-o', self.out, '-j', jobs)
+        self.assertEqual(status, 1)
+        self.assertIn('nested/broken.stx', stderr)
+        with open(os.path.join(self.out, 'token.clar')) as output_file:
+            self.assertEqual(output_file.read(), '(define-constant SUPPLY 100)')
+        with open(os.path.join(self.out, 'nested', 'pool.clar')) as output_file:
+            self.assertEqual(output_file.read(), '(define-data-var x int 5)')
+        self.assertFalse(os.path.exists(os.path.join(self.out, 'nested', 'broken.clar')))
+
+    def test_build_in_process(self):
+        self._check_build('1')
+
+    def test_build_with_process_pool(self):
+        self._check_build('2')
+
+    def test_compile_shorthand(self):
+        output = os.path.join(self.tmp.name, 'token.clar')
+        status, _, _ = self._run(os.path.join(self.src, 'token.stx'), output)
+        self.assertEqual(status, 0)
+        with open(output) as output_file:
+            self.assertEqual(output_file.read(), '(define-constant SUPPLY 100)')
+
+    def test_compile_rejects_unknown_pass(self):
+        with self.assertRaises(SystemExit):
+            self._run('compile', os.path.join(self.src, 'token.stx'), '-O', '2', '--disable-pass', 'nope')
+
+    def test_compile_missing_input(self):
+        missing = os.path.join(self.src, 'missing.stx')
+        status, stdout, stderr = self._run('compile', missing)
+        self.assertEqual(status, 1)
+        self.assertEqual(stdout, '')
+        self.assertTrue(stderr.startswith(f'{missing}: '))
+        self.assertIn('No such file', stderr)
+
+    def test_compile_stats(self):
+        status, stdout, stderr = self._run('compile', os.path.join(self.src, 'token.stx'), '--stats')
+        self.assertEqual(status, 0)
+        self.assertEqual(stdout.strip(), '(define-constant SUPPLY 100)')
+        stats = json.loads(stderr)
+        self.assertEqual(set(stats['times']), {'grammar_load', 'lex', 'parse', 'transform', 'generate'})
+        self.assertEqual(stats['output_bytes'], len('(define-constant SUPPLY 100)'))
+        self.assertNotIn('peak_memory', stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+from .cse import CommonSubexpressionElimination
+from .passes import PassManager
+from .transpiler import StxScriptTranspiler
+
+MAP = """@map({ key: principal, value: int })
+const balances = new Map<principal, int>();
+"""
+
+
+def eliminated(body, params='who: principal, a: int, b: int'):
+    source = f"{MAP}@public\nfunction run({params}): int {{ {body} }}"
+    manager = PassManager(0, enable=[CommonSubexpressionElimination.name])
+    output = StxScriptTranspiler(pass_manager=manager).transpile(source)
+    function = output.split('(define-public ', 1)[1]
+    return function, manager.counters[CommonSubexpressionElimination.name]
+
+
+class TestCommonSubexpressionElimination(unittest.TestCase):
+    def test_binds_repeated_map_read(self):
+        function, counters = eliminated(
+            "let x = balances.get(who); return balances.get(who) + x;")
+        self.assertEqual(function.count('map-get?'), 1)
+        self.assertIn('(let ((cse-1 (map-get? balances who)))\n', function)
+        self.assertIn('(+ cse-1 x)', function)
+        self.assertEqual(counters, {'bindings': 1, 'replaced': 2, 'map_reads': 1})
+
+    def test_binds_largest_expression(self):
+        function, counters = eliminated("let x = (a + b) * 2; return (a + b) * 2;")
+        self.assertIn('(let ((cse-1 (* (+ a b) 2)))', function)
+        self.assertEqual(counters['bindings'], 1)
+
+    def test_write_to_map_ends_binding(self):
+        function, counters = eliminated(
+            "let x = balances.get(who); balances.set(who, 1); return balances.get(who);")
+        self.assertEqual(function.count('map-get?'), 2)
+        self.assertEqual(counters['bindings'], 0)
+
+    def test_write_to_other_map_keeps_binding(self):
+        source = MAP.replace('balances', 'other') + MAP + (
+            "@public\nfunction run(who: principal): int { let x = balances.get(who); "
+            "other.set(who, 1); return balances.get(who); }")
+        manager = PassManager(0, enable=[CommonSubexpressionElimination.name])
+        output = StxScriptTranspiler(pass_manager=manager).transpile(source)
+        self.assertEqual(output.count('map-get?'), 1)
+
+    def test_call_ends_map_binding_only(self):
+        function, counters = eliminated(
+            "let x = balances.get(who) + a * b; touch(); return balances.get(who) + a * b;")
+        self.assertEqual(function.count('map-get?'), 2)
+        self.assertIn('(cse-1 (* a b))', function)
+
+    def test_assignment_ends_binding(self):
+        function, counters = eliminated("let x = a * b; a = 2; return a * b;")
+        self.assertEqual(counters['bindings'], 0)
+
+    def test_write_before_first_use_in_statement(self):
+        function, counters = eliminated(
+            "return balances.set(who, 1) && balances.get(who) == balances.get(who);")
+        self.assertEqual(counters['bindings'], 0)
+
+    def test_conditional_uses(self):
+        # Only in branches: binding them would read on paths that did not.
+        function, counters = eliminated("return a > 0 ? balances.get(who) : balances.get(who);")
+        self.assertEqual(counters['bindings'], 0)
+        # After an unconditional read, the branch reuses its binding.
+        function, counters = eliminated(
+            "let x = balances.get(who); if (x > 0) { return balances.get(who); } return x;")
+        self.assertEqual(function.count('map-get?'), 1)
+
+    def test_binds_within_nested_block(self):
+        function, counters = eliminated(
+            "if (a > 0) { let x = a * b; return a * b + x; } return 0;")
+        self.assertIn('(let ((cse-1 (* a b)))', function)
+        self.assertEqual(counters['bindings'], 1)
+
+    def test_lambda_is_left_alone(self):
+        function, counters = eliminated(
+            "let x = a * b; let f = (a: int) => a * b; return a * b;")
+        self.assertEqual(function.count('(* a b)'), 2)
+        self.assertEqual(counters['replaced'], 2)
+
+    def test_method_of_undeclared_map_is_a_call(self):
+        source = ("@public\nfunction run(who: principal): int { return balances.get(who); }\n"
+                  + MAP)
+        output = StxScriptTranspiler().transpile(source)
+        self.assertNotIn('map-get?', output)
+        self.assertIn('((get get balances) who)', output)
+
+    def test_runs_at_o2_only(self):
+        self.assertNotIn(CommonSubexpressionElimination.name,
+                         [p.name for p in PassManager(1).passes])
+        self.assertIn(CommonSubexpressionElimination.name, [p.name for p in PassManager(2).passes])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from .deadcode import DeadCodeElimination
+from .passes import PassManager
+from .transpiler import StxScriptTranspiler
+
+SOURCE = """const LIMIT: int = 5;
+const SEED: int = seed();
+const UNUSED: int = 7;
+@map({ key: principal, value: uint })
+const balances = new Map<principal, uint>();
+@map({ key: principal, value: uint })
+const stale = new Map<principal, uint>();
+trait Hooked { hook(a: int): bool; }
+function hook(a: int): bool { return true; }
+function seed(): int { return 1; }
+function helper(): int { return LIMIT; }
+function unused(): int { return helper(); }
+function cycle(): int { return unused(); }
+export function shared(): int { return 2; }
+@readable
+function peek(x: int): int { balances.get(x); return helper(); }
+@public
+function run(x: int): int {
+  if (x > 0) { return 1; x = 2; } else { throw err(1); x = 3; }
+  return 3;
+  x = 4;
+}
+"""
+
+
+def eliminated(source, **options):
+    manager = PassManager(0, enable=[DeadCodeElimination.name], **options)
+    before = StxScriptTranspiler().transpile(source)
+    after = StxScriptTranspiler(pass_manager=manager).transpile(source)
+    return before, after, manager.counters[DeadCodeElimination.name]
+
+
+class TestDeadCodeElimination(unittest.TestCase):
+    def test_removes_unreachable_definitions(self):
+        _, after, counters = eliminated(SOURCE)
+        names = [line.split()[1].strip('(') for line in after.splitlines()
+                 if line.startswith('(define-')]
+        self.assertEqual(names, ['LIMIT', 'SEED', 'balances', 'Hooked', 'hook', 'seed', 'helper',
+                                 'shared', 'peek', 'run'])
+        self.assertEqual((counters['functions'], counters['constants'], counters['maps']), (2, 1, 1))
+
+    def test_removes_statements_after_return_and_throw(self):
+        _, after, counters = eliminated(SOURCE)
+        self.assertEqual(after.split('(define-public (run (x int))\n', 1)[1],
+                         "  (if (> x 0)\n      1\n      (error (err 1)))\n  3)")
+        self.assertEqual(counters['statements'], 3)
+
+    def test_reports_bytes_saved(self):
+        before, after, counters = eliminated(SOURCE)
+        self.assertEqual(counters['bytes_saved'], len(before) - len(after))
+
+    def test_nothing_to_remove(self):
+        source = "@public\nfunction run(): int { return helper(); }\nfunction helper(): int { return 1; }"
+        before, after, counters = eliminated(source)
+        self.assertEqual(after, before)
+        self.assertEqual(counters['bytes_saved'], 0)
+
+    def test_runs_after_folding(self):
+        source = "const A: int = 2;\n@public\nfunction run(): int { return A * 3; }"
+        self.assertEqual(StxScriptTranspiler(opt_level=1).transpile(source),
+                         "(define-public (run )\n  6)")
+
+
+class TestDecorators(unittest.TestCase):
+    def test_visibility(self):
+        source = ("@public\nfunction a(): int { return 1; }\n"
+                  "@readable\nfunction b(): int { return 1; }\n"
+                  "@private\nfunction c(): int { return 1; }\n"
+                  "function d(): int { return 1; }")
+        for fused in (False, True):
+            with self.subTest(fused=fused):
+                lines = StxScriptTranspiler(fused=fused).transpile(source).splitlines()[::2]
+                self.assertEqual(lines, ['(define-public (a )', '(define-read-only (b )',
+                                         '(define-private (c )', '(define-private (d )'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+
+from .folding import INT_MAX, ConstantFolding
+from .passes import PassManager
+from .transpiler import StxScriptTranspiler
+
+
+def folded(source):
+    manager = PassManager(0, enable=[ConstantFolding.name])
+    return StxScriptTranspiler(pass_manager=manager).transpile(source)
+
+
+def value_of(expression, type_='int'):
+    return folded(f"let x: {type_} = {expression};")[len(f'(define-data-var x {type_} '):-1]
+
+
+class TestConstantFolding(unittest.TestCase):
+    def test_arithmetic_follows_clarity_int(self):
+        cases = {
+            '2 + 3 * 4': '14',
+            '7 / 2': '3',
+            '-7 / 2': '-3',
+            '7 / -2': '-3',
+            '-7 % 3': '-1',
+            '7 % -3': '1',
+            '(1 << 4) | 3 ^ 1': '18',
+            '~5 & 0xff': '250',
+            '-(-5)': '5',
+        }
+        for expression, expected in cases.items():
+            with self.subTest(expression=expression):
+                self.assertEqual(value_of(expression), expected)
+
+    def test_failing_operations_are_kept(self):
+        cases = {
+            f'{INT_MAX} + 1': f'(+ {INT_MAX} 1)',
+            f'-{INT_MAX} - 2': f'(- -{INT_MAX} 2)',
+            '5 / 0': '(/ 5 0)',
+            '5 % (2 - 2)': '(% 5 0)',
+            '1 << 200': '(<< 1 200)',
+        }
+        for expression, expected in cases.items():
+            with self.subTest(expression=expression):
+                self.assertEqual(value_of(expression), expected)
+
+    def test_uint_declarations_stay_non_negative(self):
+        self.assertEqual(value_of('1 - 2', 'uint'), '(- 1 2)')
+        self.assertEqual(value_of('2 - 1', 'uint'), '1')
+        self.assertEqual(value_of('1 - 2'), '-1')
+
+    def test_comparisons_and_booleans(self):
+        cases = {
+            '3 < 4': 'true',
+            '3 >= 4': 'false',
+            'true && !false': 'true',
+            'false || 1 == 1': 'true',
+            '"a" != "b"': 'true',
+            'false && f()': 'false',
+            'true || f()': 'true',
+            'f() && true': '(f )',
+            'f() && false': '(&& (f ) false)',
+            'a || true': 'true',
+            '!!a': 'a',
+            '1 > 0 ? a : b': 'a',
+        }
+        for expression, expected in cases.items():
+            with self.subTest(expression=expression):
+                self.assertEqual(value_of(expression, 'bool'), expected)
+
+    def test_identities(self):
+        cases = {
+            'a + 0': 'a', '0 + a': 'a', 'a - 0': 'a', '0 - a': '(- 0 a)',
+            'a * 1': 'a', '1 * a': 'a', 'a / 1': 'a', '1 / a': '(/ 1 a)',
+            'a * 0': '0', 'f() * 0': '(* (f ) 0)', 'a << 0': 'a', '0 << a': '(<< 0 a)',
+            '(a + 0) * (2 - 1)': 'a',
+        }
+        for expression, expected in cases.items():
+            with self.subTest(expression=expression):
+                self.assertEqual(value_of(expression), expected)
+
+    def test_propagates_literal_constants(self):
+        source = ("const PRICE: int = 25;\n"
+                  "const SCALE: int = 1000000;\n"
+                  "export const TOTAL: int = PRICE * SCALE;\n"
+                  "const ON: bool = TOTAL > 0;\n"
+                  "const NAME: string = \"token\";\n"
+                  "let cost: int = ON ? TOTAL + fee : NAME;")
+        self.assertEqual(folded(source),
+                         "(define-constant PRICE 25)\n"
+                         "(define-constant SCALE 1000000)\n"
+                         "(define-constant TOTAL 25000000)\n"
+                         "(define-constant ON true)\n"
+                         "(define-constant NAME \"token\")\n"
+                         "(define-data-var cost int (+ 25000000 fee))")
+
+    def test_rebound_and_assigned_names_are_not_replaced(self):
+        source = ("const A: int = 1;\nconst B: int = 2;\n"
+                  "function f(A: int): int { B = 3; return A + B; }\n"
+                  "let c: int = A + B;")
+        self.assertEqual(folded(source).splitlines()[-2:],
+                         ["  (+ A B))", "(define-data-var c int (+ 1 B))"])
+
+    def test_level_and_disable(self):
+        source = "let x: int = 1 + 2;"
+        self.assertEqual(StxScriptTranspiler().transpile(source), "(define-data-var x int (+ 1 2))")
+        transpiler = StxScriptTranspiler(pass_manager=PassManager(2, disable=[ConstantFolding.name]))
+        self.assertEqual(transpiler.transpile(source), "(define-data-var x int (+ 1 2))")
+
+    def test_deep_nesting(self):
+        source = "let x: int = " + " + ".join(['1'] * 20000) + ";"
+        self.assertEqual(folded(source), "(define-data-var x int 20000)")
+
+
+if __name__ == '__main__':
+    unittest.main()
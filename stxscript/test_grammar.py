@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lark import Tree
+
+from . import grammar
+from .ast_nodes import Program
+from .transpiler import StxScriptTranspiler
+
+
+class TestParserCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(os.environ, {'STXSCRIPT_CACHE_DIR': self.tmp.name})
+        self.env.start()
+        grammar.clear_parsers()
+
+    def tearDown(self):
+        grammar.clear_parsers()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_grammar_found_outside_repo_root(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            self.assertIn('program: statement*', grammar.load_grammar())
+            transpiler = StxScriptTranspiler()
+            self.assertEqual(transpiler.transpile('const PI: int = 314;'), '(define-constant PI 314)')
+        finally:
+            os.chdir(cwd)
+
+    def test_parser_is_built_lazily(self):
+        transpiler = StxScriptTranspiler()
+        self.assertIsNone(transpiler._parser)
+        self.assertFalse(os.path.exists(grammar.parser_cache_path()))
+        transpiler.parser
+        self.assertTrue(os.path.exists(grammar.parser_cache_path()))
+
+    def test_cached_tables_are_reused(self):
+        first = grammar.build_parser()
+        path = grammar.parser_cache_path()
+        mtime = os.path.getmtime(path)
+        second = grammar.build_parser()
+        self.assertEqual(os.path.getmtime(path), mtime)
+        source = 'let x: int = 5;'
+        self.assertEqual(first.parse(source), second.parse(source))
+        self.assertEqual(os.listdir(self.tmp.name), [os.path.basename(path)])
+
+    def test_damaged_tables_are_rebuilt(self):
+        grammar.build_parser()
+        path = grammar.parser_cache_path()
+        with open(path, 'rb') as cache_file:
+            data = cache_file.read()
+        for damaged in (data[:len(data) // 2], data[:-1] + bytes([data[-1] ^ 1]), b'junk'):
+            with self.subTest(size=len(damaged)):
+                with open(path, 'wb') as cache_file:
+                    cache_file.write(damaged)
+                self.assertIsInstance(grammar.build_parser().parse('let x: int = 5;'), Tree)
+                self.assertIsNotNone(grammar._read_tables(path))
+
+    def test_cache_key_tracks_lark_version(self):
+        path = grammar.parser_cache_path()
+        with mock.patch.object(grammar.lark, '__version__', '0.0.0'):
+            self.assertNotEqual(grammar.parser_cache_path(), path)
+
+    def test_cached_tables_do_not_carry_transformer(self):
+        StxScriptTranspiler(fused=True).parser
+        self.assertIsInstance(grammar.build_parser().parse('let x: int = 5;'), Tree)
+
+    def test_fused_parser_loads_cached_tables(self):
+        grammar.build_parser()
+        with mock.patch.object(grammar.Lark, '__init__', side_effect=AssertionError('rebuilt')):
+            parser = StxScriptTranspiler(fused=True).parser
+        self.assertIsInstance(parser.parse('let x: int = 5;'), Program)
+
+    def test_fused_parser_without_private_load(self):
+        grammar.build_parser()
+        load = grammar.Lark._load
+        del grammar.Lark._load
+        try:
+            parser = StxScriptTranspiler(fused=True).parser
+        finally:
+            grammar.Lark._load = load
+        self.assertIsInstance(parser.parse('let x: int = 5;'), Program)
+        self.assertIsInstance(grammar.build_parser().parse('let x: int = 5;'), Tree)
+
+    def test_transpilers_share_one_parser(self):
+        self.assertIs(StxScriptTranspiler().parser, StxScriptTranspiler().parser)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+from .incremental import IncrementalTranspiler, split_statements
+from .transpiler import StxScriptTranspiler
+
+CONTRACT = """
+// balances per owner
+@map({ key: principal, value: uint })
+const balances = new Map<principal, uint>();
+
+const LIMIT: uint = 100;
+
+function pick(a: int, b: int): Response<{value: int, flag: bool}, string> {
+    if (a > b) {
+        return a;
+    } else if (b > a) {
+        return b;
+    } else {
+        return 0;
+    }
+}
+
+function safe(a: int): int {
+    try {
+        return a;
+    } catch (error) {
+        return 0;
+    }
+}
+
+/* trailing; comment { */
+let greeting = "a ; b }";
+"""
+
+
+class TestSplitStatements(unittest.TestCase):
+    def test_top_level_statements(self):
+        heads = [CONTRACT[start:end].split()[0] for start, end in split_statements(CONTRACT)]
+        self.assertEqual(heads, ['@map({', 'const', 'function', 'function', 'let'])
+
+    def test_block_statements_keep_else_and_catch(self):
+        statements = [CONTRACT[start:end] for start, end in split_statements(CONTRACT)]
+        self.assertTrue(statements[2].rstrip().endswith('}'))
+        self.assertIn('else {', statements[2])
+        self.assertIn('catch (error)', statements[3])
+
+
+class TestIncrementalTranspiler(unittest.TestCase):
+    def setUp(self):
+        self.transpiler = StxScriptTranspiler()
+        self.incremental = IncrementalTranspiler(self.transpiler)
+
+    def test_output_matches_full_transpile(self):
+        self.assertEqual(self.incremental.transpile(CONTRACT), self.transpiler.transpile(CONTRACT))
+
+    def test_only_changed_statements_are_recompiled(self):
+        self.incremental.transpile(CONTRACT)
+        self.assertEqual((self.incremental.compiled, self.incremental.reused), (5, 0))
+        edited = CONTRACT.replace('return a;\n    } catch', 'return a + 1;\n    } catch')
+        self.assertEqual(self.incremental.transpile(edited), self.transpiler.transpile(edited))
+        self.assertEqual((self.incremental.compiled, self.incremental.reused), (1, 4))
+
+    def test_statements_after_new_map_are_recompiled(self):
+        source = 'function peek(who: principal): uint { return balances.get(who); }\n'
+        declaration = CONTRACT.split('const LIMIT')[0]
+        self.assertNotIn('map-get?', self.incremental.transpile(source))
+        output = self.incremental.transpile(declaration + source)
+        self.assertEqual(output, self.transpiler.transpile(declaration + source))
+        self.assertIn('(map-get? balances who)', output)
+        self.assertEqual((self.incremental.compiled, self.incremental.reused), (2, 0))
+
+    def test_invalid_source_raises_like_full_transpile(self):
+        with self.assertRaises(SyntaxError):
+            self.incremental.transpile('function broken( {')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+from lark.exceptions import UnexpectedInput
+
+from .grammar import build_parser
+from .lexer import StxScriptLexer
+from .transpiler import StxScriptTranspiler
+
+SOURCES = [
+    "let x: int = 5;",
+    "const MAX_SUPPLY: uint = 1000000;",
+    "let a: int = -b + c * (d - 0x1F) / 2 % 3 << 1 >> e;",
+    "let c: bool = !a && b || c == d != e <= f >= g < h > i & j | k ^ ~l;",
+    "let r: int = cond ? 1.5e3 : 0b101;",
+    "let t: bool = true; let f: bool = false; let n: int = none();",
+    "let p: principal = 'SP2J6ZY48GV1EZ5V2V5RB9MP66SW86PYKKNRV9EJ7';",
+    "let s: string = \"multi\nline\"; let q: string = 'single';",
+    "let value: int = key + list + optional; let let: int = 1;",
+    "let l: list<int> = [1, 2, 3]; let o: optional<uint> = some(1);",
+    "let r: Response<int, uint> = ok(1); let t: {a: uint, b: bool} = {a: 1, b: true};",
+    "let c: int = [x * 2 for x in xs if x > 1];",
+    "let l: list<int> = [1,\n 'SP1', {to: 'SP2',\n amount: 0x10}, [2, 3], x, 4];",
+    "let f: int = (a: int, b: int) => a + b;",
+    "@map({key: uint, value: principal})\nconst owners = new Map<uint, principal>();",
+    "@asset class Token { owner: principal; supply: uint; }",
+    "trait Transferable { transfer(to: principal, amount: uint): bool; }",
+    "import { a, b } from \"./lib\";\nexport const z: int = 1;",
+    "@public\nfunction transfer(to: principal, amount: uint): Response<bool, uint> {\n"
+    "  if (amount > 0) { return ok(true); } else if (amount == 0) { throw err(1); }\n"
+    "  else { x = y.z(1).w is uint; }\n"
+    "  try { risky(); } catch (e) { return err(e as uint); }\n}",
+    "// leading comment\nlet a: int = 1; /* block\n   comment */ let b: int = a; // trailing",
+    "/**/let a: int = 1;/* * / */",
+    "\n\n   let   spaced :int=\t1 ;\r\n",
+]
+
+
+def lexed(parser, source):
+    """Token attributes in the order the parser consumed them."""
+    interactive = parser.parse_interactive(source)
+    return [(t.type, str(t), t.start_pos, t.line, t.column, t.end_line, t.end_column, t.end_pos)
+            for t in interactive.iter_parse()]
+
+
+class TestStxScriptLexer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.default = build_parser(cache=False)
+        cls.custom = build_parser(cache=False, lexer=StxScriptLexer)
+
+    def test_matches_default_lexer(self):
+        for source in SOURCES:
+            with self.subTest(source=source):
+                self.assertEqual(lexed(self.custom, source), lexed(self.default, source))
+
+    def test_matches_default_parse_trees(self):
+        source = '\n'.join(SOURCES)
+        self.assertEqual(self.custom.parse(source), self.default.parse(source))
+
+    def test_errors_match_default_lexer(self):
+        for source in ("let x: int = 1 $ 2;", "let s: string = 'open;", "let x: int = 1 /* open",
+                       "let x: int = ;", "function 1() {}"):
+            with self.subTest(source=source):
+                with self.assertRaises(UnexpectedInput) as default_error:
+                    self.default.parse(source)
+                with self.assertRaises(UnexpectedInput) as custom_error:
+                    self.custom.parse(source)
+                self.assertEqual(type(custom_error.exception), type(default_error.exception))
+                self.assertEqual((custom_error.exception.line, custom_error.exception.column),
+                                 (default_error.exception.line, default_error.exception.column))
+
+    def test_nested_type_arguments_close_together(self):
+        source = "let x: list<list<uint>> = [[1]]; let y: int = a >> 2;"
+        with self.assertRaises(UnexpectedInput):
+            self.default.parse(source)
+        self.assertEqual(StxScriptTranspiler(lexer=StxScriptLexer).transpile(source),
+                         "(define-data-var x (list (list uint)) (list (list 1)))\n"
+                         "(define-data-var y int (>> a 2))")
+
+    def test_transpiler_modes(self):
+        source = SOURCES[1] + SOURCES[3] + SOURCES[13]
+        expected = StxScriptTranspiler().transpile(source)
+        for fused in (False, True):
+            with self.subTest(fused=fused):
+                transpiler = StxScriptTranspiler(fused=fused, cache_parser=False, lexer=StxScriptLexer)
+                self.assertEqual(transpiler.transpile(source), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
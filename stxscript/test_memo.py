@@ -0,0 +1,97 @@
+import unittest
+
+from .incremental import IncrementalTranspiler
+from .transpiler import StxScriptTranspiler
+
+SOURCE = """const K: uint = 7;
+function square(x: uint): uint { return x * x; }
+@memo
+function price(supply: uint, amount: uint): uint {
+    let base = square(supply) * K;
+    return base + amount;
+}
+@public
+@memo
+function quote(n: uint): Response<uint, uint> { return ok(price(n, 1)); }
+"""
+
+
+class TestMemo(unittest.TestCase):
+    def test_memo_function_is_cached_in_a_map(self):
+        output = StxScriptTranspiler().transpile(SOURCE)
+        self.assertIn("(define-map quote-memo (tuple (n uint)) (response uint uint))\n"
+                      "(define-public (quote (n uint))\n"
+                      "  (match (map-get? quote-memo (tuple (n n)))\n"
+                      "    memo-hit memo-hit\n"
+                      "    (let ((memo-value (ok (price n 1))))\n"
+                      "      (map-set quote-memo (tuple (n n)) memo-value)\n"
+                      "      memo-value)))", output)
+        self.assertIn("(define-map price-memo (tuple (supply uint) (amount uint)) uint)\n"
+                      "(define-private (price (supply uint) (amount uint))\n", output)
+        self.assertIn("(let ((memo-value (begin\n", output)
+
+    def test_function_without_parameters(self):
+        output = StxScriptTranspiler().transpile("@memo\nfunction one(): int { return 1; }")
+        self.assertIn("(define-map one-memo bool int)", output)
+        self.assertIn("(map-get? one-memo true)", output)
+
+    def test_every_transpile_path_agrees(self):
+        transpiler = StxScriptTranspiler()
+        expected = transpiler.transpile(SOURCE)
+        self.assertEqual('\n'.join(transpiler.transpile_iter(SOURCE)), expected)
+        self.assertEqual(transpiler.transpile_with_stats(SOURCE)[0], expected)
+        self.assertEqual(IncrementalTranspiler(transpiler).transpile(SOURCE), expected)
+
+    def test_cache_map_survives_optimisation(self):
+        output = StxScriptTranspiler(opt_level=2).transpile(SOURCE)
+        self.assertIn("(define-map price-memo ", output)
+        self.assertIn("(define-map quote-memo ", output)
+
+    def test_rejects_what_cannot_be_proven_deterministic(self):
+        header = ("let total: int = 1;\n@map({ key: int, value: int })\n"
+                  "const m = new Map<int, int>();\n"
+                  "function reads(x: int): int { return x + total; }\n")
+        cases = {
+            "return x + total;": "reads data variable total",
+            "return m.get(x);": "uses map m",
+            "return reads(x);": "calls reads, and it reads data variable total",
+            "return later(x);": "uses later, which is not",
+            "return x.f(1);": "calls a method",
+        }
+        for body, reason in cases.items():
+            source = header + f"@memo\nfunction f(x: int): int {{ {body} }}\n"
+            with self.subTest(body=body):
+                with self.assertRaisesRegex(SyntaxError, 'f is not provably deterministic: it ' + reason):
+                    StxScriptTranspiler().transpile(source)
+
+    def test_rejects_readable_and_untyped(self):
+        with self.assertRaisesRegex(SyntaxError, 'cannot be @readable'):
+            StxScriptTranspiler().transpile("@readable\n@memo\nfunction f(x: int): int { return x; }")
+        with self.assertRaisesRegex(SyntaxError, 'needs a return type'):
+            StxScriptTranspiler().transpile("@memo\nfunction f(x: int) { return x; }")
+
+    def test_readable_function_cannot_reach_memo(self):
+        readable = "@readable\nfunction getPrice(s: uint): uint { return price(s, 1); }\n"
+        with self.assertRaisesRegex(SyntaxError, '@readable function getPrice calls price'):
+            StxScriptTranspiler().transpile(SOURCE + readable)
+        # Through another function, declared in either order.
+        helper = "function helper(s: uint): uint { return price(s, 1); }\n"
+        readable = "@readable\nfunction getPrice(s: uint): uint { return helper(s); }\n"
+        for source in (SOURCE + helper + readable, readable + helper + SOURCE):
+            with self.subTest(source=source):
+                with self.assertRaisesRegex(SyntaxError, 'getPrice calls helper'):
+                    StxScriptTranspiler().transpile(source)
+        # A local of the same name is not a call.
+        readable = ("@readable\nfunction getPrice(s: uint): uint "
+                    "{ let price = s; return price; }\n")
+        StxScriptTranspiler().transpile(SOURCE + readable)
+
+    def test_locals_and_lambdas_are_allowed(self):
+        source = ("@memo\nfunction f(xs: list<int>): int {\n"
+                  "    let total = fold(xs, 0, (acc: int, x: int) => acc + x);\n"
+                  "    return total;\n}")
+        self.assertIn("(define-map f-memo ", StxScriptTranspiler().transpile(source))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import io
+import tempfile
+import unittest
+
+from .ast_nodes import (BinaryExpression, Expression, Identifier, Literal, Program, Type,
+                        VariableDeclaration)
+from .cache import TranspileCache
+from .passes import ALL, Analyses, Pass, PassManager, NodeTransformer, analysis, child_fields, walk
+from .transpiler import StxScriptTranspiler
+
+
+class DoubleLiterals(NodeTransformer):
+    def visit_Literal(self, node):
+        if isinstance(node.value, int) and not isinstance(node.value, bool):
+            return Literal(node.value * 2)
+        return node
+
+
+class DoublePass(Pass):
+    name = 'double'
+    level = 1
+    preserves = frozenset(('declarations',))
+
+    def run(self, program, analyses):
+        DoubleLiterals().visit(program)
+        return True
+
+
+class RenamePass(Pass):
+    name = 'rename'
+    level = 2
+
+    def run(self, program, analyses):
+        analyses['declarations']
+        return False
+
+
+computed = []
+
+
+@analysis('test-count')
+def _count(program):
+    computed.append(program)
+    return sum(1 for _ in walk(program))
+
+
+class CountingPass(Pass):
+    name = 'count'
+    level = 1
+
+    def run(self, program, analyses):
+        analyses['test-count']
+        analyses['declarations']
+        return True
+
+
+class TestNodeWalk(unittest.TestCase):
+    def test_child_fields_skip_names_and_types(self):
+        self.assertEqual(child_fields(BinaryExpression), ('left', 'right'))
+        self.assertEqual(child_fields(VariableDeclaration), ('value',))
+        self.assertEqual(child_fields(Type), ())
+        self.assertEqual(child_fields(Identifier), ())
+        self.assertEqual(child_fields(int), ())
+
+    def test_walk_is_pre_order(self):
+        tree = BinaryExpression(Literal(1), '+', BinaryExpression(Identifier('a'), '*', Literal(2)))
+        self.assertEqual([type(node).__name__ for node in walk(tree)],
+                         ['BinaryExpression', 'Literal', 'BinaryExpression', 'Identifier', 'Literal'])
+
+    def test_transformer_rewrites_bottom_up(self):
+        program = StxScriptTranspiler().parse("let x: int = 1 + (c ? 2 : [3]);")
+        DoubleLiterals().visit(program)
+        self.assertEqual(StxScriptTranspiler().generator.generate(program),
+                         "(define-data-var x int (+ 2 (if c 4 (list 6))))")
+
+    def test_transformer_uses_base_class_handler(self):
+        class Replace(NodeTransformer):
+            def visit_Expression(self, node):
+                return Identifier('e') if isinstance(node, Literal) else node
+        self.assertEqual(Replace().visit(Literal(1)).name, 'e')
+        self.assertIsInstance(Replace().visit(Identifier('a')), Expression)
+
+    def test_deep_nesting(self):
+        node = Literal(0)
+        for _ in range(100000):
+            node = BinaryExpression(node, '+', Literal(1))
+        node = DoubleLiterals().visit(node)
+        self.assertEqual(node.right, Literal(2))
+        self.assertEqual(sum(1 for _ in walk(node)), 200001)
+
+
+class TestPassManager(unittest.TestCase):
+    pipeline = [DoublePass, RenamePass]
+
+    def test_levels_enable_and_disable(self):
+        names = lambda manager: [p.name for p in manager.passes]
+        self.assertEqual(names(PassManager(0, pipeline=self.pipeline)), [])
+        self.assertEqual(names(PassManager(1, pipeline=self.pipeline)), ['double'])
+        self.assertEqual(names(PassManager(2, pipeline=self.pipeline)), ['double', 'rename'])
+        self.assertEqual(names(PassManager(0, enable=['rename'], pipeline=self.pipeline)), ['rename'])
+        self.assertEqual(names(PassManager(2, disable=['double'], pipeline=self.pipeline)), ['rename'])
+        self.assertEqual(PassManager(0, pipeline=self.pipeline).variant(), '')
+        self.assertEqual(PassManager(2, pipeline=self.pipeline).variant(), 'O2:double,rename')
+
+    def test_rejects_unknown_passes_and_levels(self):
+        with self.assertRaises(ValueError):
+            PassManager(3)
+        with self.assertRaises(ValueError):
+            PassManager(1, disable=['nope'], pipeline=self.pipeline)
+
+    def test_records_timings(self):
+        manager = PassManager(2, pipeline=self.pipeline)
+        manager.run(StxScriptTranspiler().parse("let x: int = 1;"))
+        self.assertEqual(set(manager.timings), {'double', 'rename'})
+
+    def test_only_unpreserved_analyses_are_recomputed(self):
+        program = StxScriptTranspiler().parse("let x: int = 1;")
+        analyses = Analyses(program)
+        declarations = analyses['declarations']
+        analyses['test-count']
+        del computed[:]
+        DoublePass().run(program, analyses)
+        analyses.invalidate(DoublePass.preserves)
+        self.assertIs(analyses['declarations'], declarations)
+        analyses['test-count']
+        self.assertEqual(len(computed), 1)
+        analyses.invalidate(ALL)
+        analyses['test-count']
+        self.assertEqual(len(computed), 1)
+
+    def test_passes_run_in_order_with_shared_analyses(self):
+        del computed[:]
+        PassManager(1, pipeline=[CountingPass, CountingPass]).run(Program([]))
+        self.assertEqual(len(computed), 2)
+
+
+class TestOptimizingTranspiler(unittest.TestCase):
+    source = "const A: int = 1;\nlet b: int = A + 2;"
+
+    def transpiler(self, **options):
+        return StxScriptTranspiler(pass_manager=PassManager(1, pipeline=[DoublePass]), **options)
+
+    def test_passes_apply_to_every_output_mode(self):
+        expected = "(define-constant A 2)\n(define-data-var b int (+ A 4))"
+        transpiler = self.transpiler()
+        self.assertEqual(transpiler.transpile(self.source), expected)
+        self.assertEqual('\n'.join(transpiler.transpile_iter(self.source)), expected)
+        stream = io.StringIO()
+        transpiler.transpile_to(self.source, stream)
+        self.assertEqual(stream.getvalue(), expected)
+        clarity_code, stats = transpiler.transpile_with_stats(self.source)
+        self.assertEqual(clarity_code, expected)
+        self.assertIn('optimize', stats.times)
+        self.assertEqual(set(stats.pass_times), {'double'})
+
+    def test_level_zero_leaves_output_unchanged(self):
+        self.assertEqual(StxScriptTranspiler(opt_level=0).transpile(self.source),
+                         "(define-constant A 1)\n(define-data-var b int (+ A 2))")
+
+    def test_cache_entries_are_per_pipeline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = TranspileCache(directory)
+            plain = StxScriptTranspiler(cache=cache).transpile(self.source)
+            optimized = self.transpiler(cache=cache).transpile(self.source)
+            self.assertNotEqual(plain, optimized)
+            self.assertEqual(self.transpiler(cache=cache).transpile(self.source), optimized)
+            self.assertEqual(cache.stats(), {'hits': 1, 'misses': 2, 'ast_hits': 0, 'ast_misses': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
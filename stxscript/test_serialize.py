@@ -0,0 +1,126 @@
+import tempfile
+import unittest
+
+from lark import Token, Tree
+
+from .ast_nodes import BinaryExpression, Identifier, ListType, Literal, Program, Type
+from .cache import TranspileCache
+from .serialize import MAGIC, dump_ast, load_ast
+from .test_lexer import SOURCES
+from .transpiler import StxScriptTranspiler
+
+
+class TestAstSerialization(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.transpiler = StxScriptTranspiler()
+
+    def test_round_trip(self):
+        for source in SOURCES[:12] + ["const BIG: uint = 340282366920938463463374607431768211455;",
+                                      "let x: int = -7; let y: int = 2.5; let u: string = \"é\";"]:
+            with self.subTest(source=source):
+                program = self.transpiler.parse(source)
+                loaded = load_ast(dump_ast(program))
+                self.assertEqual(loaded, program)
+                self.assertEqual(repr(loaded), repr(program))
+                self.assertEqual(self.transpiler.generator.generate(loaded),
+                                 self.transpiler.generator.generate(program))
+
+    def test_tree_data_keeps_token_type(self):
+        # lark 1.1 names leftover trees with RULE tokens, later versions with strings.
+        for data in (Token('RULE', 'optional_literal'), 'optional_literal'):
+            with self.subTest(data=data):
+                program = Program([Tree(data, [Literal(1)])])
+                loaded = load_ast(dump_ast(program))
+                self.assertEqual(repr(loaded), repr(program))
+                self.assertIs(loaded.statements[0].data.__class__, data.__class__)
+
+    def test_identifiers_and_types_are_interned(self):
+        program = Program([ListType(Type('uint')), Identifier.intern('owner')])
+        loaded = load_ast(dump_ast(program))
+        self.assertIs(loaded.statements[0], ListType(Type('uint')))
+        self.assertIs(loaded.statements[1], Identifier.intern('owner'))
+
+    def test_strings_are_stored_once(self):
+        one = dump_ast(Program([Literal('a-long-repeated-string')]))
+        many = dump_ast(Program([Literal('a-long-repeated-string')] * 50))
+        self.assertLess(len(many) - len(one), 50 * 4)
+
+    def test_deep_nesting(self):
+        node = Literal(0)
+        for i in range(100000):
+            node = BinaryExpression(node, '+', Literal(i))
+        loaded = load_ast(dump_ast(node))
+        for _ in range(100000):
+            self.assertEqual(loaded.operator, '+')
+            loaded = loaded.left
+        self.assertEqual(loaded, Literal(0))
+
+    def test_rejects_foreign_data(self):
+        data = dump_ast(Program([]))
+        for corrupt in (b'PK\x03\x04' + data[4:], data[:4] + b'\x63' + data[5:],
+                        data[:5] + bytes(8) + data[13:], data + b'\0'):
+            with self.subTest(corrupt=corrupt):
+                with self.assertRaises(ValueError):
+                    load_ast(corrupt)
+        self.assertTrue(data.startswith(MAGIC))
+
+    def test_damaged_data_raises_value_error(self):
+        data = dump_ast(self.transpiler.parse(SOURCES[18]))
+        for end in range(len(data)):
+            with self.subTest(truncated=end):
+                with self.assertRaises(ValueError):
+                    load_ast(data[:end])
+        for pos in range(13, len(data)):
+            for bit in (1, 0x80):
+                damaged = bytearray(data)
+                damaged[pos] ^= bit
+                try:
+                    load_ast(bytes(damaged))
+                except ValueError:
+                    pass
+
+    def test_unknown_values_are_rejected(self):
+        with self.assertRaises(TypeError):
+            dump_ast(Program([object()]))
+
+
+class TestCachedAst(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = TranspileCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_loads_from_cache(self):
+        source = SOURCES[18]
+        expected = StxScriptTranspiler(cache=self.cache).parse(source)
+        transpiler = StxScriptTranspiler(cache=self.cache)
+        self.assertEqual(transpiler.parse(source), expected)
+        self.assertIsNone(transpiler._parser)
+        self.assertEqual(self.cache.stats(), {'hits': 0, 'misses': 0, 'ast_hits': 1, 'ast_misses': 1})
+        self.assertEqual(self.cache.get_ast(source, variant='other'), None)
+
+    def test_corrupt_entry_is_parsed_again(self):
+        source = SOURCES[18]
+        expected = StxScriptTranspiler(cache=self.cache).parse(source)
+        path = self.cache._path(self.cache.key(source), '.ast')
+        with open(path, 'r+b') as entry:
+            data = entry.read()
+            entry.seek(0)
+            entry.write(data[:len(data) // 2])
+            entry.truncate()
+        self.assertEqual(StxScriptTranspiler(cache=self.cache).parse(source), expected)
+        self.assertEqual(self.cache.stats(), {'hits': 0, 'misses': 0, 'ast_hits': 0, 'ast_misses': 2})
+
+    def test_ast_entries_are_evicted_and_cleared(self):
+        self.cache.put_ast('let x: int = 1;', StxScriptTranspiler().parse('let x: int = 1;'))
+        self.assertGreater(self.cache.size(), 0)
+        self.cache.clear()
+        self.assertEqual(self.cache.size(), 0)
+        self.assertIsNone(self.cache.get_ast('let x: int = 1;'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import io
+import json
+import os
+import queue
+import socket
+import tempfile
+import threading
+import unittest
+
+from .cache import TranspileCache
+from .client import TranspileClient
+from .server import (INTERNAL_ERROR, INVALID_PARAMS, METHOD_NOT_FOUND, PARSE_ERROR,
+                     REQUEST_CANCELLED, SERVER_BUSY, TRANSPILE_ERROR, TranspileServer,
+                     UnixSocketServer, serve_stdio)
+from .transpiler import StxScriptTranspiler
+
+# Sources that parse but are rejected when @memo functions are lowered.
+MEMO_ERRORS = {
+    '@memo\nfunction f(x: int): int { return x + counter; }\n': 'not provably deterministic',
+    '@memo\nfunction f(x: int): int { return x; }\n'
+    '@readable\nfunction g(x: int): int { return f(x); }\n': '@readable function g calls f',
+}
+
+
+def _request(request_id, method, **params):
+    return json.dumps({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params})
+
+
+class TestTranspileServer(unittest.TestCase):
+    def setUp(self):
+        self.server = TranspileServer(max_queue=2)
+        self.responses = queue.Queue()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _call(self, line):
+        self.server.handle(line, self.responses.put)
+        return self.responses.get(timeout=5)
+
+    def test_transpile_check_and_batch(self):
+        self.server.start()
+        response = self._call(_request(1, 'transpile', source='const PI: int = 314;'))
+        self.assertEqual(response, {'jsonrpc': '2.0', 'id': 1, 'result': {'clarity': '(define-constant PI 314)'}})
+        response = self._call(_request(2, 'transpile', source='function broken( {'))
+        self.assertEqual(response['error']['code'], TRANSPILE_ERROR)
+        self.assertFalse(self._call(_request(3, 'check', source='let ;'))['result']['ok'])
+        results = self._call(_request(4, 'batch', sources=['let x: int = 5;', 'let ;']))['result']['results']
+        self.assertEqual(results[0], {'clarity': '(define-data-var x int 5)'})
+        self.assertIn('error', results[1])
+        stats = self._call(_request(5, 'stats'))['result']
+        self.assertEqual((stats['completed'], stats['failed']), (3, 1))
+
+    def test_protocol_errors(self):
+        self.assertEqual(self._call('{not json')['error']['code'], PARSE_ERROR)
+        self.assertEqual(self._call(_request(1, 'compile'))['error']['code'], METHOD_NOT_FOUND)
+        self.server.start()
+        for method in ('transpile', 'check'):
+            with self.subTest(method=method):
+                self.assertEqual(self._call(_request(2, method))['error']['code'], INVALID_PARAMS)
+
+    def test_check_runs_lowering(self):
+        self.server.start()
+        for request_id, (source, message) in enumerate(MEMO_ERRORS.items()):
+            with self.subTest(source=source):
+                result = self._call(_request(request_id, 'check', source=source))['result']
+                self.assertFalse(result['ok'])
+                self.assertIn(message, result['error'])
+
+    def test_worker_survives_failing_request(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.server = TranspileServer(StxScriptTranspiler(cache=TranspileCache(cache_dir)))
+            self.server.start()
+            # Lone surrogates cannot be encoded to compute the cache key.
+            response = self._call(_request(1, 'transpile', source='let x: int = 5; // \ud800'))
+            self.assertEqual(response['error']['code'], INTERNAL_ERROR)
+            results = self._call(_request(2, 'batch', sources=['\ud800', 'let x: int = 5;']))
+            self.assertIn('UnicodeEncodeError', results['result']['results'][0]['error'])
+            self.assertEqual(results['result']['results'][1], {'clarity': '(define-data-var x int 5)'})
+            stats = self._call(_request(3, 'stats'))['result']
+            self.assertEqual((stats['queued'], stats['completed'], stats['failed']), (0, 1, 1))
+            self.server.stop()
+
+    def test_full_queue_rejects_requests(self):
+        self.server.handle(_request(1, 'transpile', source='let x: int = 5;'), self.responses.put)
+        self.server.handle(_request(2, 'transpile', source='let x: int = 5;'), self.responses.put)
+        self.assertEqual(self._call(_request(3, 'transpile', source='let x: int = 5;'))['error']['code'],
+                         SERVER_BUSY)
+        self.assertEqual(self.server.stats()['rejected'], 1)
+
+    def test_cancel_queued_request(self):
+        self.server.handle(_request(1, 'transpile', source='let x: int = 5;'), self.responses.put)
+        self.assertEqual(self._call(_request(2, 'cancel', id=1))['result'], {'cancelled': True})
+        self.server.start()
+        self.assertEqual(self.responses.get(timeout=5)['error']['code'], REQUEST_CANCELLED)
+        self.assertEqual(self._call(_request(3, 'cancel', id=1))['result'], {'cancelled': False})
+
+    def test_stdio_transport(self):
+        stdin = io.StringIO(_request(1, 'transpile', source='let x: int = 5;') + '\n')
+        stdout = io.StringIO()
+        serve_stdio(self.server, stdin, stdout)
+        self.assertEqual(json.loads(stdout.getvalue())['result'], {'clarity': '(define-data-var x int 5)'})
+
+
+class TestTranspileClient(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'stxscript.sock')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_client_uses_running_daemon(self):
+        server = TranspileServer()
+        unix_server = UnixSocketServer(self.path, server)
+        server.start()
+        thread = threading.Thread(target=unix_server.serve_forever)
+        thread.start()
+        try:
+            with TranspileClient(self.path) as client:
+                self.assertTrue(client.connected)
+                self.assertEqual(client.transpile('let x: int = 5;'), '(define-data-var x int 5)')
+                with self.assertRaises(SyntaxError):
+                    client.transpile('function broken( {')
+                self.assertEqual(client.request('stats')['completed'], 1)
+        finally:
+            unix_server.shutdown()
+            unix_server.server_close()
+            thread.join()
+            server.stop()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_socket_path_of_running_daemon_is_kept(self):
+        server = TranspileServer()
+        unix_server = UnixSocketServer(self.path, server)
+        server.start()
+        thread = threading.Thread(target=unix_server.serve_forever)
+        thread.start()
+        try:
+            with self.assertRaisesRegex(OSError, 'daemon already running'):
+                UnixSocketServer(self.path, TranspileServer())
+            with TranspileClient(self.path) as client:
+                self.assertTrue(client.connected)
+        finally:
+            unix_server.shutdown()
+            unix_server.server_close()
+            thread.join()
+            server.stop()
+
+    def test_stale_socket_is_replaced(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+        unix_server = UnixSocketServer(self.path, TranspileServer())
+        unix_server.server_close()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_client_falls_back_to_in_process(self):
+        client = TranspileClient(self.path)
+        self.assertFalse(client.connected)
+        self.assertEqual(client.transpile('let x: int = 5;'), '(define-data-var x int 5)')
+        self.assertEqual(client.batch(['let ;'])[0].keys(), {'error'})
+        self.assertFalse(client.check('let ;')['ok'])
+        for source, message in MEMO_ERRORS.items():
+            with self.subTest(source=source):
+                self.assertIn(message, client.check(source)['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,14 @@
+import io
+import logging
+import os
+import tempfile
 import unittest
+from pathlib import Path
+from unittest import mock
+from dataclasses import dataclass
+from .ast_nodes import (BinaryExpression, Expression, Identifier, ListLiteral, ListType, Literal,
+                        Program, TupleLiteral, Type)
+from .clarity_generator import ClarityGenerator
 from .transpiler import StxScriptTranspiler
 
 class TestStxScriptTranspiler(unittest.TestCase):
@@ -32,6 +42,11 @@ class TestStxScriptTranspiler(unittest.TestCase):
         expected_clarity = "(define-constant PI 314)"
         self.assert_transpile(stxscript, expected_clarity)
 
+    def test_untyped_declarations(self):
+        self.assert_transpile("const N = 3;", "(define-constant N 3)")
+        declaration = StxScriptTranspiler().parse("let x = N;").statements[0]
+        self.assertEqual((declaration.type, declaration.value.name), (None, 'N'))
+
     def test_map_declaration(self):
         stxscript = """
         @map({ key: principal, value: uint })
@@ -223,5 +238,305 @@ class TestStxScriptTranspiler(unittest.TestCase):
         """
         self.assert_transpile(stxscript, expected_clarity)
 
+class TestFusedParsing(unittest.TestCase):
+    SOURCES = [
+        "let x: int = 5;",
+        "const items = [1, 2, 3];",
+        "let y = c ? f(1, 2) : -x;",
+        """
+        @map({ key: principal, value: uint })
+        const balances = new Map<principal, uint>();
+        """,
+        """
+        @public
+        function add(a: int, b: int): int {
+            if (a > b) {
+                return ok(a);
+            } else {
+                return err("fail");
+            }
+        }
+        """,
+    ]
+
+    def test_fused_ast_matches_two_pass(self):
+        two_pass = StxScriptTranspiler()
+        fused = StxScriptTranspiler(fused=True)
+        for source in self.SOURCES:
+            with self.subTest(source=source):
+                self.assertEqual(repr(fused.parse(source)), repr(two_pass.parse(source)))
+                self.assertEqual(fused.transpile(source), two_pass.transpile(source))
+
+class TestTranspileStats(unittest.TestCase):
+    def test_stats_report_phases_and_counters(self):
+        transpiler = StxScriptTranspiler()
+        source = "function f(a: int): int { return a; }"
+        clarity_code, stats = transpiler.transpile_with_stats(source, trace_memory=True)
+        self.assertEqual(clarity_code, transpiler.transpile(source))
+        self.assertEqual(stats.token_count, 14)
+        self.assertEqual(stats.node_counts['FunctionDeclaration'], 1)
+        self.assertEqual(stats.node_counts['Identifier'], 3)
+        self.assertEqual(stats.node_counts['Type'], 2)
+        self.assertEqual(stats.output_bytes, len(clarity_code))
+        self.assertEqual(set(stats.peak_memory), set(stats.times))
+        self.assertAlmostEqual(stats.total, sum(stats.times.values()))
+
+    def test_stats_wrap_errors_like_transpile(self):
+        with self.assertRaises(SyntaxError):
+            StxScriptTranspiler().transpile_with_stats('function broken( {')
+
+class TestTraceSink(unittest.TestCase):
+    SOURCE = "function f(a: int): int { return ok(a); }"
+
+    def test_callable_sink_receives_rule_results(self):
+        for fused in (False, True):
+            with self.subTest(fused=fused):
+                events = []
+                transpiler = StxScriptTranspiler(fused=fused, trace=lambda *event: events.append(event))
+                clarity_code = transpiler.transpile(self.SOURCE)
+                names = [name for name, _ in events]
+                self.assertIn('function_declaration', names)
+                self.assertIn('call_expression', names)
+                self.assertEqual(names[-2:], ['ast', 'clarity'])
+                self.assertEqual(events[-1][1], clarity_code)
+
+    def test_logger_sink_is_skipped_unless_debug_enabled(self):
+        logger = logging.getLogger('stxscript.test.trace')
+        transpiler = StxScriptTranspiler(trace=logger)
+        logger.setLevel(logging.INFO)
+        with mock.patch.object(logger, 'debug') as debug:
+            transpiler.transpile(self.SOURCE)
+        debug.assert_not_called()
+        logger.setLevel(logging.DEBUG)
+        with self.assertLogs(logger, logging.DEBUG) as logs:
+            transpiler.transpile(self.SOURCE)
+        self.assertTrue(any('function_declaration' in line for line in logs.output))
+
+    def test_transpile_writes_nothing_to_stdout(self):
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            StxScriptTranspiler().transpile(self.SOURCE)
+        self.assertEqual(stdout.getvalue(), '')
+
+class TestStreamingEmitter(unittest.TestCase):
+    def test_transpile_to_matches_transpile(self):
+        transpiler = StxScriptTranspiler()
+        for source in TestFusedParsing.SOURCES:
+            with self.subTest(source=source):
+                stream = io.StringIO()
+                transpiler.transpile_to(source, stream)
+                self.assertEqual(stream.getvalue(), transpiler.transpile(source))
+
+    def test_binary_chain_is_written_in_fragments(self):
+        node = Identifier('x0')
+        for i in range(1, 200):
+            node = BinaryExpression(node, '+', Identifier(f'x{i}'))
+        stream = mock.Mock(wraps=io.StringIO())
+        ClarityGenerator().generate_to(node, stream)
+        expected = '(+ ' * 199 + 'x0 ' + ') '.join(f'x{i}' for i in range(1, 200)) + ')'
+        self.assertEqual(stream.getvalue(), expected)
+        self.assertEqual(ClarityGenerator().generate(node), expected)
+        self.assertGreater(stream.write.call_count, 199)
+
+    def test_transpile_to_wraps_errors(self):
+        with self.assertRaises(SyntaxError):
+            StxScriptTranspiler().transpile_to('function broken( {', io.StringIO())
+
+class TestGeneratorDispatch(unittest.TestCase):
+    def test_subclasses_resolve_to_nearest_handler(self):
+        class Number(Literal):
+            pass
+        generator = ClarityGenerator()
+        self.assertEqual(generator.generate(Number(7)), '7')
+        self.assertIs(ClarityGenerator._dispatch[Number], ClarityGenerator.emit_Literal)
+        self.assertEqual(generator.generate(ListType(Type('uint'))), '(list uint)')
+
+    def test_register_handler_for_new_node_type(self):
+        @dataclass
+        class BlockHeight(Expression):
+            pass
+
+        class Generator(ClarityGenerator):
+            pass
+
+        with self.assertRaises(NotImplementedError):
+            Generator().generate(BlockHeight())
+
+        @Generator.register(BlockHeight)
+        def emit_block_height(generator, node):
+            generator.write('block-height')
+
+        node = BinaryExpression(BlockHeight(), '+', Literal(1))
+        self.assertEqual(Generator().generate(node), '(+ block-height 1)')
+        with self.assertRaises(NotImplementedError):
+            ClarityGenerator().generate(node)
+
+    def test_subclass_methods_override_handlers(self):
+        class Generator(ClarityGenerator):
+            def emit_Identifier(self, node):
+                self.write(node.name.upper())
+
+        node = BinaryExpression(Identifier('a'), '+', Identifier('b'))
+        self.assertEqual(Generator().generate(node), '(+ A B)')
+        self.assertEqual(ClarityGenerator().generate(node), '(+ a b)')
+
+    def test_generate_methods_still_work(self):
+        class Generator(ClarityGenerator):
+            def generate_Identifier(self, node):
+                return node.name.upper()
+
+            def generate_BinaryExpression(self, node):
+                return '[' + super().generate_BinaryExpression(node) + ']'
+
+        node = BinaryExpression(Identifier('a'), '+', BinaryExpression(Identifier('b'), '*', Literal(2)))
+        self.assertEqual(Generator().generate(node), '[(+ A [(* B 2)])]')
+        self.assertEqual(ClarityGenerator().generate_BinaryExpression(node), '(+ a (* b 2))')
+        self.assertEqual(ClarityGenerator().generate_Program(Program([Identifier('a')] * 2)), 'a\na')
+
+class TestDeepNesting(unittest.TestCase):
+    def test_generate_deep_chain_without_recursion(self):
+        node = Identifier('x0')
+        for i in range(1, 100000):
+            node = BinaryExpression(node, '+', Identifier(f'x{i}'))
+        output = ClarityGenerator().generate(node)
+        self.assertTrue(output.startswith('(+ (+ (+ '))
+        self.assertTrue(output.endswith(' x99998) x99999)'))
+        self.assertEqual(output.count('('), 99999)
+
+    def test_transpile_deeply_nested_source(self):
+        depth = 3000
+        sources = {
+            'let y: int = ' + '(' * depth + '1' + ')' * depth + ';': '(define-data-var y int 1)',
+            'let z: int = ' + '[' * depth + '1' + ']' * depth + ';':
+                '(define-data-var z int ' + '(list ' * depth + '1' + ')' * depth + ')',
+        }
+        for fused in (False, True):
+            transpiler = StxScriptTranspiler(fused=fused)
+            for source, expected in sources.items():
+                with self.subTest(fused=fused, source=source[:12]):
+                    self.assertEqual(transpiler.transpile(source), expected)
+
+class TestOperatorPrecedence(unittest.TestCase):
+    CASES = {
+        'a + b * c - d': '(- (+ a (* b c)) d)',
+        'a - b - c': '(- (- a b) c)',
+        '(a + b) * c': '(* (+ a b) c)',
+        'a < b && c >= d || e == f': '(|| (&& (< a b) (>= c d)) (== e f))',
+        'a | b ^ c & d << e': '(| a (^ b (& c (<< d e))))',
+        '-a + !b * ~-c': '(+ (- a) (* (! b) (~ (- c))))',
+        'c ? a + 1 : f(x)': '(if c (+ a 1) (f x))',
+    }
+
+    def test_binary_operators_follow_precedence(self):
+        for fused in (False, True):
+            transpiler = StxScriptTranspiler(fused=fused)
+            for expression, expected in self.CASES.items():
+                with self.subTest(fused=fused, expression=expression):
+                    clarity_code = transpiler.transpile(f'let x: int = {expression};')
+                    self.assertEqual(clarity_code, f'(define-data-var x int {expected})')
+
+    def test_plain_operands_skip_operator_rules(self):
+        events = []
+        StxScriptTranspiler(trace=lambda name, _: events.append(name)).transpile('let x: int = y;')
+        self.assertEqual(events, ['type', 'variable_declaration', 'program', 'ast', 'clarity'])
+
+class TestTranspileIter(unittest.TestCase):
+    SOURCE = (
+        "// bundle\nconst LIMIT: uint = 100;\n"
+        "function pick(a: int, b: int): int {\n"
+        "    if (a > b) { return a; } else { return b; }\n}\n"
+        "/* note; } */ let greeting: string = \"h\u00e9 ; }\";\n"
+    )
+
+    def setUp(self):
+        self.transpiler = StxScriptTranspiler()
+        self.expected = self.transpiler.transpile(self.SOURCE)
+
+    def test_yields_one_result_per_statement(self):
+        results = list(self.transpiler.transpile_iter(self.SOURCE))
+        self.assertEqual(len(results), 3)
+        self.assertEqual('\n'.join(results), self.expected)
+
+    def test_reads_bytes_paths_and_files(self):
+        fd, path = tempfile.mkstemp(suffix='.stx')
+        self.addCleanup(os.unlink, path)
+        with os.fdopen(fd, 'w', encoding='utf-8') as source_file:
+            source_file.write(self.SOURCE)
+        with open(path, 'rb') as binary, open(path, encoding='utf-8') as text:
+            for source in (self.SOURCE.encode('utf-8'), binary, text, io.StringIO(self.SOURCE)):
+                with self.subTest(source=type(source).__name__):
+                    self.assertEqual('\n'.join(self.transpiler.transpile_iter(source)), self.expected)
+        self.assertEqual('\n'.join(self.transpiler.transpile_iter(Path(path))), self.expected)
+
+    def test_empty_file(self):
+        with tempfile.TemporaryFile() as empty:
+            self.assertEqual(list(self.transpiler.transpile_iter(empty)), [])
+
+    def test_statements_before_an_error_are_yielded(self):
+        results = self.transpiler.transpile_iter("let a: int = 1;\n\nlet b: int = ;\nlet c: int = 2;")
+        self.assertEqual(next(results), '(define-data-var a int 1)')
+        with self.assertRaisesRegex(SyntaxError, 'line 3'):
+            next(results)
+
+    def test_generation_errors_after_a_split_fallback_are_wrapped(self):
+        transpiler = StxScriptTranspiler()
+        program = transpiler.parse('let a: int = 1;')
+        # The fragment does not parse on its own, so the rest is parsed whole.
+        transpiler._parse = mock.Mock(side_effect=[ValueError('fragment'), program])
+        transpiler.generator.generate = mock.Mock(side_effect=NotImplementedError('no handler'))
+        with self.assertRaisesRegex(SyntaxError, 'Transpilation failed: no handler'):
+            list(transpiler.transpile_iter('let a: int = 1;'))
+
+class TestLiteralLists(unittest.TestCase):
+    def test_tuple_literals(self):
+        source = 'let t: {a: uint, b: bool} = {a: 1, "b": x};'
+        for fused in (False, True):
+            with self.subTest(fused=fused):
+                self.assertEqual(StxScriptTranspiler(fused=fused).transpile(source),
+                                 '(define-data-var t (tuple (a uint) (b bool)) (tuple (a 1) (b x)))')
+
+    def test_literal_runs_match_element_by_element_parsing(self):
+        items = ["1", "'SP1'", '"two"', "{to: 'SP2', amount: 0x10}", "2.5e1", "[3, 4]", "x", "0b11"]
+        for fused in (False, True):
+            transpiler = StxScriptTranspiler(fused=fused)
+            for count in range(1, len(items) + 1):
+                fast = 'let l: list<int> = [' + ', '.join(items[:count]) + '];'
+                # A comment after each element keeps the lexer from batching.
+                slow = 'let l: list<int> = [' + ' /**/, '.join(items[:count]) + '];'
+                with self.subTest(fused=fused, count=count):
+                    self.assertEqual(transpiler.parse(fast), transpiler.parse(slow))
+
+    def test_huge_literal_list(self):
+        source = 'let l: list<principal> = [' + ', '.join(f"'SP{i}'" for i in range(3000)) + '];'
+        for fused in (False, True):
+            with self.subTest(fused=fused):
+                transpiler = StxScriptTranspiler(fused=fused)
+                elements = transpiler.parse(source).statements[0].value.elements
+                self.assertEqual(len(elements), 3000)
+                self.assertEqual(elements[-1], Literal('SP2999'))
+                self.assertTrue(transpiler.transpile(source).endswith(' "SP2998" "SP2999"))'))
+
+    def test_trailing_comma_is_rejected(self):
+        with self.assertRaises(SyntaxError):
+            StxScriptTranspiler().transpile('let l: list<int> = [1, 2, ];')
+
+    def test_wrapped_literal_lists(self):
+        transpiler = StxScriptTranspiler()
+        transpiler.generator = ClarityGenerator(wrap_width=12)
+        source = 'function f(): int { return [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, {a: 1}]; }'
+        self.assertEqual(transpiler.transpile(source),
+                         '(define-private (f )\n'
+                         '  (list 1 2 3 4 5 6\n'
+                         '    7 8 9 10 11\n'
+                         '    (tuple (a 1))))')
+
+    def test_custom_literal_handler_is_honoured(self):
+        class Generator(ClarityGenerator):
+            def emit_Literal(self, node):
+                self.write(f'u{node.value}')
+
+        node = TupleLiteral({'a': Literal(1)})
+        self.assertEqual(Generator().generate(node), '(tuple (a u1))')
+        self.assertEqual(Generator().generate(ListLiteral([Literal(1), Literal(2)])), '(list u1 u2)')
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,69 @@
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from .watch import InotifyWatcher, PollingWatcher, watch
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, 'src')
+        self.out = os.path.join(self.tmp.name, 'out')
+        os.makedirs(self.src)
+        self._write('a.stx', 'const A: int = 1;')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, text):
+        path = os.path.join(self.src, name)
+        with open(path, 'w') as source_file:
+            source_file.write(text)
+        return path
+
+    def _read_output(self, name):
+        with open(os.path.join(self.out, name)) as output_file:
+            return output_file.read()
+
+    def _check_watcher(self, watcher):
+        try:
+            self.assertEqual(watcher.wait(0.05), set())
+            path = self._write('b.stx', 'let x: int = 5;')
+            self.assertEqual(watcher.wait(2), {path})
+            os.unlink(path)
+            self.assertEqual(watcher.wait(2), {path})
+        finally:
+            watcher.close()
+
+    def test_polling_watcher(self):
+        self._check_watcher(PollingWatcher(self.src, interval=0.01))
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'inotify is Linux-only')
+    def test_inotify_watcher(self):
+        self._check_watcher(InotifyWatcher(self.src))
+
+    def test_watch_rebuilds_changed_files(self):
+        results = queue.Queue()
+        stop = threading.Event()
+        thread = threading.Thread(target=watch, args=(self.src, self.out, results.put),
+                                  kwargs={'debounce': 0.01, 'stop': stop})
+        thread.start()
+        try:
+            self.assertTrue(results.get(timeout=5).ok)
+            self.assertEqual(self._read_output('a.clar'), '(define-constant A 1)')
+            time.sleep(0.05)
+            self._write('a.stx', 'const A: int = 2;')
+            self.assertTrue(results.get(timeout=5).ok)
+            self.assertEqual(self._read_output('a.clar'), '(define-constant A 2)')
+        finally:
+            stop.set()
+            thread.join(5)
+
+
+if __name__ == '__main__':
+    unittest.main()
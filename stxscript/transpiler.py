@@ -1,49 +1,48 @@
-from lark import Lark, Transformer, v_args, Token
+import contextlib
+import io
+import logging
+import mmap
+import os
+import re
+import sys
+
+from lark import Token, v_args
+from lark.visitors import Transformer_NonRecursive
 from .ast_nodes import *
 from .clarity_generator import ClarityGenerator
+from .grammar import build_parser, get_parser
+from .memo import MemoLowering, lower_memo
+from .passes import PassManager
+from .statements import split_statements
+from .stats import TranspileStats, count_nodes
+
+# Binding strength of the binary operators, loosest first.
+BINARY_PRECEDENCE = {
+    operator: level
+    for level, operators in enumerate((
+        ('||',), ('&&',), ('|',), ('^',), ('&',), ('==', '!='),
+        ('<', '>', '<=', '>='), ('<<', '>>'), ('+', '-'), ('*', '/', '%'),
+    ))
+    for operator in operators
+}
+
+# Pieces of a LITERAL_RUN token; whitespace, commas and colons are skipped.
+_LITERAL_RUN_ITEM = re.compile(r'''
+    (?P<string>"[^"]*"|'[^']*')
+  | (?P<key>[a-zA-Z_][a-zA-Z0-9_]*)
+  | (?P<number>0x[0-9a-fA-F]+|0b[01]+|[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)
+  | (?P<open>\{)
+  | (?P<close>\})
+''', re.X)
 
 @v_args(inline=True)
-class StxScriptTransformer(Transformer):
+class StxScriptTransformer(Transformer_NonRecursive):
     def program(self, *statements):
         return Program(list(statements))
 
-    def statement(self, stmt):
-        # Transformation logic for 'statement' rule (adjust based on actual grammar and structure)
-        if isinstance(stmt, FunctionDeclaration):
-            return stmt
-        elif isinstance(stmt, ReturnStatement):
-            return stmt
-        elif isinstance(stmt, VariableDeclaration):
-            return stmt
-        elif isinstance(stmt, ConstantDeclaration):
-            return stmt
-        elif isinstance(stmt, IfStatement):
-            return stmt
-        elif isinstance(stmt, TryCatchStatement):
-            return stmt
-        elif isinstance(stmt, ThrowStatement):
-            return stmt
-        elif isinstance(stmt, ExpressionStatement):
-            return stmt
-        elif isinstance(stmt, MapDeclaration):
-            return stmt
-        elif isinstance(stmt, AssetDeclaration):
-            return stmt
-        elif isinstance(stmt, TraitDeclaration):
-            return stmt
-        elif isinstance(stmt, ImportDeclaration):
-            return stmt
-        elif isinstance(stmt, ExportDeclaration):
-            return stmt
-        else:
-            # Log the unhandled statement for debugging
-            print(f"Unhandled statement type: {type(stmt)}")
-            return stmt  # Return as-is for now, adjust as needed
-
     @v_args(inline=True)
     def function_declaration(self, *items):
-        print(f"Debug: function_declaration called with items={items}")
-        decorators = [d for d in items if isinstance(d, Identifier) and d.name.startswith('@')]
+        decorators = [d for d in items if isinstance(d, str) and d.startswith('@')]
         name = next((i for i in items if isinstance(i, Identifier) and not i.name.startswith('@')), None)
         
         if name is None:
@@ -58,11 +57,15 @@ class StxScriptTransformer(Transformer):
         func = FunctionDeclaration(decorators, name, params, return_type, body)
         return ExportDeclaration(func) if is_export else func
 
-    def variable_declaration(self, name, type_=None, value=None):
-        return VariableDeclaration(name, type_, value)
+    def decorator(self, token):
+        return sys.intern('@' + str(token))
+
+    def variable_declaration(self, name, *rest):
+        # The type is optional: (value) or (type, value).
+        return VariableDeclaration(name, rest[0] if len(rest) == 2 else None, rest[-1])
 
-    def constant_declaration(self, name, type_=None, value=None):
-        return ConstantDeclaration(name, type_, value)
+    def constant_declaration(self, name, *rest):
+        return ConstantDeclaration(name, rest[0] if len(rest) == 2 else None, rest[-1])
 
     def map_declaration(self, *args):
         # Assuming the order is: key_type, value_type, name, _, _, _
@@ -118,90 +121,67 @@ class StxScriptTransformer(Transformer):
         return ReturnStatement(expr)
 
     def import_declaration(self, *items):
-        print(f"Debug: import_declaration called with items={items}")
         imports = [item.name if isinstance(item, Identifier) else item for item in items if item != 'from']
         module = items[-1].value if isinstance(items[-1], Token) else items[-1]
         return ImportDeclaration(module, imports)
 
     def export_declaration(self, func):
-        print(f"Debug: export_declaration called with func={func}")
         return ExportDeclaration(func)
 
-    def expression(self, expr):
-        return expr
-
     def assignment_expression(self, left, right=None):
         return BinaryExpression(left, "=", right) if right else left
 
     def conditional_expression(self, condition, true_expr=None, false_expr=None):
         return TernaryExpression(condition, true_expr, false_expr) if true_expr and false_expr else condition
 
-    @v_args(tree=True)
-    def binary_expression(self, tree):
-        if len(tree.children) == 1:
-            return tree.children[0]
-        left = tree.children[0]
-        for i in range(1, len(tree.children) - 1, 2):
-            op = tree.children[i]
-            right = tree.children[i + 1]
-            left = BinaryExpression(left, op, right)
-        return left
-
-    logical_or_expression = binary_expression
-    logical_and_expression = binary_expression
-    bitwise_or_expression = binary_expression
-    bitwise_xor_expression = binary_expression
-    bitwise_and_expression = binary_expression
-    equality_expression = binary_expression
-    relational_expression = binary_expression
-    shift_expression = binary_expression
-    additive_expression = binary_expression
-    multiplicative_expression = binary_expression
+    def binary_expression(self, *items):
+        # items alternate operand, operator, operand, ...; fold them by
+        # precedence with an explicit operator stack (all are left-associative).
+        operands = [items[0]]
+        operators = []
+        for i in range(1, len(items), 2):
+            operator = items[i]
+            precedence = BINARY_PRECEDENCE[operator]
+            while operators and BINARY_PRECEDENCE[operators[-1]] >= precedence:
+                right = operands.pop()
+                operands[-1] = BinaryExpression(operands[-1], operators.pop(), right)
+            operators.append(operator)
+            operands.append(items[i + 1])
+        while operators:
+            right = operands.pop()
+            operands[-1] = BinaryExpression(operands[-1], operators.pop(), right)
+        return operands[0]
 
     def unary_expression(self, *args):
-        if len(args) == 1:
-            return args[0]
-        return UnaryExpression(args[0], args[1])
+        expr = args[-1]
+        for operator in reversed(args[:-1]):
+            expr = UnaryExpression(operator, expr)
+        return expr
 
     def postfix_expression(self, expr, *postfix):
         for p in postfix:
             if isinstance(p, CallExpression):
-                expr = CallExpression(expr, p.arguments)
+                if isinstance(expr, AssetCallExpression) and not expr.arguments:
+                    expr.arguments = p.arguments
+                else:
+                    expr = CallExpression(expr, p.arguments)
             elif isinstance(p, MemberExpression):
-                expr = MemberExpression(expr, p.property)
+                if isinstance(expr, Identifier) and expr.name == 'NFT':
+                    expr = AssetCallExpression(asset='NFT', function=p.property.name, arguments=[])
+                else:
+                    expr = MemberExpression(expr, p.property)
             elif isinstance(p, TypeCheck):
                 expr = TypeCheck(expr, p.checked_type)
             elif isinstance(p, TypeAssertion):
                 expr = TypeAssertion(expr, p.asserted_type)
         return expr
 
-    @v_args(tree=True)
-    def call_expression(self, tree):
-        print(f"Debug: call_expression called with tree={tree}")
-        print(f"Debug: tree.children = {tree.children}")
-        
-        if not tree.children:
-            print(f"call_expression requires at least a callee. Tree: {tree}")
-            return CallExpression(callee=None, arguments=[])
-        
-        callee = tree.children[0]
-        args = tree.children[1] if len(tree.children) > 1 else []
-        
-        print(f"Debug: callee = {callee}, args = {args}")
-        
-        if isinstance(callee, AssetCallExpression):
-            callee.arguments = args
-            return callee
-        return CallExpression(callee=callee, arguments=args)
-            
-    @v_args(inline=True)
-    def member_expression(self, obj, prop=None):
-        print(f"Debug: member_expression called with obj={obj}, prop={prop}")
-        if prop is None:
-            return obj
-        if isinstance(obj, Identifier) and obj.name == 'NFT':
-            return AssetCallExpression(asset='NFT', function=prop.name, arguments=[])
-        return MemberExpression(object=obj, property=prop)
+    def call_expression(self, arguments=None):
+        # The callee is filled in by postfix_expression.
+        return CallExpression(callee=None, arguments=arguments or [])
+
+    def member_expression(self, prop):
+        return MemberExpression(object=None, property=prop)
 
     def is_expression(self, type_):
         return TypeCheck(None, type_)
@@ -210,22 +190,54 @@ class StxScriptTransformer(Transformer):
         return TypeAssertion(None, type_)
 
     def is_ok_expression(self, expr):
-        print(f"Debug: is_ok_expression called with expr={expr}")
-        return CallExpression(callee=MemberExpression(expr, Identifier('isOk')), arguments=[])
+        return CallExpression(callee=MemberExpression(expr, Identifier.intern('isOk')), arguments=[])
     
     def ok_expression(self, value):
-        print(f"Debug: ok_expression called with value={value}")
-        return CallExpression(callee=Identifier('ok'), arguments=[value])
+        return CallExpression(callee=Identifier.intern('ok'), arguments=[value])
 
     def err_expression(self, value):
-        print(f"Debug: err_expression called with value={value}")
-        return CallExpression(callee=Identifier('err'), arguments=[value])
-
-    def array_or_list_literal(self, *items):
-        return ListLiteral(list(items))
+        return CallExpression(callee=Identifier.intern('err'), arguments=[value])
+
+    @v_args(inline=False)
+    def array_or_list_literal(self, items):
+        if not items or items[0].__class__ is not list:
+            return ListLiteral(items)
+        elements = []
+        for item in items:
+            if item.__class__ is list:
+                elements.extend(item)
+            else:
+                elements.append(item)
+        return ListLiteral(elements)
+
+    def LITERAL_RUN(self, token):
+        # The lexer has validated the run, so its values can be picked out
+        # with one scan instead of several parser reductions each.
+        number, string = self.NUMBER, self.STRING
+        elements = []
+        fields = key = None
+        for match in _LITERAL_RUN_ITEM.finditer(token):
+            kind = match.lastgroup
+            if kind == 'key':
+                key = sys.intern(match.group())
+                continue
+            if kind == 'open':
+                fields = {}
+                continue
+            if kind == 'close':
+                elements.append(TupleLiteral(fields))
+                fields = None
+                continue
+            value = Literal(number(match.group()) if kind == 'number' else string(match.group()))
+            if fields is None:
+                elements.append(value)
+            else:
+                fields[key] = value
+        return elements
 
     def object_or_tuple_literal(self, *items):
-        return TupleLiteral(dict(zip(items[::2], items[1::2])))
+        return TupleLiteral({key.name if isinstance(key, Identifier) else key: value
+                             for key, value in items})
 
     def object_or_tuple_item(self, key, value):
         return key, value
@@ -243,7 +255,9 @@ class StxScriptTransformer(Transformer):
         return Block(list(statements))
 
     def type(self, name):
-        return Type(name)
+        if isinstance(name, Identifier):
+            return Type(name.name)
+        return name
     
     def type_identifier(self, token):
         # Assuming `token` is a Lark token with a `value` attribute representing the type name
@@ -272,10 +286,19 @@ class StxScriptTransformer(Transformer):
 
     def IDENTIFIER(self, token):
         # Assuming `token` is a Lark token with a `value` attribute representing the identifier's name
-        return Identifier(token.value)
+        return Identifier.intern(token.value)
+
+    def BINARY_OP(self, token):
+        return sys.intern(str(token))
+
+    UNARY_OP = BINARY_OP
 
     def NUMBER(self, value):
-        return int(value) if value.isdigit() else float(value)
+        if value.isdigit():
+            return int(value)
+        if value[:2] in ('0x', '0b'):
+            return int(value, 0)
+        return float(value)
 
     def STRING(self, value):
         return value[1:-1]  # Remove quotes
@@ -289,29 +312,352 @@ class StxScriptTransformer(Transformer):
     def lambda_expression(self, parameters, body):
         return LambdaExpression(parameters, body)
     
-    def primary_expression(self, value):
-        # Example transformation logic for primary expression (adjust based on actual grammar)
-        if isinstance(value, list):
-            return value[0]  # If value is a list, return the first element (e.g., Identifier, Literal, etc.)
-        return value
-    
     def generate_MemberExpression(self, node: MemberExpression):
         obj = self.generate(node.object)
         return f'(get {node.property} {obj})'
+
+class TracingTransformer(StxScriptTransformer):
+    """StxScriptTransformer that reports every rule result to ``trace``.
+
+    Only used while tracing is enabled, so the plain transformer carries no
+    per-node checks.
+    """
+
+    def __init__(self, trace):
+        super().__init__()
+        self.trace = trace
+
+    def _call_userfunc(self, tree, new_children=None):
+        result = super()._call_userfunc(tree, new_children)
+        self.trace(tree.data, result)
+        return result
+
+
+class FusedTransformer:
+    """Presents a Transformer's rule callbacks the way lark's LALR parser
+    invokes them on each reduction, so the AST is built while parsing and no
+    intermediate parse tree is materialised.
+
+    Lark only allows lexer callbacks that return tokens, so terminal callbacks
+    (``IDENTIFIER``, ``NUMBER``, ...) are applied when the rule consuming the
+    token is reduced instead.
+    """
+
+    def __init__(self, transformer, trace=None):
+        self.transformer = transformer
+        self.trace = trace
+        self._token_callbacks = {
+            name: getattr(transformer, name)
+            for name in dir(type(transformer)) if name[:1].isupper()
+        }
+
+    def __getattr__(self, name):
+        if name[:1].isupper() or name.startswith('__'):
+            raise AttributeError(name)
+        callback = getattr(self.transformer, name, None)
+        if callback is None:
+            default = self.transformer.__default__
+
+            def reduce(children):
+                return default(name, children, None)
+        else:
+            wrapper = getattr(callback, 'visit_wrapper', None)
+            if wrapper is None:
+                reduce = callback
+            else:
+                def reduce(children):
+                    return wrapper(callback, name, children, None)
+
+        token_callbacks = self._token_callbacks
+        trace = self.trace
+
+        if trace is not None:
+            untraced = reduce
+
+            def reduce(children):
+                result = untraced(children)
+                trace(name, result)
+                return result
+
+        def fused(children):
+            for i, child in enumerate(children):
+                if isinstance(child, Token) and child.type in token_callbacks:
+                    children[i] = token_callbacks[child.type](child)
+            return reduce(children)
+        return fused
+
+
 class StxScriptTranspiler:
-    def __init__(self):
-        with open('stxscript/grammar.lark', 'r') as grammar_file:
-            self.parser = Lark(grammar_file.read(), start='program', parser='lalr')
+    def __init__(self, cache_parser=True, fused=False, cache=None, trace=None, lexer=None,
+                 opt_level=0, pass_manager=None):
+        # The LALR tables are shared per process and persisted on disk (see
+        # grammar.build_parser), so construction is cheap and deferred until
+        # the first transpile. A fused transpiler owns its parser because the
+        # transformer is bound into the parser's reduce callbacks.
+        self.cache_parser = cache_parser
+        self.fused = fused
+        # Optional TranspileCache consulted before parsing.
+        self.cache = cache
+        # Optional trace sink: a callable taking (event, payload), or a
+        # logging.Logger that receives them at DEBUG level.
+        self.trace = trace
+        # Optional lark Lexer class used instead of lark's contextual lexer,
+        # e.g. lexer.StxScriptLexer.
+        self.parser_options = {} if lexer is None else {'lexer': lexer}
+        # AST passes run between transform and generate. ``opt_level`` picks
+        # the default pipeline; a PassManager can also be given directly.
+        self.pass_manager = pass_manager or PassManager(opt_level)
+        self._sink = None
+        self._parser = None
+        self._tracing_parser = None
+        self._tracing_transformer = None
         self.transformer = StxScriptTransformer()
         self.generator = ClarityGenerator()
 
+    @property
+    def parser(self):
+        if self._parser is None:
+            if self.fused:
+                self._parser = build_parser(cache=self.cache_parser,
+                                            transformer=FusedTransformer(self.transformer),
+                                            **self.parser_options)
+            else:
+                self._parser = get_parser(cache=self.cache_parser, **self.parser_options)
+        return self._parser
+
+    def _trace_sink(self):
+        """Resolve the trace sink for one transpile; None when tracing is off."""
+        trace = self.trace
+        if isinstance(trace, logging.Logger):
+            if not trace.isEnabledFor(logging.DEBUG):
+                return None
+            return lambda event, payload: trace.debug('%s: %r', event, payload)
+        return trace
+
+    def _emit(self, event, payload):
+        self._sink(event, payload)
+
+    def _parse_traced(self, input_code):
+        if self.fused:
+            if self._tracing_parser is None:
+                self._tracing_parser = build_parser(
+                    cache=self.cache_parser,
+                    transformer=FusedTransformer(self.transformer, trace=self._emit),
+                    **self.parser_options)
+            return self._tracing_parser.parse(input_code)
+        if self._tracing_transformer is None:
+            self._tracing_transformer = TracingTransformer(self._emit)
+        return self._tracing_transformer.transform(self.parser.parse(input_code))
+
+    def parse(self, input_code):
+        """Parse StxScript source into a :class:`Program` AST.
+
+        With a cache, the tree is stored serialized and later calls for the
+        same source load it instead of parsing.
+        """
+        if self.cache is None:
+            return self._parse(input_code)
+        program = self.cache.get_ast(input_code)
+        if program is None:
+            program = self._parse(input_code)
+            self.cache.put_ast(input_code, program)
+        return program
+
+    def _parse(self, input_code):
+        if self.fused:
+            return self.parser.parse(input_code)
+        return self.transformer.transform(self.parser.parse(input_code))
+
+    def lower(self, program):
+        """Expand constructs with no single Clarity form, such as ``@memo``
+        functions (see :mod:`memo`)."""
+        return lower_memo(program)
+
+    def optimize(self, program):
+        """Run the configured AST passes over ``program``."""
+        if not self.pass_manager.passes:
+            return program
+        return self.pass_manager.run(program)
+
     def transpile(self, input_code):
+        if self.cache is not None:
+            variant = self.pass_manager.variant()
+            clarity_code = self.cache.get(input_code, variant)
+            if clarity_code is not None:
+                return clarity_code
+        clarity_code = self._transpile(input_code)
+        if self.cache is not None:
+            self.cache.put(input_code, clarity_code, variant)
+        return clarity_code
+
+    def _transpile(self, input_code):
+        sink = self._trace_sink()
         try:
-            parse_tree = self.parser.parse(input_code)
-            ast = self.transformer.transform(parse_tree)
-            print("AST:", ast)  # Add this line
+            if sink is None:
+                return self.generator.generate(self.optimize(self.lower(self._parse(input_code))))
+            self._sink = sink
+            ast = self.lower(self._parse_traced(input_code))
+            sink('ast', ast)
+            if self.pass_manager.passes:
+                ast = self.optimize(ast)
+                sink('optimized', ast)
             clarity_code = self.generator.generate(ast)
-            print("Clarity Code:", clarity_code)
+            sink('clarity', clarity_code)
             return clarity_code
         except Exception as e:
-            raise SyntaxError(f"Transpilation failed: {str(e)}")
\ No newline at end of file
+            raise SyntaxError(f"Transpilation failed: {str(e)}")
+        finally:
+            self._sink = None
+
+    def transpile_to(self, input_code, stream):
+        """Transpile ``input_code`` and write the Clarity to ``stream``.
+
+        Output is written fragment by fragment as it is generated, so the
+        full result is never held in memory. With a cache or trace sink
+        configured the result is needed as a whole and is written in one go.
+        """
+        if self.cache is not None or self._trace_sink() is not None:
+            stream.write(self.transpile(input_code))
+            return
+        try:
+            ast = self.optimize(self.lower(self._parse(input_code)))
+            self.generator.generate_to(ast, stream)
+        except OSError:
+            raise
+        except Exception as e:
+            raise SyntaxError(f"Transpilation failed: {str(e)}")
+
+    def transpile_iter(self, source_or_file):
+        """Yield the Clarity for each top-level statement of the input in turn.
+
+        ``source_or_file`` is StxScript source (``str`` or UTF-8 ``bytes``), a
+        path, or a file opened for reading. Files are mapped with ``mmap``
+        rather than read. Statements are split out with
+        :func:`statements.split_statements` and parsed one at a time, so
+        peak memory follows the largest statement rather than the whole
+        input. Joining the results with newlines gives the output of
+        :meth:`transpile`. The transpile cache and trace sink are not used.
+
+        Optimisation passes look at the whole program, so with passes
+        enabled the input is parsed in one go and only the output is
+        produced statement by statement.
+        """
+        with _open_source(source_or_file) as source:
+            if self.pass_manager.passes:
+                yield from self._transpile_optimized(source)
+            else:
+                yield from self._transpile_statements(source)
+
+    def _transpile_optimized(self, source):
+        if not isinstance(source, str):
+            source = bytes(source).decode('utf-8')
+        try:
+            program = self.optimize(self.lower(self._parse(source)))
+        except Exception as e:
+            raise SyntaxError(f"Transpilation failed: {str(e)}")
+        del source
+        self.generator.maps.clear()
+        generate = self.generator.generate
+        for statement in program.statements:
+            try:
+                clarity_code = generate(statement)
+            except Exception as e:
+                raise SyntaxError(f"Transpilation failed: {str(e)}")
+            yield clarity_code
+
+    def _transpile_statements(self, source):
+        self.generator.maps.clear()
+        generate = self.generator.generate
+        # Carries the declarations seen so far from one statement to the next.
+        lower = MemoLowering().lower
+        for start, end in split_statements(source):
+            text = source[start:end]
+            if not isinstance(text, str):
+                text = text.decode('utf-8')
+            try:
+                program = self._parse(text)
+            except Exception:
+                program = None
+            if program is None:
+                # The split is heuristic. Hand the rest of the input to the
+                # full parser, padded so error lines match the input.
+                rest = source[start:]
+                if not isinstance(rest, str):
+                    rest = rest.decode('utf-8')
+                line = source.count('\n' if isinstance(source, str) else b'\n', 0, start)
+                try:
+                    program = self._parse('\n' * line + rest)
+                    statements = lower(program.statements)
+                except Exception as e:
+                    raise SyntaxError(f"Transpilation failed: {str(e)}")
+                del rest
+                for statement in statements:
+                    try:
+                        clarity_code = generate(statement)
+                    except Exception as e:
+                        raise SyntaxError(f"Transpilation failed: {str(e)}")
+                    yield clarity_code
+                return
+            try:
+                statements = lower(program.statements)
+            except Exception as e:
+                raise SyntaxError(f"Transpilation failed: {str(e)}")
+            for statement in statements:
+                try:
+                    clarity_code = generate(statement)
+                except Exception as e:
+                    raise SyntaxError(f"Transpilation failed: {str(e)}")
+                yield clarity_code
+
+    def transpile_with_stats(self, input_code, trace_memory=False):
+        """Transpile ``input_code`` and report per-phase timings and counters.
+
+        Returns ``(clarity_code, TranspileStats)``. This path bypasses the
+        transpile cache and costs an extra tokenizing pass; :meth:`transpile`
+        itself carries no instrumentation.
+        """
+        stats = TranspileStats(trace_memory=trace_memory)
+        try:
+            with stats.phase('grammar_load'):
+                parser = self.parser
+            with stats.phase('lex'):
+                stats.token_count = sum(1 for _ in parser.lex(input_code))
+            with stats.phase('parse'):
+                tree = parser.parse(input_code)
+            with stats.phase('transform'):
+                ast = self.lower(tree if self.fused else self.transformer.transform(tree))
+            if self.pass_manager.passes:
+                with stats.phase('optimize'):
+                    ast = self.optimize(ast)
+                stats.pass_times = dict(self.pass_manager.timings)
+                stats.pass_counters = dict(self.pass_manager.counters)
+            with stats.phase('generate'):
+                clarity_code = self.generator.generate(ast)
+        except Exception as e:
+            raise SyntaxError(f"Transpilation failed: {str(e)}")
+        stats.node_counts = count_nodes(ast)
+        stats.output_bytes = len(clarity_code.encode('utf-8'))
+        return clarity_code, stats
+
+
+@contextlib.contextmanager
+def _open_source(source_or_file):
+    """Present source text, a path or an open file as ``str`` or a buffer."""
+    if isinstance(source_or_file, (str, bytes, bytearray, memoryview, mmap.mmap)):
+        yield source_or_file
+        return
+    if isinstance(source_or_file, os.PathLike):
+        with open(source_or_file, 'rb') as source_file:
+            with _open_source(source_file) as source:
+                yield source
+        return
+    try:
+        fileno = source_or_file.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        yield source_or_file.read()
+        return
+    if os.fstat(fileno).st_size == 0:
+        yield b''
+        return
+    with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+        yield mapped
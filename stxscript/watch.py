@@ -0,0 +1,193 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from .build import SOURCE_SUFFIX, BuildResult, compile_file, find_sources, make_transpiler, output_path
+from .incremental import IncrementalTranspiler
+from .passes import PassManager
+
+
+class PollingWatcher:
+    """Detects changed ``.stx`` files by comparing modification times."""
+
+    def __init__(self, root: str, interval: float = 0.1):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for path in find_sources(self.root):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Block up to ``timeout`` seconds; return the paths that changed."""
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify watcher covering ``root`` and its subdirectories."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, root: str):
+        libc_name = ctypes.util.find_library('c')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError('inotify is not available')
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.root = root
+        self._directories: Dict[int, str] = {}
+        for directory, subdirs, _ in os.walk(root):
+            subdirs[:] = [d for d in subdirs if not d.startswith('.')]
+            self._add_watch(directory)
+
+    def _add_watch(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self._directories[wd] = directory
+
+    def _read_events(self) -> Set[str]:
+        changed = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            directory = self._directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and not name.startswith('.'):
+                    self._add_watch(path)
+                    changed.update(find_sources(path))
+            elif name.endswith(SOURCE_SUFFIX) and not (mask & self.IN_CREATE):
+                # Creation is followed by IN_CLOSE_WRITE once the content is written.
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Block up to ``timeout`` seconds; return the paths that changed."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if readable:
+                changed = self._read_events()
+                if changed:
+                    return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(root: str, polling: bool = False):
+    """Prefer inotify, falling back to modification-time polling."""
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root)
+
+
+class WatchBuilder:
+    """Keeps one warm transpiler and recompiles sources as they change.
+
+    Each source gets an :class:`IncrementalTranspiler` sharing the same
+    parser and generator, so an edit recompiles only the statements touched.
+    """
+
+    def __init__(self, root: str, out_dir: str, cache_dir: Optional[str] = None,
+                 pass_manager: Optional[PassManager] = None):
+        self.root = root
+        self.out_dir = out_dir
+        self.transpiler = make_transpiler(cache_dir, pass_manager)
+        self._files: Dict[str, IncrementalTranspiler] = {}
+
+    def compile(self, paths: Iterable[str]) -> Iterable[BuildResult]:
+        for path in sorted(paths):
+            output = output_path(path, self.root, self.out_dir)
+            if not os.path.exists(path):
+                self._files.pop(path, None)
+                if os.path.exists(output):
+                    os.unlink(output)
+                continue
+            incremental = self._files.get(path)
+            if incremental is None:
+                incremental = self._files[path] = IncrementalTranspiler(self.transpiler)
+            yield compile_file(incremental, path, output)
+
+
+def watch(root: str, out_dir: str, on_result: Callable[[BuildResult], None],
+          debounce: float = 0.05, polling: bool = False, cache_dir: Optional[str] = None,
+          stop: Optional[threading.Event] = None, pass_manager: Optional[PassManager] = None) -> None:
+    """Build everything below ``root``, then rebuild files as they change.
+
+    Bursts of saves are coalesced: after the first change, events are
+    collected until none arrive for ``debounce`` seconds. Runs until ``stop``
+    is set (or forever).
+    """
+    builder = WatchBuilder(root, out_dir, cache_dir, pass_manager)
+    watcher = create_watcher(root, polling)
+    try:
+        for result in builder.compile(find_sources(root)):
+            on_result(result)
+        while stop is None or not stop.is_set():
+            changed = watcher.wait(0.2)
+            if not changed:
+                continue
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+            for result in builder.compile(changed):
+                on_result(result)
+    finally:
+        watcher.close()